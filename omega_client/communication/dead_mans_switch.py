@@ -0,0 +1,219 @@
+"""
+Client-side dead man's switch.  Cancels all orders when Omega heartbeats or
+strategy liveness pings stop arriving.
+"""
+from copy import copy
+import logging
+from threading import Event, Lock, Thread
+import time
+from typing import Callable
+
+from omega_client.communication.omega_connection import OmegaConnection
+from omega_client.messaging.common_types import AuthorizationGrant, \
+    LogonAck, RequestHeader
+
+logger = logging.getLogger(__name__)
+
+
+class DeadMansSwitch(Thread):
+    """
+    Watchdog thread that fires the OmegaConnection kill switch, i.e.
+    cancelAllOrders on every account from LogonAck.client_accounts, when no
+    heartbeat response was received for heartbeat_timeout_seconds, or no
+    liveness ping for liveness_timeout_seconds.
+
+    The checks run on this thread's own timer, so a stuck response handler
+    or strategy thread cannot hold them back.  Forward the ResponseHandler
+    callbacks on_logon_ack, on_authorization_grant and on_heartbeat to this
+    object (the signatures match), send heartbeats periodically, and call
+    ping from the strategy loop if liveness_timeout_seconds is set.
+
+    The switch is armed by a successful logon ack and fires at most once;
+    call reset or log on again to re-arm it.
+
+    Every firing sends its cancels with new request_ids, one per account,
+    from request_id_provider.  Without one, they count up from the
+    request_id of request_header, so give it a range of ids that the
+    strategy's own requests do not use.
+
+    Attributes:
+        _OMEGA_CONNECTION: (OmegaConnection) Connection whose kill switch is
+            fired.
+        _REQUEST_HEADER: (RequestHeader) client_id and sender_comp_id of the
+            cancel requests.
+        _REQUEST_ID_PROVIDER: (Callable[[int], int]) Called with the number
+            of cancel requests, returns the first of as many consecutive
+            unused request_ids.
+        _HEARTBEAT_TIMEOUT_SECONDS: (float) Maximum time between heartbeat
+            responses.
+        _LIVENESS_TIMEOUT_SECONDS: (float) Maximum time between pings, None
+            to not require pings.
+        _CHECK_INTERVAL_SECONDS: (float) How often the timeouts are checked.
+        _ON_TRIGGER: (Callable[[str], None]) Optional callback with the
+            reason, 'heartbeat' or 'liveness', called after firing.
+        _CLOCK: (Callable[[], float]) Monotonic clock in seconds.
+        _access_token: (str) Current access token, sent with the cancels.
+        _next_request_id: (int) Next request_id of the default
+            _REQUEST_ID_PROVIDER.
+        _account_count: (int) Number of accounts the switch is armed for.
+        _last_heartbeat: (float) Clock time of the last heartbeat response.
+        _last_ping: (float) Clock time of the last liveness ping.
+        _is_armed: (bool) True between a logon ack and firing.
+    """
+    def __init__(self,
+                 omega_connection: OmegaConnection,
+                 request_header: RequestHeader,
+                 heartbeat_timeout_seconds: float = 30.,
+                 liveness_timeout_seconds: float = None,
+                 check_interval_seconds: float = 1.,
+                 on_trigger: Callable[[str], None] = None,
+                 request_id_provider: Callable[[int], int] = None,
+                 clock: Callable[[], float] = time.monotonic,
+                 name: str = 'OmegaDeadMansSwitch'):
+        assert omega_connection
+        assert request_header
+        self._OMEGA_CONNECTION = omega_connection
+        self._REQUEST_HEADER = request_header
+        self._HEARTBEAT_TIMEOUT_SECONDS = heartbeat_timeout_seconds
+        self._LIVENESS_TIMEOUT_SECONDS = liveness_timeout_seconds
+        self._CHECK_INTERVAL_SECONDS = check_interval_seconds
+        self._ON_TRIGGER = on_trigger
+        self._REQUEST_ID_PROVIDER = (request_id_provider or
+                                     self._next_request_ids)
+        self._CLOCK = clock
+
+        self._lock = Lock()
+        self._access_token = request_header.access_token
+        self._next_request_id = request_header.request_id
+        self._account_count = 0
+        self._last_heartbeat = clock()
+        self._last_ping = clock()
+        self._is_armed = False
+
+        super().__init__(name=name, daemon=True)
+        self._stopped = Event()
+
+    def is_armed(self):
+        """
+        Return True if the switch fires on the next missed deadline.
+        """
+        return self._is_armed
+
+    def on_logon_ack(self,
+                     logon_ack: LogonAck,
+                     client_id: int = None,
+                     sender_comp_id: str = None,
+                     request_id: int = None):
+        """
+        Arm the switch for the accounts of a successful logon.
+        :param logon_ack: (LogonAck) LogonAck message from Omega.
+        """
+        if not logon_ack.success:
+            return
+        if logon_ack.authorization_grant:
+            self._access_token = logon_ack.authorization_grant.access_token
+        request_header = copy(self._REQUEST_HEADER)
+        request_header.access_token = self._access_token
+        self._OMEGA_CONNECTION.arm_kill_switch(
+            request_header=request_header,
+            accounts=logon_ack.client_accounts)
+        self._account_count = len(logon_ack.client_accounts)
+        self.reset()
+
+    def on_authorization_grant(self,
+                               authorization_grant: AuthorizationGrant,
+                               client_id: int = None,
+                               sender_comp_id: str = None,
+                               request_id: int = None):
+        """
+        Track the access token sent with the cancels.
+        :param authorization_grant: (AuthorizationGrant)
+        """
+        if authorization_grant.success:
+            self._access_token = authorization_grant.access_token
+
+    def on_heartbeat(self,
+                     client_id: int = None,
+                     sender_comp_id: str = None,
+                     request_id: int = None):
+        """
+        Record a heartbeat response from Omega.
+        """
+        self._last_heartbeat = self._CLOCK()
+
+    def ping(self):
+        """
+        Record that the strategy is alive.  Safe to call from any thread.
+        """
+        self._last_ping = self._CLOCK()
+
+    def reset(self):
+        """
+        Re-arm the switch and restart both timeouts.  The kill switch must
+        have been armed by a logon ack before.
+        """
+        with self._lock:
+            now = self._CLOCK()
+            self._last_heartbeat = now
+            self._last_ping = now
+            self._is_armed = True
+
+    def check(self):
+        """
+        Fire if a timeout passed.  Called periodically by the timer thread.
+        :return: (str) The reason the switch fired, None if it did not.
+        """
+        with self._lock:
+            if not self._is_armed:
+                return None
+            now = self._CLOCK()
+            if now - self._last_heartbeat > self._HEARTBEAT_TIMEOUT_SECONDS:
+                reason = 'heartbeat'
+            elif (self._LIVENESS_TIMEOUT_SECONDS is not None and
+                  now - self._last_ping > self._LIVENESS_TIMEOUT_SECONDS):
+                reason = 'liveness'
+            else:
+                return None
+            self._is_armed = False
+            request_id = self._REQUEST_ID_PROVIDER(self._account_count)
+        logger.critical('Dead man\'s switch fired, cancelling all orders.',
+                        extra={'reason': reason})
+        self._OMEGA_CONNECTION.fire_kill_switch(
+            access_token=self._access_token, request_id=request_id)
+        if self._ON_TRIGGER:
+            self._ON_TRIGGER(reason)
+        return reason
+
+    def _next_request_ids(self, request_count: int):
+        """
+        Default _REQUEST_ID_PROVIDER.  Must be called holding _lock.
+        :param request_count: (int) Number of request_ids to reserve.
+        :return: (int) The first reserved request_id.
+        """
+        request_id = self._next_request_id
+        self._next_request_id += request_count
+        return request_id
+
+    ############################################################################
+    #                                                                          #
+    # ~~~~~~~~~~~~~~~~~~~~~~~~~~~~ Thread Methods ~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+    #                                                                          #
+    ############################################################################
+
+    def cleanup(self):
+        """
+        Stop the timer gracefully and join the thread.
+        """
+        self.stop()
+        self.join()
+
+    def stop(self):
+        self._stopped.set()
+
+    def run(self):
+        while not self._stopped.wait(self._CHECK_INTERVAL_SECONDS):
+            try:
+                self.check()
+            except Exception as e:
+                logger.error('Dead man\'s switch check failed.',
+                             extra={'exception': repr(e)})
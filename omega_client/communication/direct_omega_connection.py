@@ -0,0 +1,176 @@
+"""
+Direct Omega Connection.  Single-threaded, low-latency connection to Omega
+without RequestSender, ResponseReceiver or inproc hops.
+"""
+import logging
+import time
+from typing import Callable
+
+# pylint: disable=W0611
+import capnp
+# pylint: enable=W0611
+import zmq
+
+from omega_client.communication.omega_connection import set_curve_keypair
+from omega_client.communication.request_sender import BaseRequestSender, \
+    log_expired_request
+from omega_client.communication.response_receiver import \
+    decode_response
+from omega_client.messaging.response_handler import ResponseHandler
+
+logger = logging.getLogger(__name__)
+
+
+class DirectOmegaConnection(BaseRequestSender):
+    """
+    Connection to Omega that is driven entirely by the caller's thread.
+
+    Requests are serialized and written to omega_socket inside the request
+    method call, and responses are only processed when the caller invokes
+    poll_once or run_until, so there are no cross-thread queues and no
+    thread handoffs on either path.  Intended for strategies that own a core
+    and run their own event loop.
+
+    Like every zmq socket, omega_socket must only be used from one thread:
+    connect, the request methods, poll_once, run_until and close must all be
+    called from the same thread.
+
+    Attributes:
+        _ZMQ_CONTEXT: (zmq.Context) Required to create sockets.
+        _OMEGA_ENDPOINT: (str) The zmq endpoint to connect to Omega.
+        _RESPONSE_HANDLER: (ResponseHandler) Handler of received responses.
+        _OMEGA_SOCKET_IDENTITY: (bytes) Optional DEALER socket identity.
+        _SERVER_ZMQ_ENCRYPTION_KEY: (str) The public key of the Omega server.
+        _omega_socket: (zmq.Socket) DEALER socket connected to Omega, None
+            until connect is called.
+    """
+    def __init__(self,
+                 zmq_context: zmq.Context,
+                 omega_endpoint: str,
+                 response_handler: ResponseHandler,
+                 omega_socket_identity: bytes = None,
+                 server_zmq_encryption_key: str = None):
+        assert zmq_context
+        assert omega_endpoint
+        assert response_handler
+
+        self._ZMQ_CONTEXT = zmq_context
+        self._OMEGA_ENDPOINT = omega_endpoint
+        self._RESPONSE_HANDLER = response_handler
+        self._OMEGA_SOCKET_IDENTITY = omega_socket_identity
+        self._SERVER_ZMQ_ENCRYPTION_KEY = server_zmq_encryption_key
+        self._omega_socket = None
+
+    def set_response_handler(self, response_handler: ResponseHandler):
+        """
+        Set _RESPONSE_HANDLER.
+        :param response_handler:
+        """
+        self._RESPONSE_HANDLER = response_handler
+
+    def connect(self):
+        """
+        Create omega_socket and connect it to Omega.
+        """
+        # pylint: disable=E1101
+        omega_socket = self._ZMQ_CONTEXT.socket(zmq.DEALER)
+        # pylint: enable=E1101
+        if self._SERVER_ZMQ_ENCRYPTION_KEY:
+            set_curve_keypair(omega_socket, self._SERVER_ZMQ_ENCRYPTION_KEY)
+        if self._OMEGA_SOCKET_IDENTITY:
+            omega_socket.setsockopt(zmq.IDENTITY, self._OMEGA_SOCKET_IDENTITY)
+        omega_socket.connect(self._OMEGA_ENDPOINT)
+        self._omega_socket = omega_socket
+
+    def is_connected(self):
+        """
+        Return True if connect was called and close was not, False otherwise.
+        """
+        return self._omega_socket is not None
+
+    def close(self, linger_milli: int = 2000):
+        """
+        Close omega_socket.
+        :param linger_milli: (int) How long pending outgoing messages may
+            still be sent after closing.
+        """
+        if self._omega_socket is not None:
+            self._omega_socket.close(linger=linger_milli)
+            self._omega_socket = None
+
+    def _queue_message(self, omega_message_capnp: capnp._DynamicStructBuilder,
+                       deadline: float = None):
+        """
+        Serialize and send a request on the caller's thread.
+        :param omega_message_capnp: (capnp._DynamicStructBuilder) The
+            TradeMessage to send.
+        :param deadline: (float) Optional utc timestamp after which the
+            request is dropped instead of sent.
+        """
+        if deadline is not None and time.time() > deadline:
+            log_expired_request(omega_message_capnp, deadline)
+            return
+        self._omega_socket.send(omega_message_capnp.to_bytes())
+
+    def poll_once(self, timeout_milli: int = 0, max_messages: int = None):
+        """
+        Wait up to timeout_milli for a response, then handle every response
+        that is immediately available on the caller's thread.
+        :param timeout_milli: (int) How long to wait for the first response.
+            0 returns immediately, -1 waits indefinitely.
+        :param max_messages: (int) Optional cap on the number of responses
+            handled in this call.
+        :return: (int) The number of responses handled.
+        """
+        omega_socket = self._omega_socket
+        if not omega_socket.poll(timeout_milli):
+            return 0
+        handled = 0
+        while max_messages is None or handled < max_messages:
+            try:
+                frame = omega_socket.recv(zmq.NOBLOCK)
+            except zmq.Again:
+                break
+            self._handle_binary_omega_message(frame)
+            handled += 1
+        return handled
+
+    def run_until(self,
+                  condition: Callable[[], bool] = None,
+                  timeout_seconds: float = None,
+                  poll_timeout_milli: int = 100):
+        """
+        Handle responses until condition returns True or timeout_seconds
+        passed.
+        :param condition: (Callable[[], bool]) Checked after each poll.  If
+            None, runs until timeout_seconds passed.
+        :param timeout_seconds: (float) Optional maximum run time.
+        :param poll_timeout_milli: (int) Maximum time spent waiting in a
+            single poll, which bounds how late condition is re-checked.
+        :return: (bool) True if condition was met, False on timeout.
+        """
+        assert condition or timeout_seconds is not None
+        deadline = (time.monotonic() + timeout_seconds
+                    if timeout_seconds is not None else None)
+        while True:
+            if condition is not None and condition():
+                return True
+            poll_timeout = poll_timeout_milli
+            if deadline is not None:
+                remaining_milli = int((deadline - time.monotonic()) * 1000)
+                if remaining_milli <= 0:
+                    return False
+                poll_timeout = min(poll_timeout, remaining_milli)
+            self.poll_once(timeout_milli=poll_timeout)
+
+    def _handle_binary_omega_message(self, binary_msg: bytes):
+        """
+        Pass a received message from Omega to the response handler.
+        :param binary_msg: (bytes) The received binary message.
+        """
+        try:
+            self._RESPONSE_HANDLER.dispatch_response(
+                decode_response(binary_msg))
+        except TypeError as e:
+            logger.error('Exception in decoding message' + repr(e),
+                         extra={'exception': repr(e)})
@@ -0,0 +1,78 @@
+"""
+Frame Journal.  Record raw inbound Omega frames to disk and read them back
+for offline replay.
+
+Each record is a fixed size header (little endian float64 receive timestamp
+followed by a uint32 frame length) and the raw frame bytes.
+"""
+import logging
+import struct
+import time
+from typing import Iterator, Tuple
+
+logger = logging.getLogger(__name__)
+
+_RECORD_HEADER = struct.Struct('<dI')
+
+
+class FrameJournalWriter:
+    """
+    Appends raw frames together with their receive timestamps to a journal
+    file.
+
+    Attributes:
+        _PATH: (str) Path of the journal file.
+        _file: (BufferedWriter) The open journal file.
+    """
+    def __init__(self, path: str):
+        assert path
+        self._PATH = path
+        self._file = open(path, 'ab')
+
+    def write(self, frame: bytes, timestamp: float = None):
+        """
+        Append a frame to the journal.
+        :param frame: (bytes) The raw frame as received from Omega.
+        :param timestamp: (float) Receive unix timestamp, defaults to now.
+        """
+        if timestamp is None:
+            timestamp = time.time()
+        self._file.write(_RECORD_HEADER.pack(timestamp, len(frame)))
+        self._file.write(frame)
+
+    def flush(self):
+        """
+        Flush buffered records to disk.
+        """
+        self._file.flush()
+
+    def close(self):
+        """
+        Flush and close the journal file.
+        """
+        self._file.close()
+
+
+def read_frame_journal(path: str) -> Iterator[Tuple[float, bytes]]:
+    """
+    Read back a journal written by FrameJournalWriter.
+    :param path: (str) Path of the journal file.
+    :return: (Iterator[Tuple[float, bytes]]) (timestamp, frame) pairs in
+        the order they were recorded.
+    """
+    with open(path, 'rb') as journal:
+        while True:
+            header = journal.read(_RECORD_HEADER.size)
+            if not header:
+                return
+            if len(header) < _RECORD_HEADER.size:
+                logger.warning('Truncated frame journal record header.',
+                               extra={'path': path})
+                return
+            timestamp, length = _RECORD_HEADER.unpack(header)
+            frame = journal.read(length)
+            if len(frame) < length:
+                logger.warning('Truncated frame journal record.',
+                               extra={'path': path})
+                return
+            yield timestamp, frame
@@ -0,0 +1,479 @@
+import logging
+from typing import List, Union
+
+import zmq
+
+from omega_client.communication.multi_client_request_sender import \
+    MultiClientRequestSender
+from omega_client.communication.omega_connection import OmegaConnection, \
+    REQUEST_SENDER_ENDPOINT, RESPONSE_RECEIVER_ENDPOINT
+from omega_client.communication.response_receiver import ResponseReceiver
+from omega_client.messaging.common_types import AccountCredentials, \
+    AccountInfo, AuthorizationRefresh, Batch, OCO, OPO, Order, OrderType, \
+    TimeInForce
+from omega_client.messaging.multi_client_response_handler import \
+    MultiClientResponseHandler
+from omega_client.messaging.response_handler import ResponseHandler
+
+logger = logging.getLogger(__name__)
+
+
+class MultiClientOmegaConnection:
+    """
+    Abstract wrapper for OmegaConnection that multiplexes many client_ids
+    over one connection, i.e. one socket to Omega, one CURVE handshake and
+    three threads regardless of the number of clients.
+
+    Every request method takes the client_id it is sent on behalf of;
+    request headers are filled in by MultiClientRequestSender and responses
+    are routed to the ResponseHandler registered for the client.
+    """
+    def __init__(self, omega_connection: OmegaConnection,
+                 request_sender: MultiClientRequestSender,
+                 response_handler: MultiClientResponseHandler):
+        assert isinstance(request_sender, MultiClientRequestSender)
+        assert isinstance(response_handler, MultiClientResponseHandler)
+        self._omega_connection = omega_connection
+        self._request_sender = request_sender
+        self._response_handler = response_handler
+
+    def add_client(self, client_id: int, sender_comp_id: str,
+                   response_handler: ResponseHandler):
+        """
+        Register a client on this connection.
+        :param client_id: (int) The client id assigned by Fund3.
+        :param sender_comp_id: (str) str representation of a unique Python
+            uuid.
+        :param response_handler: (ResponseHandler) Handler for the responses
+            of this client.
+        """
+        self._request_sender.add_client(client_id=client_id,
+                                        sender_comp_id=sender_comp_id)
+        self._response_handler.register(client_id=client_id,
+                                        sender_comp_id=sender_comp_id,
+                                        response_handler=response_handler)
+
+    def remove_client(self, client_id: int):
+        """
+        Unregister a client from this connection, under every
+        sender_comp_id it has used.
+        :param client_id: (int) The client id assigned by Fund3.
+        """
+        self._response_handler.unregister_client(client_id=client_id)
+        self._request_sender.remove_client(client_id=client_id)
+
+    def cleanup(self):
+        """
+        Stop the response receiver gracefully and join the thread.
+        """
+        self._omega_connection.cleanup()
+
+    def is_running(self):
+        """
+        Return True if the thread is running, False otherwise.
+        """
+        return self._omega_connection.is_running()
+
+    def wait_until_running(self):
+        self._omega_connection.wait_until_running()
+
+    def stop(self):
+        """
+        Clear the _is_running Event, which terminates the response receiver
+        loop.
+        """
+        self._omega_connection.stop()
+
+    def start(self):
+        self._omega_connection.start()
+
+    ##########################################################################
+    #                                                                        #
+    # ~~~~~~~~~~~~~~~~~~~~~ Wrapper for Request Sender ~~~~~~~~~~~~~~~~~~~~~ #
+    #                                                                        #
+    ##########################################################################
+    def set_sender_comp_id(self, client_id: int, new_sender_comp_id: str):
+        """
+        Sets the sender_comp_id of a client, for its requests and the
+        routing of its responses.  Responses to requests sent with the
+        previous sender_comp_id, including ones still in flight, keep
+        reaching the client's handler until remove_client.
+        :param client_id: (int) The client to update.
+        :param new_sender_comp_id: (str) Sender comp id generated by
+        client.
+        """
+        # Route the new sender_comp_id before requests carry it.
+        self._response_handler.add_sender_comp_id(
+            client_id=client_id,
+            sender_comp_id=self._request_sender.sender_comp_id(client_id),
+            new_sender_comp_id=new_sender_comp_id)
+        self._request_sender.set_sender_comp_id(
+            client_id=client_id, new_sender_comp_id=new_sender_comp_id)
+
+    def logon(self,
+              client_id: int,
+              client_secret: str,
+              credentials: List[AccountCredentials],
+              deadline: float = None):
+        """
+        Logon to Omega for a specific client_id and set of credentials.
+        :param client_id: (int) The client to logon.
+        :param client_secret: (str) client_secret key assigned by Fund3.
+        :param credentials: (List[AccountCredentials]) List of exchange
+            credentials in the form of AccountCredentials.
+        :param deadline: (float) (optional) utc timestamp after which the
+            request is dropped instead of sent.
+        :return: (capnp._DynamicStructBuilder) Logon capnp object.
+        """
+        return self._request_sender.logon(
+            client_id=client_id,
+            client_secret=client_secret,
+            credentials=credentials,
+            deadline=deadline
+        )
+
+    def logoff(self, client_id: int, deadline: float = None):
+        """
+        Logoff Omega for a specific client_id.
+        :param client_id: (int) The client to logoff.
+        :param deadline: (float) (optional) utc timestamp after which the
+            request is dropped instead of sent.
+        :return: (capnp._DynamicStructBuilder) Logoff capnp object.
+        """
+        return self._request_sender.logoff(
+            client_id=client_id, deadline=deadline)
+
+    def send_test_message(self, client_id: int, test_message: str,
+                          deadline: float = None):
+        return self._request_sender.send_test_message(
+            client_id=client_id, test_message=test_message, deadline=deadline)
+
+    def send_heartbeat(self, client_id: int, deadline: float = None):
+        """
+        Sends a heartbeat to Omega for maintaining and verifying connection.
+        :param client_id: (int) The client the heartbeat is sent for.
+        :param deadline: (float) (optional) utc timestamp after which the
+            request is dropped instead of sent.
+        :return: (capnp._DynamicStructBuilder) heartbeat capnp object.
+        """
+        return self._request_sender.send_heartbeat(
+            client_id=client_id, deadline=deadline)
+
+    def request_server_time(self, client_id: int, deadline: float = None):
+        """
+        Request Omega server time for syncing client and server timestamps.
+        :param client_id: (int) The client the request is sent for.
+        :param deadline: (float) (optional) utc timestamp after which the
+            request is dropped instead of sent.
+        :return: (capnp._DynamicStructBuilder) request_server_time capnp
+        object.
+        """
+        return self._request_sender.request_server_time(
+            client_id=client_id, deadline=deadline)
+
+    def place_order(self, client_id: int, order: Order,
+                    deadline: float = None):
+        """
+        Sends a request to Omega to place an order.
+        :param client_id: (int) The client the order is placed for.
+        :param order: (Order) Python object containing all required fields.
+        :param deadline: (float) (optional) utc timestamp after which the
+            request is dropped instead of sent.
+        :return: (capnp._DynamicStructBuilder) place_order capnp object.
+        """
+        return self._request_sender.place_order(
+            client_id=client_id, order=order, deadline=deadline)
+
+    def place_contingent_order(self,
+                               client_id: int,
+                               contingent_order: Union[Batch, OPO, OCO],
+                               deadline: float = None):
+        """
+        Sends a request to Omega to place a contingent order.
+        :param client_id: (int) The client the order is placed for.
+        :param contingent_order: (Batch, OPO, or OCO) python object
+        :param deadline: (float) (optional) utc timestamp after which the
+            request is dropped instead of sent.
+        :return: (capnp._DynamicStructBuilder) placeContingentOrder capnp
+        object.
+        """
+        return self._request_sender.place_contingent_order(
+            client_id=client_id, contingent_order=contingent_order,
+            deadline=deadline)
+
+    def replace_order(self,
+                      client_id: int,
+                      account_info: AccountInfo,
+                      order_id: str,
+                      # pylint: disable=E1101
+                      order_type: str = OrderType.undefined.name,
+                      quantity: float = 0.0,
+                      price: float = 0.0,
+                      stop_price: float = 0.0,
+                      time_in_force: str = TimeInForce.gtc.name,
+                      # pylint: enable=E1101
+                      expire_at: float = 0.0,
+                      deadline: float = None):
+        """
+        Sends a request to Omega to replace an order.
+        :param client_id: (int) The client the order belongs to.
+        :param account_info: (AccountInfo) Account on which to cancel order.
+        :param order_id: (str) order_id as returned from the
+        ExecutionReport.
+        :param order_type: (OrderType) (optional)
+        :param quantity: (float) (optional)
+        :param price: (float) (optional)
+        :param stop_price: (float) (optional)
+        :param time_in_force: (TimeInForce) (optional)
+        :param expire_at: (float) (optional)
+        :param deadline: (float) (optional) utc timestamp after which the
+            request is dropped instead of sent.
+        :return: (capnp._DynamicStructBuilder) replaceOrder capnp object.
+        """
+        return self._request_sender.replace_order(
+            client_id=client_id,
+            account_info=account_info,
+            order_id=order_id,
+            order_type=order_type,
+            quantity=quantity,
+            price=price,
+            stop_price=stop_price,
+            time_in_force=time_in_force,
+            expire_at=expire_at,
+            deadline=deadline
+        )
+
+    def cancel_order(self,
+                     client_id: int,
+                     account_info: AccountInfo,
+                     order_id: str,
+                     deadline: float = None):
+        """
+        Sends a request to Omega to cancel an order.
+        :param client_id: (int) The client the order belongs to.
+        :param account_info: (AccountInfo) Account on which to cancel order.
+        :param order_id: (str) order_id as returned from the
+        ExecutionReport.
+        :param deadline: (float) (optional) utc timestamp after which the
+            request is dropped instead of sent.
+        :return: (capnp._DynamicStructBuilder) cancel_order object.
+        """
+        return self._request_sender.cancel_order(
+            client_id=client_id,
+            account_info=account_info,
+            order_id=order_id,
+            deadline=deadline
+        )
+
+    def cancel_all_orders(self,
+                          client_id: int,
+                          account_info: AccountInfo,
+                          symbol: str = None,
+                          side: str = None,
+                          deadline: float = None):
+        """
+        Sends a request to Omega to cancel all orders on an account.
+        :param client_id: (int) The client the account belongs to.
+        :param account_info: (AccountInfo) Account on which to cancel order.
+        :param symbol: (str) (optional)
+        :param side: (str) (optional)
+        :param deadline: (float) (optional) utc timestamp after which the
+            request is dropped instead of sent.
+        :return (capnp._DynamicStructBuilder) cancel_all_orders object.
+        """
+        return self._request_sender.cancel_all_orders(
+            client_id=client_id,
+            account_info=account_info,
+            symbol=symbol,
+            side=side,
+            deadline=deadline
+        )
+
+    def request_account_data(self, client_id: int, account_info: AccountInfo,
+                             deadline: float = None):
+        """
+        Sends a request to Omega for full account snapshot including
+        balances, open positions, and working orders on specified account.
+        :param client_id: (int) The client the account belongs to.
+        :param account_info: (AccountInfo) Account from which to retrieve
+        data.
+        :param deadline: (float) (optional) utc timestamp after which the
+            request is dropped instead of sent.
+        :return: (capnp._DynamicStructBuilder) request_account_data capnp
+            object.
+        """
+        return self._request_sender.request_account_data(
+            client_id=client_id, account_info=account_info, deadline=deadline)
+
+    def request_open_positions(self, client_id: int,
+                               account_info: AccountInfo,
+                               deadline: float = None):
+        """
+        Sends a request to Omega for open positions on an Account.
+        :param client_id: (int) The client the account belongs to.
+        :param account_info: (AccountInfo) Account from which to retrieve
+        data.
+        :param deadline: (float) (optional) utc timestamp after which the
+            request is dropped instead of sent.
+        :return: (capnp._DynamicStructBuilder) request_open_positions capnp
+            object.
+        """
+        return self._request_sender.request_open_positions(
+            client_id=client_id, account_info=account_info, deadline=deadline)
+
+    def request_account_balances(self, client_id: int,
+                                 account_info: AccountInfo,
+                                 deadline: float = None):
+        """
+        Sends a request to Omega for full account balances snapshot on an
+        Account.
+        :param client_id: (int) The client the account belongs to.
+        :param account_info: (AccountInfo) Account from which to retrieve
+        data.
+        :param deadline: (float) (optional) utc timestamp after which the
+            request is dropped instead of sent.
+        :return: (capnp._DynamicStructBuilder) request_account_balances
+            capnp object.
+        """
+        return self._request_sender.request_account_balances(
+            client_id=client_id, account_info=account_info, deadline=deadline)
+
+    def request_working_orders(self, client_id: int,
+                               account_info: AccountInfo,
+                               deadline: float = None):
+        """
+        Sends a request to Omega for all working orders snapshot on an
+        Account.
+        :param client_id: (int) The client the account belongs to.
+        :param account_info: (AccountInfo) Account from which to retrieve
+        data.
+        :param deadline: (float) (optional) utc timestamp after which the
+            request is dropped instead of sent.
+        :return: (capnp._DynamicStructBuilder) request_working_orders capnp
+            object.
+        """
+        return self._request_sender.request_working_orders(
+            client_id=client_id, account_info=account_info, deadline=deadline)
+
+    def request_order_status(self,
+                             client_id: int,
+                             account_info: AccountInfo,
+                             order_id: str,
+                             deadline: float = None):
+        """
+        Sends a request to Omega to request status of a specific order.
+        :param client_id: (int) The client the order belongs to.
+        :param account_info: (AccountInfo) Account from which to retrieve
+        data.
+        :param order_id: (str) The id of the order of interest.
+        :param deadline: (float) (optional) utc timestamp after which the
+            request is dropped instead of sent.
+        :return: (capnp._DynamicStructBuilder) request_order_status capnp
+            object.
+        """
+        return self._request_sender.request_order_status(
+            client_id=client_id,
+            account_info=account_info,
+            order_id=order_id,
+            deadline=deadline
+        )
+
+    def request_completed_orders(self,
+                                 client_id: int,
+                                 account_info: AccountInfo,
+                                 count: int = None,
+                                 since: float = None,
+                                 deadline: float = None):
+        """
+        Sends a request to Omega for all completed orders on specified
+        account.  If both 'count' and 'from_unix' are None, returns orders
+        for last 24h.
+        :param client_id: (int) The client the account belongs to.
+        :param account_info: (AccountInfo) Account from which to retrieve
+        data.
+        :param count: (int) optional, number of returned orders (most recent
+            ones).
+        :param since: (float) optional, returns all orders from provided
+            unix timestamp to present.
+        :param deadline: (float) (optional) utc timestamp after which the
+            request is dropped instead of sent.
+        :return: (capnp._DynamicStructBuilder) request_completed_orders
+            capnp object.
+        """
+        return self._request_sender.request_completed_orders(
+            client_id=client_id,
+            account_info=account_info,
+            count=count,
+            since=since,
+            deadline=deadline
+        )
+
+    def request_exchange_properties(self, client_id: int, exchange: str,
+                                    deadline: float = None):
+        """
+        Sends a request to Omega for supported currencies, symbols and their
+        associated properties, timeInForces, and orderTypes on an exchange.
+        :param client_id: (int) The client the request is sent for.
+        :param exchange: (str) The exchange of interest.
+        :param deadline: (float) (optional) utc timestamp after which the
+            request is dropped instead of sent.
+        :return: (capnp._DynamicStructBuilder) request_exchange_properties
+            capnp object.
+        """
+        return self._request_sender.request_exchange_properties(
+            client_id=client_id, exchange=exchange, deadline=deadline)
+
+    def request_authorization_refresh(self,
+                                      client_id: int,
+                                      auth_refresh: AuthorizationRefresh,
+                                      deadline: float = None):
+        """
+        Sends a request to Omega to refresh the session of a client.
+        :param client_id: (int) The client whose session is refreshed.
+        :param auth_refresh: AuthorizationRefresh python object
+        :param deadline: (float) (optional) utc timestamp after which the
+            request is dropped instead of sent.
+        :return: (capnp._DynamicStructBuilder) authorization_refresh capnp
+            object.
+        """
+        return self._request_sender.request_authorization_refresh(
+            client_id=client_id, auth_refresh=auth_refresh, deadline=deadline)
+
+
+def configure_multi_client_omega_connection(
+        zmq_context: zmq.Context,
+        omega_endpoint: str,
+        omega_server_key: str,
+        default_response_handler: ResponseHandler = None):
+    """
+    Set up an OmegaConnection shared by many clients.  Clients are added
+    with MultiClientOmegaConnection.add_client.
+    :param zmq_context: (zmq.Context) Context used to create sockets.
+    :param omega_endpoint: (str) The zmq endpoint to connect to Omega.
+    :param omega_server_key: (str) The public key of the Omega server.
+    :param default_response_handler: (ResponseHandler) Optional handler for
+        responses that do not belong to a registered client.
+    :return: multi_client_omega_connection
+    """
+    request_sender = MultiClientRequestSender(
+        zmq_context=zmq_context,
+        zmq_endpoint=REQUEST_SENDER_ENDPOINT)
+    response_handler = MultiClientResponseHandler(
+        default_handler=default_response_handler)
+    response_handler.set_request_sender(request_sender=request_sender)
+    response_receiver = ResponseReceiver(
+        zmq_context=zmq_context,
+        zmq_endpoint=RESPONSE_RECEIVER_ENDPOINT,
+        response_handler=response_handler)
+    omega_connection = OmegaConnection(
+        zmq_context=zmq_context,
+        omega_endpoint=omega_endpoint,
+        request_sender_endpoint=REQUEST_SENDER_ENDPOINT,
+        response_receiver_endpoint=RESPONSE_RECEIVER_ENDPOINT,
+        request_sender=request_sender,
+        response_receiver=response_receiver,
+        server_zmq_encryption_key=omega_server_key)
+    return MultiClientOmegaConnection(
+        omega_connection=omega_connection,
+        request_sender=request_sender,
+        response_handler=response_handler)
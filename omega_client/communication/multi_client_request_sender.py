@@ -0,0 +1,481 @@
+from queue import Queue
+from threading import Lock
+from typing import Dict, List, Union
+
+import zmq
+
+from omega_client.messaging.common_types import AccountCredentials, \
+    AccountInfo, AuthorizationRefresh, Batch, OCO, OPO, \
+    Order, OrderType, RequestHeader, TimeInForce
+from omega_client.communication.request_sender import RequestSender
+
+
+class MultiClientRequestSender:
+    """
+    Wrapper around RequestSender that carries requests for many client_ids
+    over a single RequestSender and OmegaConnection.
+
+    Per-client RequestHeader state (sender_comp_id, access_token and a
+    monotonically increasing request_id) is kept here so that callers only
+    pass the client_id.
+
+    Attributes:
+        _request_sender: (RequestSender) The shared request sender.
+        _request_headers: (Dict[int, RequestHeader]) Header state per
+            client_id.
+        _header_lock: (Lock) Guards _request_headers and request_id
+            sequencing across threads.
+    """
+    def __init__(self, zmq_context: zmq.Context,
+                 zmq_endpoint: str,
+                 outgoing_message_queue: Queue = None):
+        self._request_sender = RequestSender(
+            zmq_context=zmq_context,
+            zmq_endpoint=zmq_endpoint,
+            outgoing_message_queue=outgoing_message_queue)
+        self._request_headers = dict()  # type: Dict[int, RequestHeader]
+        self._header_lock = Lock()
+
+    def add_client(self, client_id: int, sender_comp_id: str,
+                   first_request_id: int = 1):
+        """
+        Register a client_id so that requests can be sent on its behalf.
+        :param client_id: (int) The client_id assigned by Fund3.
+        :param sender_comp_id: (str) uuid unique to the user session.
+        :param first_request_id: (int) request_id of the first request.
+        """
+        with self._header_lock:
+            self._request_headers[client_id] = RequestHeader(
+                client_id=client_id,
+                sender_comp_id=sender_comp_id,
+                access_token='',
+                request_id=first_request_id - 1)
+
+    def remove_client(self, client_id: int):
+        """
+        Forget a client_id and its header state.
+        :param client_id: (int) The client_id to remove.
+        """
+        with self._header_lock:
+            self._request_headers.pop(client_id, None)
+
+    def client_ids(self):
+        """
+        :return: (List[int]) The registered client_ids.
+        """
+        with self._header_lock:
+            return list(self._request_headers)
+
+    def sender_comp_id(self, client_id: int):
+        """
+        :param client_id: (int) A registered client_id.
+        :return: (str) The current sender_comp_id of the client.
+        """
+        with self._header_lock:
+            return self._request_headers[client_id].sender_comp_id
+
+    def set_sender_comp_id(self, client_id: int, new_sender_comp_id: str):
+        """
+        Sets the sender_comp_id of a registered client.
+        :param client_id: (int) The client_id to update.
+        :param new_sender_comp_id: (str) Sender comp id generated by client.
+        """
+        with self._header_lock:
+            self._request_headers[client_id].sender_comp_id = (
+                new_sender_comp_id)
+
+    def set_access_token(self, client_id: int, access_token: str):
+        """
+        Sets the access_token of a registered client.  Tokens of client_ids
+        that are not, or no longer, registered are ignored.
+        :param client_id: (int) The client_id to update.
+        :param access_token: (str) Access token granted by Omega.  Note that
+            access_token is ignored in logon.
+        """
+        with self._header_lock:
+            header = self._request_headers.get(client_id)
+            if header is not None:
+                header.access_token = access_token
+
+    def _next_request_header(self, client_id: int):
+        """
+        Advance the request_id of a client and return a header snapshot.
+        A fresh RequestHeader is returned because the capnp builders may
+        modify it, e.g. logon clears the access_token.
+        :param client_id: (int) The client_id of the request.
+        :return: (RequestHeader) Header for the next request.
+        """
+        with self._header_lock:
+            header = self._request_headers[client_id]
+            header.request_id += 1
+            return RequestHeader(client_id=header.client_id,
+                                 sender_comp_id=header.sender_comp_id,
+                                 access_token=header.access_token,
+                                 request_id=header.request_id)
+
+    def start(self):
+        """
+        Start the RequestSender thread.
+        """
+        self._request_sender.start()
+
+    def stop(self):
+        """
+        Stop the RequestSender loop.
+        """
+        self._request_sender.stop()
+
+    def is_running(self):
+        """
+        Return True if the RequestSender is running, False otherwise.
+        """
+        return self._request_sender.is_running()
+
+    def cleanup(self):
+        """
+        Stop the RequestSender gracefully and join the thread.
+        """
+        self._request_sender.cleanup()
+    """
+    ############################################################################
+
+    ~~~~~~~~~~~~~~~~~~~~~~~~~~~ Outgoing OmegaMessages ~~~~~~~~~~~~~~~~~~~~~~~~~~~
+    ----------------- Public Methods to be called by client -------------------
+
+    ############################################################################
+    """
+    def logon(self,
+              client_id: int,
+              client_secret: str,
+              credentials: List[AccountCredentials],
+              deadline: float = None):
+        """
+        Logon to Omega for a specific client_id and set of credentials.
+        :param client_id: (int) A registered client_id, see add_client.
+        :param client_secret: (str) client_secret key assigned by Fund3.
+        :param credentials: (List[AccountCredentials]) List of exchange
+            credentials in the form of AccountCredentials.
+        :param deadline: (float) (optional) utc timestamp after which the
+            request is dropped instead of sent.
+        :return: (capnp._DynamicStructBuilder) Logon capnp object.
+        """
+        return self._request_sender.logon(
+            request_header=self._next_request_header(client_id),
+            client_secret=client_secret,
+            credentials=credentials,
+            deadline=deadline)
+
+    def logoff(self, client_id: int, deadline: float = None):
+        """
+        Logoff Omega for a specific client_id.
+        :param client_id: (int) A registered client_id, see add_client.
+        :param deadline: (float) (optional) utc timestamp after which the
+            request is dropped instead of sent.
+        :return: (capnp._DynamicStructBuilder) Logoff capnp object.
+        """
+        return self._request_sender.logoff(
+            request_header=self._next_request_header(client_id),
+            deadline=deadline)
+
+    def send_test_message(self, client_id: int, test_message: str,
+                          deadline: float = None):
+        """
+        Sends a test message to Omega.
+        :param client_id: (int) A registered client_id, see add_client.
+        :param test_message: (str) The test message.
+        :param deadline: (float) (optional) utc timestamp after which the
+            request is dropped instead of sent.
+        :return: (capnp._DynamicStructBuilder) test_message capnp object.
+        """
+        return self._request_sender.send_test_message(
+            request_header=self._next_request_header(client_id),
+            test_message=test_message,
+            deadline=deadline)
+
+    def send_heartbeat(self, client_id: int, deadline: float = None):
+        """
+        Sends a heartbeat to Omega for maintaining and verifying connection.
+        Only clients that are logged on will receive heartbeat back from Omega.
+        :param client_id: (int) A registered client_id, see add_client.
+        :param deadline: (float) (optional) utc timestamp after which the
+            request is dropped instead of sent.
+        :return: (capnp._DynamicStructBuilder) heartbeat capnp object.
+        """
+        return self._request_sender.send_heartbeat(
+            request_header=self._next_request_header(client_id),
+            deadline=deadline)
+
+    def request_server_time(self, client_id: int, deadline: float = None):
+        """
+        Request Omega server time for syncing client and server timestamps.
+        :param client_id: (int) A registered client_id, see add_client.
+        :param deadline: (float) (optional) utc timestamp after which the
+            request is dropped instead of sent.
+        :return: (capnp._DynamicStructBuilder) heartbeat capnp object.
+        """
+        return self._request_sender.request_server_time(
+            request_header=self._next_request_header(client_id),
+            deadline=deadline)
+
+    def place_order(self, client_id: int, order: Order,
+                    deadline: float = None):
+        """
+        Sends a request to Omega to place an order.
+        :param client_id: (int) A registered client_id, see add_client.
+        :param order: (Order) Python object containing all required fields.
+        :param deadline: (float) (optional) utc timestamp after which the
+            request is dropped instead of sent.
+        :return: (capnp._DynamicStructBuilder) place_order capnp object.
+        """
+        return self._request_sender.place_order(
+            request_header=self._next_request_header(client_id), order=order,
+            deadline=deadline)
+
+    def place_contingent_order(self, client_id: int,
+                               contingent_order: Union[Batch, OPO, OCO],
+                               deadline: float = None):
+        """
+        Sends a request to Omega to place a contingent order.
+        :param client_id: (int) A registered client_id, see add_client.
+        :param contingent_order: (Batch, OPO, or OCO) python object
+        :param deadline: (float) (optional) utc timestamp after which the
+            request is dropped instead of sent.
+        :return: (capnp._DynamicStructBuilder) placeContingentOrder capnp
+        object.
+        """
+        return self._request_sender.place_contingent_order(
+            request_header=self._next_request_header(client_id),
+            contingent_order=contingent_order,
+            deadline=deadline
+        )
+
+    def replace_order(self, client_id: int,
+                      account_info: AccountInfo,
+                      order_id: str,
+                      # pylint: disable=E1101
+                      order_type: str = OrderType.undefined.name,
+                      quantity: float = 0.0,
+                      price: float = 0.0,
+                      stop_price: float = 0.0,
+                      time_in_force: str = TimeInForce.gtc.name,
+                      # pylint: enable=E1101
+                      expire_at: float = 0.0,
+                      deadline: float = None):
+        """
+        Sends a request to Omega to replace an order.
+        :param client_id: (int) A registered client_id, see add_client.
+        :param account_info: (AccountInfo) Account on which to cancel order.
+        :param order_id: (str) order_id as returned from the ExecutionReport.
+        :param order_type: (OrderType) (optional)
+        :param quantity: (float) (optional)
+        :param price: (float) (optional)
+        :param stop_price: (float) (optional)
+        :param time_in_force: (TimeInForce) (optional)
+        :param expire_at: (float) (optional)
+        :param deadline: (float) (optional) utc timestamp after which the
+            request is dropped instead of sent.
+        :return: (capnp._DynamicStructBuilder) replaceOrder capnp object.
+        """
+        return self._request_sender.replace_order(
+            request_header=self._next_request_header(client_id),
+            account_info=account_info,
+            order_id=order_id,
+            order_type=order_type,
+            quantity=quantity,
+            price=price,
+            stop_price=stop_price,
+            time_in_force=time_in_force,
+            expire_at=expire_at,
+            deadline=deadline
+        )
+
+    def cancel_order(self, client_id: int,
+                     account_info: AccountInfo,
+                     order_id: str,
+                     deadline: float = None):
+        """
+        Sends a request to Omega to cancel an order.
+        :param client_id: (int) A registered client_id, see add_client.
+        :param account_info: (AccountInfo) Account on which to cancel order.
+        :param order_id: (str) order_id as returned from the ExecutionReport.
+        :param deadline: (float) (optional) utc timestamp after which the
+            request is dropped instead of sent.
+        :return: (capnp._DynamicStructBuilder) cancel_order object.
+        """
+        return self._request_sender.cancel_order(
+            request_header=self._next_request_header(client_id),
+            account_info=account_info,
+            order_id=order_id,
+            deadline=deadline)
+
+    def cancel_all_orders(self, client_id: int,
+                          account_info: AccountInfo,
+                          symbol: str = None,
+                          side: str = None,
+                          deadline: float = None):
+        """
+        Sends a request to Omega to cancel all orders. Optionally including
+        side and/or symbol
+        :param client_id: (int) A registered client_id, see add_client.
+        :param account_info: (AccountInfo) Account on which to cancel order.
+        :param symbol: str (optional)
+        :param side: str (optional)
+        :param deadline: (float) (optional) utc timestamp after which the
+            request is dropped instead of sent.
+        :return: (capnp._DynamicStructBuilder) cancel_all_orders object.
+        """
+        return self._request_sender.cancel_all_orders(
+            request_header=self._next_request_header(client_id),
+            account_info=account_info,
+            symbol=symbol,
+            side=side,
+            deadline=deadline)
+
+    def request_account_data(self, client_id: int, account_info: AccountInfo,
+                             deadline: float = None):
+        """
+        Sends a request to Omega for full account snapshot including balances,
+        open positions, and working orders on specified account.
+        :param client_id: (int) A registered client_id, see add_client.
+        :param account_info: (AccountInfo) Account from which to retrieve data.
+        :param deadline: (float) (optional) utc timestamp after which the
+            request is dropped instead of sent.
+        :return: (capnp._DynamicStructBuilder) get_account_data capnp object.
+        """
+        return self._request_sender.request_account_data(
+            request_header=self._next_request_header(client_id),
+            account_info=account_info,
+            deadline=deadline)
+
+    def request_open_positions(self, client_id: int,
+                               account_info: AccountInfo,
+                               deadline: float = None):
+        """
+        Sends a request to Omega for open positions on an Account.
+        :param client_id: (int) A registered client_id, see add_client.
+        :param account_info: (AccountInfo) Account from which to retrieve data.
+        :param deadline: (float) (optional) utc timestamp after which the
+            request is dropped instead of sent.
+        :return: (capnp._DynamicStructBuilder) get_open_positions capnp
+        object.
+        """
+        return self._request_sender.request_open_positions(
+            request_header=self._next_request_header(client_id),
+            account_info=account_info,
+            deadline=deadline)
+
+    def request_account_balances(self, client_id: int,
+                                 account_info: AccountInfo,
+                                 deadline: float = None):
+        """
+        Sends a request to Omega for full account balances snapshot on an
+        Account.
+        :param client_id: (int) A registered client_id, see add_client.
+        :param account_info: (AccountInfo) Account from which to retrieve data.
+        :param deadline: (float) (optional) utc timestamp after which the
+            request is dropped instead of sent.
+        :return: (capnp._DynamicStructBuilder) get_account_balances capnp
+        object.
+        """
+        return self._request_sender.request_account_balances(
+            request_header=self._next_request_header(client_id),
+            account_info=account_info,
+            deadline=deadline)
+
+    def request_working_orders(self, client_id: int,
+                               account_info: AccountInfo,
+                               deadline: float = None):
+        """
+        Sends a request to Omega for all working orders snapshot on an
+        Account.
+        :param client_id: (int) A registered client_id, see add_client.
+        :param account_info: (AccountInfo) Account from which to retrieve data.
+        :param deadline: (float) (optional) utc timestamp after which the
+            request is dropped instead of sent.
+        :return: (capnp._DynamicStructBuilder) get_working_orders capnp object.
+        """
+        return self._request_sender.request_working_orders(
+            request_header=self._next_request_header(client_id),
+            account_info=account_info,
+            deadline=deadline)
+
+    def request_order_status(self, client_id: int,
+                             account_info: AccountInfo,
+                             order_id: str,
+                             deadline: float = None):
+        """
+        Sends a request to Omega to request status of a specific order.
+        :param client_id: (int) A registered client_id, see add_client.
+        :param account_info: (AccountInfo) Account from which to retrieve data.
+        :param order_id: (str) The id of the order of interest.
+        :param deadline: (float) (optional) utc timestamp after which the
+            request is dropped instead of sent.
+        :return: (capnp._DynamicStructBuilder) get_order_status capnp object.
+        """
+        return self._request_sender.request_order_status(
+            request_header=self._next_request_header(client_id),
+            account_info=account_info,
+            order_id=order_id,
+            deadline=deadline)
+
+    def request_completed_orders(self, client_id: int,
+                                 account_info: AccountInfo,
+                                 count: int = None,
+                                 since: float = None,
+                                 deadline: float = None):
+        """
+        Sends a request to Omega for all completed orders on specified
+        account.  If both 'count' and 'from_unix' are None, returns orders
+        for last 24h.
+        :param client_id: (int) A registered client_id, see add_client.
+        :param account_info: (AccountInfo) Account from which to retrieve data.
+        :param count: (int) optional, number of returned orders (most recent
+            ones).
+        :param since: (float) optional, returns all orders from provided unix
+            timestamp to present.
+        :param deadline: (float) (optional) utc timestamp after which the
+            request is dropped instead of sent.
+        :return: (capnp._DynamicStructBuilder) get_completed_orders capnp
+            object.
+        """
+        return self._request_sender.request_completed_orders(
+            request_header=self._next_request_header(client_id),
+            account_info=account_info,
+            count=count,
+            since=since,
+            deadline=deadline)
+
+    def request_exchange_properties(self, client_id: int, exchange: str,
+                                    deadline: float = None):
+        """
+        Sends a request to Omega for supported currencies, symbols and their
+        associated properties, timeInForces, and orderTypes on an exchange.
+        :param client_id: (int) A registered client_id, see add_client.
+        :param exchange: (str) The exchange of interest.
+        :param deadline: (float) (optional) utc timestamp after which the
+            request is dropped instead of sent.
+        :return: (capnp._DynamicStructBuilder) get_exchange_properties capnp
+            object.
+        """
+        return self._request_sender.request_exchange_properties(
+            request_header=self._next_request_header(client_id),
+            exchange=exchange,
+            deadline=deadline)
+
+    def request_authorization_refresh(self, client_id: int,
+                                      auth_refresh: AuthorizationRefresh,
+                                      deadline: float = None):
+        """
+        Sends a request to Omega to refresh the session
+        :param client_id: (int) A registered client_id, see add_client.
+        :param auth_refresh: AuthorizationRefresh python object
+        :param deadline: (float) (optional) utc timestamp after which the
+            request is dropped instead of sent.
+        :return: (capnp._DynamicStructBuilder) authorization_refresh capnp
+            object.
+        """
+        return self._request_sender.request_authorization_refresh(
+            request_header=self._next_request_header(client_id),
+            auth_refresh=auth_refresh,
+            deadline=deadline
+        )
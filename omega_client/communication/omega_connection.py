@@ -2,25 +2,44 @@
 Omega Connection class.  Send and receive messages to and from Omega.
 """
 import logging
-from threading import Event, Thread
+from queue import Queue
+from threading import Event, Lock, Thread
 import time
-from typing import List, Union
+from typing import Callable, Iterable, List, Set, Union
 
 import zmq
 
-from omega_client.communication.request_sender import RequestSender
+# pylint: disable=E0611
+# pylint: disable=E0401
+import omega_protocol.TradeMessage_capnp as msgs_capnp
+# pylint: enable=E0401
+# pylint: enable=E0611
+from omega_client.communication.priority_request_queue import \
+    BackpressurePolicy
+from omega_client.communication.rate_limiter import RequestRateLimiter
+from omega_client.communication.request_sender import DEADLINE_FRAME, \
+    log_expired_request, RequestSender
 from omega_client.communication.response_receiver import ResponseReceiver
+from omega_client.communication.socket_options import SocketOptions
+from omega_client.communication.wait_strategy import \
+    set_thread_cpu_affinity, WaitStrategy
 from omega_client.messaging.common_types import AccountBalancesReport, \
     AccountCredentials, AccountDataReport, AccountInfo, \
     AuthorizationRefresh, ExchangePropertiesReport, \
     ExecutionReport, OpenPositionsReport, Order, OrderInfo, \
-    OrderType, RequestHeader, TimeInForce, WorkingOrdersReport, Batch, OCO, OPO
+    OrderType, RequestHeader, ResponseHeader, TimeInForce, \
+    WorkingOrdersReport, Batch, OCO, OPO
+from omega_client.messaging.deduplication import \
+    ExecutionReportDeduplicator
+from omega_client.messaging.header_peek import peek_response_header
+from omega_client.messaging.message_factory import cancel_all_orders_capnp
 from omega_client.messaging.response_handler import ResponseHandler
 
 logger = logging.getLogger(__name__)
 
 REQUEST_SENDER_ENDPOINT = 'inproc://OMEGA_REQUEST_SENDER'
 RESPONSE_RECEIVER_ENDPOINT = 'inproc://OMEGA_RESPONSE_RECEIVER'
+KILL_SWITCH_ENDPOINT_PREFIX = 'inproc://OMEGA_KILL_SWITCH_'
 
 
 class OmegaConnection(Thread):
@@ -51,6 +70,26 @@ class OmegaConnection(Thread):
             identity.
         _SERVER_ZMQ_ENCRYPTION_KEY: (str) The public key of the Omega server
             used to encrypt data flowing between the client and server.
+        _WAIT_STRATEGY: (WaitStrategy) How the main loop waits for messages,
+            e.g. blocking poll or busy-poll.
+        _CPU_AFFINITY: (Set[int]) Optional CPUs the connection thread is
+            pinned to.
+        _SOCKET_OPTIONS: (SocketOptions) High-water marks and buffer sizes
+            of the sockets created in run.
+        _EXPIRED_REQUEST_CALLBACK: (Callable) Called with the TradeMessage
+            and its deadline for each request dropped because its deadline
+            passed before it was forwarded to Omega.
+        _KILL_SWITCH_ENDPOINT: (str) inproc endpoint of the dedicated kill
+            switch path, unique per OmegaConnection.
+        _ZERO_COPY: (bool) Forward responses as zmq.Frame objects instead of
+            copying each message into bytes and back.
+        _response_filter: (Callable[[ResponseHeader], bool]) Optional
+            predicate on the header of each response; responses it rejects
+            are dropped before they are forwarded to _response_receiver.
+        _kill_switch_messages: (List[capnp._DynamicStructBuilder]) Pre-built
+            cancelAllOrders TradeMessages, one per armed account.
+        _kill_switch_socket: (zmq.Socket) PUSH socket that fire_kill_switch
+            writes to, guarded by _kill_switch_lock.
         _response_receiver: (ResponseReceiver) The response receiver object.
         _request_sender: (RequestSender) The request sender object.
         _is_running: (Event) An event to indicate if the connection is running.
@@ -65,7 +104,13 @@ class OmegaConnection(Thread):
                  omega_polling_timeout_milli: int = 1000,
                  name: str = 'OmegaConnection',
                  omega_socket_identity: bytes = None,
-                 server_zmq_encryption_key: str = None):
+                 server_zmq_encryption_key: str = None,
+                 wait_strategy: WaitStrategy = None,
+                 cpu_affinity: Set[int] = None,
+                 socket_options: SocketOptions = None,
+                 expired_request_callback: Callable = None,
+                 response_filter: Callable[[ResponseHeader], bool] = None,
+                 zero_copy: bool = False):
         assert zmq_context
         assert omega_endpoint
         assert request_sender_endpoint
@@ -80,13 +125,95 @@ class OmegaConnection(Thread):
         self._OMEGA_POLLING_TIMEOUT_MILLI = omega_polling_timeout_milli
         self._OMEGA_SOCKET_IDENTITY = omega_socket_identity
         self._SERVER_ZMQ_ENCRYPTION_KEY = server_zmq_encryption_key
+        self._WAIT_STRATEGY = wait_strategy or WaitStrategy()
+        self._CPU_AFFINITY = cpu_affinity
+        self._SOCKET_OPTIONS = socket_options or SocketOptions()
+        self._EXPIRED_REQUEST_CALLBACK = (expired_request_callback or
+                                          log_expired_request)
 
         self._response_receiver = response_receiver
         self._request_sender = request_sender
 
+        self._KILL_SWITCH_ENDPOINT = (KILL_SWITCH_ENDPOINT_PREFIX +
+                                      str(id(self)))
+        self._kill_switch_messages = list()
+        self._kill_switch_socket = None
+        self._kill_switch_lock = Lock()
+        self._response_filter = response_filter
+        self._ZERO_COPY = zero_copy
+
         super().__init__(name=name)
         self._is_running = Event()
 
+    ############################################################################
+    #                                                                          #
+    # ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ Kill Switch ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+    #                                                                          #
+    ############################################################################
+
+    def arm_kill_switch(self, request_header: RequestHeader,
+                        accounts: List[AccountInfo]):
+        """
+        Pre-build the cancelAllOrders requests sent by fire_kill_switch.
+        Arming again replaces the previously armed accounts.
+        :param request_header: Header parameter object for requests.  The
+            access_token and request_id can be replaced when firing.
+        :param accounts: (List[AccountInfo]) Accounts to cancel all orders
+            on, e.g. LogonAck.client_accounts.
+        """
+        kill_switch_messages = [
+            cancel_all_orders_capnp(request_header=request_header,
+                                    account_info=account_info)[0]
+            for account_info in accounts]
+        with self._kill_switch_lock:
+            self._kill_switch_messages = kill_switch_messages
+
+    def is_kill_switch_armed(self):
+        """
+        Return True if fire_kill_switch would send any request.
+        """
+        return bool(self._kill_switch_messages)
+
+    def fire_kill_switch(self, access_token: str = None,
+                         request_id: int = None):
+        """
+        Send cancelAllOrders for every armed account.  The requests bypass
+        the RequestSender queue: they are serialized on the calling thread
+        and pushed over a dedicated inproc socket that the connection thread
+        polls before any other socket and writes straight to omega_socket.
+        Safe to call from any thread.
+        :param access_token: (str) Current access token, if it changed since
+            the kill switch was armed.
+        :param request_id: (int) request_id of the first request; the
+            following requests use consecutive ids.
+        :return: (int) The number of cancelAllOrders requests sent.
+        """
+        with self._kill_switch_lock:
+            if not self._kill_switch_messages:
+                logger.error('Kill switch fired but not armed.')
+                return 0
+            if self._kill_switch_socket is None:
+                # pylint: disable=E1101
+                self._kill_switch_socket = self._ZMQ_CONTEXT.socket(zmq.PUSH)
+                # pylint: enable=E1101
+                self._kill_switch_socket.connect(self._KILL_SWITCH_ENDPOINT)
+            for index, omega_message in enumerate(self._kill_switch_messages):
+                request = omega_message.type.request
+                if access_token is not None:
+                    request.accessToken = access_token
+                if request_id is not None:
+                    request.requestID = request_id + index
+                self._kill_switch_socket.send(omega_message.to_bytes())
+            logger.warning('Kill switch fired.', extra={
+                'accounts': len(self._kill_switch_messages)})
+            return len(self._kill_switch_messages)
+
+    def _close_kill_switch_socket(self):
+        with self._kill_switch_lock:
+            if self._kill_switch_socket is not None:
+                self._kill_switch_socket.close(linger=0)
+                self._kill_switch_socket = None
+
     ############################################################################
     #                                                                          #
     # ~~~~~~~~~~~~~~~~~~~~~~~~~~~~ Thread Methods ~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
@@ -116,32 +243,88 @@ class OmegaConnection(Thread):
         """
         self._is_running.clear()
 
+    @staticmethod
+    def _forward_kill_switch(kill_switch_listener_socket: zmq.Socket,
+                             omega_socket: zmq.Socket):
+        """
+        Write every pending kill switch request straight to omega_socket.
+        """
+        while True:
+            try:
+                # pylint: disable=E1101
+                omega_socket.send(kill_switch_listener_socket.recv(zmq.NOBLOCK))
+                # pylint: enable=E1101
+            except zmq.Again:
+                return
+
+    def set_response_filter(
+            self, response_filter: Callable[[ResponseHeader], bool] = None):
+        """
+        Filter responses by their header, read with peek_response_header
+        before the response is decoded, e.g. with a ResponseFilter.  Safe to
+        call while running.
+        :param response_filter: (Callable[[ResponseHeader], bool]) Returns
+            False for responses to drop, None to forward all responses.
+        """
+        self._response_filter = response_filter
+
+    def _is_accepted(self, incoming_message: bytes):
+        """
+        :param incoming_message: (bytes) A serialized TradeMessage from Omega,
+            or the buffer of a zmq.Frame.
+        :return: (bool) True if the message is forwarded to the response
+            receiver.
+        """
+        response_filter = self._response_filter
+        if response_filter is None:
+            return True
+        response_header = peek_response_header(incoming_message)
+        # Frames that cannot be peeked are left to the response receiver,
+        # which logs decoding errors.
+        return response_header is None or response_filter(response_header)
+
+    def _is_expired(self, outgoing_message: bytes, deadline_frame: bytes):
+        """
+        Check the deadline a request was sent with and report it if the
+        deadline passed.
+        :param outgoing_message: (bytes) The serialized TradeMessage.
+        :param deadline_frame: (bytes) The deadline packed as DEADLINE_FRAME.
+        :return: (bool) True if the request must be dropped.
+        """
+        deadline, = DEADLINE_FRAME.unpack(deadline_frame)
+        if time.time() <= deadline:
+            return False
+        self._EXPIRED_REQUEST_CALLBACK(
+            msgs_capnp.TradeMessage.from_bytes(outgoing_message), deadline)
+        return True
+
     def _set_curve_keypair(self, socket: zmq.Socket):
         """
         Generate a client keypair using CURVE encryption mechanism, and set
         the server key for encryption.
         :param socket: (zmq.Socket) The socket to set CURVE key.
         """
-        client_public, client_secret = zmq.curve_keypair()
-        socket.curve_publickey = client_public
-        socket.curve_secretkey = client_secret
-        socket.setsockopt_string(zmq.CURVE_SERVERKEY,
-                                 self._SERVER_ZMQ_ENCRYPTION_KEY)
+        set_curve_keypair(socket, self._SERVER_ZMQ_ENCRYPTION_KEY)
 
     def run(self):
         """
         Main loop for Omega connection.
-        Set up 3 sockets:
+        Set up 4 sockets:
         1. omega_socket - the socket that sends and receives messages from
         Omega.
         2. request_listener_socket - listens to requests from request sender
             and forward them to omega_socket.
         3. response_forwarding_socket - forwards responses to response_receiver
             when responses are received from Omega.
+        4. kill_switch_listener_socket - receives fire_kill_switch requests,
+            which are forwarded to omega_socket before anything else.
         """
+        if self._CPU_AFFINITY:
+            set_thread_cpu_affinity(self._CPU_AFFINITY)
         # pylint: disable=E1101
         omega_socket = self._ZMQ_CONTEXT.socket(zmq.DEALER)
         # pylint: enable=E1101
+        self._SOCKET_OPTIONS.apply(omega_socket)
         if self._SERVER_ZMQ_ENCRYPTION_KEY:
             self._set_curve_keypair(omega_socket)
         if self._OMEGA_SOCKET_IDENTITY:
@@ -149,31 +332,66 @@ class OmegaConnection(Thread):
         omega_socket.connect(self._OMEGA_ENDPOINT)
 
         request_listener_socket = self._ZMQ_CONTEXT.socket(zmq.DEALER)
+        self._SOCKET_OPTIONS.apply(request_listener_socket)
         request_listener_socket.bind(self._REQUEST_SENDER_ENDPOINT)
         self._request_sender.start()
 
         response_forwarding_socket = self._ZMQ_CONTEXT.socket(zmq.DEALER)
+        self._SOCKET_OPTIONS.apply(response_forwarding_socket)
         response_forwarding_socket.bind(self._RESPONSE_RECEIVER_ENDPOINT)
         self._response_receiver.start()
 
+        # pylint: disable=E1101
+        kill_switch_listener_socket = self._ZMQ_CONTEXT.socket(zmq.PULL)
+        # pylint: enable=E1101
+        kill_switch_listener_socket.bind(self._KILL_SWITCH_ENDPOINT)
+
         poller = zmq.Poller()
         #pylint: disable=E1101
+        poller.register(kill_switch_listener_socket, zmq.POLLIN)
         poller.register(omega_socket, zmq.POLLIN)
         poller.register(request_listener_socket, zmq.POLLIN)
         #pylint: enable=E1101
+        wait_strategy = self._WAIT_STRATEGY
+        polling_timeout_milli = wait_strategy.poll_timeout_milli(
+            self._OMEGA_POLLING_TIMEOUT_MILLI)
+        idle_count = 0
         self._is_running.set()
         while self.is_running():
-            socks = dict(poller.poll(self._OMEGA_POLLING_TIMEOUT_MILLI))
+            socks = dict(poller.poll(polling_timeout_milli))
+            if not socks:
+                idle_count += 1
+                wait_strategy.idle(idle_count)
+                continue
+            idle_count = 0
+            if socks.get(kill_switch_listener_socket) == zmq.POLLIN:
+                self._forward_kill_switch(kill_switch_listener_socket,
+                                          omega_socket)
+
             if socks.get(omega_socket) == zmq.POLLIN:
-                incoming_message = omega_socket.recv()
-                response_forwarding_socket.send(incoming_message)
+                if self._ZERO_COPY:
+                    frame = omega_socket.recv(copy=False)
+                    if self._is_accepted(frame.buffer):
+                        response_forwarding_socket.send(frame, copy=False)
+                else:
+                    incoming_message = omega_socket.recv()
+                    if self._is_accepted(incoming_message):
+                        response_forwarding_socket.send(incoming_message)
 
             if socks.get(request_listener_socket) == zmq.POLLIN:
                 outgoing_message = request_listener_socket.recv()
+                # pylint: disable=E1101
+                has_deadline = request_listener_socket.getsockopt(zmq.RCVMORE)
+                # pylint: enable=E1101
+                if has_deadline and self._is_expired(
+                        outgoing_message, request_listener_socket.recv()):
+                    continue
                 omega_socket.send(outgoing_message)
         time.sleep(2.)
         omega_socket.close()
         request_listener_socket.close()
+        kill_switch_listener_socket.close()
+        self._close_kill_switch_socket()
         self._request_sender.cleanup()
         response_forwarding_socket.close()
         self._response_receiver.stop()
@@ -186,84 +404,111 @@ class OmegaConnection(Thread):
     def logon(self,
               request_header: RequestHeader,
               client_secret: str,
-              credentials: List[AccountCredentials]):
+              credentials: List[AccountCredentials],
+              deadline: float = None):
         """
         Logon to Omega for a specific client_id and set of credentials.
         :param request_header: Header parameter object for requests.
         :param client_secret: (str) client_secret key assigned by Fund3.
         :param credentials: (List[AccountCredentials]) List of exchange
             credentials in the form of AccountCredentials.
+        :param deadline: (float) (optional) utc timestamp after which the
+            request is dropped instead of sent.
         :return: (capnp._DynamicStructBuilder) Logon capnp object.
         """
         return self._request_sender.logon(
             request_header=request_header,
             client_secret=client_secret,
-            credentials=credentials
+            credentials=credentials,
+            deadline=deadline
         )
 
-    def logoff(self, request_header: RequestHeader):
+    def logoff(self, request_header: RequestHeader, deadline: float = None):
         """
         Logoff Omega for a specific client_id.
         :param request_header: Header parameter object for requests.
+        :param deadline: (float) (optional) utc timestamp after which the
+            request is dropped instead of sent.
         :return: (capnp._DynamicStructBuilder) Logoff capnp object.
         """
-        return self._request_sender.logoff(request_header=request_header)
+        return self._request_sender.logoff(request_header=request_header,
+                                           deadline=deadline)
 
     def send_test_message(self, request_header: RequestHeader,
-                          test_message: str):
+                          test_message: str,
+                          deadline: float = None):
         """
        Sends a test message to Omega for checking connectivity.  Client id
        and sender_comp_id won't be checked although they are required,
        so fake ids can be sent.
        :param request_header: Header parameter object for requests.
        :param test_message: (str) Test message.
+        :param deadline: (float) (optional) utc timestamp after which the
+            request is dropped instead of sent.
        :return: (capnp._DynamicStructBuilder) test_message capnp object.
        """
         return self._request_sender.send_test_message(
-            request_header=request_header, test_message=test_message)
+            request_header=request_header, test_message=test_message,
+            deadline=deadline)
 
-    def send_heartbeat(self, request_header: RequestHeader):
+    def send_heartbeat(self, request_header: RequestHeader,
+                       deadline: float = None):
         """
         Sends a heartbeat to Omega for maintaining and verifying connection.
         Only clients that are logged on will receive heartbeat back from Omega.
         :param request_header: Header parameter object for requests.
+        :param deadline: (float) (optional) utc timestamp after which the
+            request is dropped instead of sent.
         :return: (capnp._DynamicStructBuilder) heartbeat capnp object.
         """
         return self._request_sender.send_heartbeat(
-            request_header=request_header)
+            request_header=request_header,
+            deadline=deadline)
 
-    def request_server_time(self, request_header: RequestHeader):
+    def request_server_time(self, request_header: RequestHeader,
+                            deadline: float = None):
         """
         Request Omega server time for syncing client and server timestamps.
         :param request_header: Header parameter object for requests.
+        :param deadline: (float) (optional) utc timestamp after which the
+            request is dropped instead of sent.
         :return: (capnp._DynamicStructBuilder) request_server_time capnp object.
         """
         return self._request_sender.request_server_time(
-            request_header=request_header
+            request_header=request_header,
+            deadline=deadline
         )
 
-    def place_order(self, request_header: RequestHeader, order: Order):
+    def place_order(self, request_header: RequestHeader, order: Order,
+                    deadline: float = None):
         """
         Sends a request to Omega to place an order.
         :param request_header: Header parameter object for requests.
         :param order: (Order) Python object containing all required fields.
+        :param deadline: (float) (optional) utc timestamp after which the
+            request is dropped instead of sent.
         :return: (capnp._DynamicStructBuilder) place_order capnp object.
         """
         return self._request_sender.place_order(
-            request_header=request_header, order=order)
+            request_header=request_header, order=order,
+            deadline=deadline)
 
     def place_contingent_order(self,
                                request_header: RequestHeader,
-                               contingent_order: Union[Batch, OPO, OCO]):
+                               contingent_order: Union[Batch, OPO, OCO],
+                               deadline: float = None):
         """
         Sends a request to Omega to place a contingent order.
         :param request_header: Header parameter object for requests.
         :param contingent_order: (Batch, OPO, or OCO) python object
+        :param deadline: (float) (optional) utc timestamp after which the
+            request is dropped instead of sent.
         :return: (capnp._DynamicStructBuilder) placeContingentOrder capnp
         object.
         """
         return self._request_sender.place_contingent_order(
-            request_header=request_header, contingent_order=contingent_order)
+            request_header=request_header, contingent_order=contingent_order,
+            deadline=deadline)
 
     def replace_order(self,
                       request_header: RequestHeader,
@@ -276,7 +521,8 @@ class OmegaConnection(Thread):
                       stop_price: float = 0.0,
                       time_in_force: str = TimeInForce.gtc.name,
                       # pylint: enable=E1101
-                      expire_at: float = 0.0):
+                      expire_at: float = 0.0,
+                      deadline: float = None):
         """
         Sends a request to Omega to replace an order.
         :param request_header: Header parameter object for requests.
@@ -288,6 +534,8 @@ class OmegaConnection(Thread):
         :param stop_price: (float) (optional)
         :param time_in_force: (TimeInForce) (optional)
         :param expire_at: (float) (optional)
+        :param deadline: (float) (optional) utc timestamp after which the
+            request is dropped instead of sent.
         :return: (capnp._DynamicStructBuilder) replaceOrder capnp object.
         """
         return self._request_sender.replace_order(
@@ -299,128 +547,158 @@ class OmegaConnection(Thread):
             price=price,
             stop_price=stop_price,
             time_in_force=time_in_force,
-            expire_at=expire_at
+            expire_at=expire_at,
+            deadline=deadline
         )
 
     def cancel_order(self,
                      request_header: RequestHeader,
                      account_info: AccountInfo,
-                     order_id: str):
+                     order_id: str,
+                     deadline: float = None):
         """
         Sends a request to Omega to cancel an order.
         :param request_header: Header parameter object for requests.
         :param account_info: (AccountInfo) Account on which to cancel order.
         :param order_id: (str) order_id as returned from the ExecutionReport.
+        :param deadline: (float) (optional) utc timestamp after which the
+            request is dropped instead of sent.
         :return: (capnp._DynamicStructBuilder) cancel_order object.
         """
         return self._request_sender.cancel_order(
             request_header=request_header,
             account_info=account_info,
-            order_id=order_id
+            order_id=order_id,
+            deadline=deadline
         )
 
     def cancel_all_orders(self,
                           request_header: RequestHeader,
                           account_info: AccountInfo,
                           symbol: str = None,
-                          side: str = None):
+                          side: str = None,
+                          deadline: float = None):
         """
         Sends a request to Omega to cancel an order.
         :param request_header: Header parameter object for requests.
         :param account_info: (AccountInfo) Account on which to cancel order.
         :param symbol: (str) (optional)
         :param side: (str) (optional)
+        :param deadline: (float) (optional) utc timestamp after which the
+            request is dropped instead of sent.
         :return (capnp._DynamicStructBuilder) cancel_all_orders object.
         """
         return self._request_sender.cancel_all_orders(
             request_header=request_header,
             account_info=account_info,
             symbol=symbol,
-            side=side
+            side=side,
+            deadline=deadline
         )
 
     def request_account_data(self,
                              request_header: RequestHeader,
-                             account_info: AccountInfo):
+                             account_info: AccountInfo,
+                             deadline: float = None):
         """
         Sends a request to Omega for full account snapshot including balances,
         open positions, and working orders on specified account.
         :param request_header: Header parameter object for requests.
         :param account_info: (AccountInfo) Account from which to retrieve data.
+        :param deadline: (float) (optional) utc timestamp after which the
+            request is dropped instead of sent.
         :return: (capnp._DynamicStructBuilder) request_account_data capnp
             object.
         """
         return self._request_sender.request_account_data(
-            request_header=request_header, account_info=account_info
+            request_header=request_header, account_info=account_info,
+            deadline=deadline
         )
 
     def request_open_positions(self,
                                request_header: RequestHeader,
-                               account_info: AccountInfo):
+                               account_info: AccountInfo,
+                               deadline: float = None):
         """
         Sends a request to Omega for open positions on an Account.
         :param request_header: Header parameter object for requests.
         :param account_info: (AccountInfo) Account from which to retrieve data.
+        :param deadline: (float) (optional) utc timestamp after which the
+            request is dropped instead of sent.
         :return: (capnp._DynamicStructBuilder) request_open_positions capnp
             object.
         """
         return self._request_sender.request_open_positions(
-            request_header=request_header, account_info=account_info
+            request_header=request_header, account_info=account_info,
+            deadline=deadline
         )
 
     def request_account_balances(self,
                                  request_header: RequestHeader,
-                                 account_info: AccountInfo):
+                                 account_info: AccountInfo,
+                                 deadline: float = None):
         """
         Sends a request to Omega for full account balances snapshot on an
         Account.
         :param request_header: Header parameter object for requests.
         :param account_info: (AccountInfo) Account from which to retrieve data.
+        :param deadline: (float) (optional) utc timestamp after which the
+            request is dropped instead of sent.
         :return: (capnp._DynamicStructBuilder) request_account_balances capnp
             object.
         """
         return self._request_sender.request_account_balances(
-            request_header=request_header, account_info=account_info
+            request_header=request_header, account_info=account_info,
+            deadline=deadline
         )
 
     def request_working_orders(self,
                                request_header: RequestHeader,
-                               account_info: AccountInfo):
+                               account_info: AccountInfo,
+                               deadline: float = None):
         """
         Sends a request to Omega for all working orders snapshot on an
         Account.
         :param request_header: Header parameter object for requests.
         :param account_info: (AccountInfo) Account from which to retrieve data.
+        :param deadline: (float) (optional) utc timestamp after which the
+            request is dropped instead of sent.
         :return: (capnp._DynamicStructBuilder) request_working_orders capnp
             object.
         """
         return self._request_sender.request_working_orders(
-            request_header=request_header, account_info=account_info
+            request_header=request_header, account_info=account_info,
+            deadline=deadline
         )
 
     def request_order_status(self,
                              request_header: RequestHeader,
                              account_info: AccountInfo,
-                             order_id: str):
+                             order_id: str,
+                             deadline: float = None):
         """
         Sends a request to Omega to request status of a specific order.
         :param request_header: Header parameter object for requests.
         :param account_info: (AccountInfo) Account from which to retrieve data.
         :param order_id: (str) The id of the order of interest.
+        :param deadline: (float) (optional) utc timestamp after which the
+            request is dropped instead of sent.
         :return: (capnp._DynamicStructBuilder) request_order_status capnp
             object.
         """
         return self._request_sender.request_order_status(
             request_header=request_header,
             account_info=account_info,
-            order_id=order_id
+            order_id=order_id,
+            deadline=deadline
         )
 
     def request_completed_orders(self,
                                  request_header: RequestHeader,
                                  account_info: AccountInfo,
                                  count: int = None,
-                                 since: float = None):
+                                 since: float = None,
+                                 deadline: float = None):
         """
         Sends a request to Omega for all completed orders on specified
         account.  If both 'count' and 'from_unix' are None, returns orders
@@ -431,6 +709,8 @@ class OmegaConnection(Thread):
             ones).
         :param since: (float) optional, returns all orders from provided unix
             timestamp to present.
+        :param deadline: (float) (optional) utc timestamp after which the
+            request is dropped instead of sent.
         :return: (capnp._DynamicStructBuilder) request_completed_orders capnp
             object.
         """
@@ -438,44 +718,84 @@ class OmegaConnection(Thread):
             request_header=request_header,
             account_info=account_info,
             count=count,
-            since=since
+            since=since,
+            deadline=deadline
         )
 
     def request_exchange_properties(self,
                                     request_header: RequestHeader,
-                                    exchange: str):
+                                    exchange: str,
+                                    deadline: float = None):
         """
         Sends a request to Omega for supported currencies, symbols and their
         associated properties, timeInForces, and orderTypes on an exchange.
         :param request_header: Header parameter object for requests.
         :param exchange: (str) The exchange of interest.
+        :param deadline: (float) (optional) utc timestamp after which the
+            request is dropped instead of sent.
         :return: (capnp._DynamicStructBuilder) request_exchange_properties capnp
             object.
         """
         return self._request_sender.request_exchange_properties(
-            request_header=request_header, exchange=exchange
+            request_header=request_header, exchange=exchange,
+            deadline=deadline
         )
 
     def request_authorization_refresh(self,
                                       request_header: RequestHeader,
-                                      auth_refresh: AuthorizationRefresh):
+                                      auth_refresh: AuthorizationRefresh,
+                                      deadline: float = None):
         """
         Sends a request to Omega to refresh the session
         :param request_header: Header parameter object for requests.
         :param auth_refresh: AuthorizationRefresh python object
+        :param deadline: (float) (optional) utc timestamp after which the
+            request is dropped instead of sent.
         :return: (capnp._DynamicStructBuilder) authorization_refresh capnp
             object.
         """
         return self._request_sender.request_authorization_refresh(
-            request_header=request_header, auth_refresh=auth_refresh
+            request_header=request_header, auth_refresh=auth_refresh,
+            deadline=deadline
         )
 
 
+def set_curve_keypair(socket: zmq.Socket, server_zmq_encryption_key: str):
+    """
+    Generate a client keypair using CURVE encryption mechanism, and set
+    the server key for encryption.
+    :param socket: (zmq.Socket) The socket to set CURVE key.
+    :param server_zmq_encryption_key: (str) The public key of the Omega
+        server.
+    """
+    client_public, client_secret = zmq.curve_keypair()
+    socket.curve_publickey = client_public
+    socket.curve_secretkey = client_secret
+    socket.setsockopt_string(zmq.CURVE_SERVERKEY, server_zmq_encryption_key)
+
+
 def configure_default_omega_connection(
         zmq_context: zmq.Context,
         omega_endpoint: str,
         omega_server_key: str,
-        response_handler: ResponseHandler):
+        response_handler: ResponseHandler,
+        wait_strategy: WaitStrategy = None,
+        outgoing_message_queue: Queue = None,
+        rate_limiter: RequestRateLimiter = None,
+        max_queue_size: int = 0,
+        backpressure_policy: BackpressurePolicy = BackpressurePolicy.block,
+        socket_options: SocketOptions = None,
+        expired_request_callback: Callable = None,
+        response_filter: Callable[[ResponseHeader], bool] = None,
+        zero_copy: bool = False,
+        traversal_limit_in_words: int = None,
+        nesting_limit: int = None,
+        batch_size: int = None,
+        batch_time_budget_milli: float = 1.,
+        conflate: bool = False,
+        receive_lanes: bool = False,
+        fast_lane_response_types: Iterable[str] = None,
+        deduplicator: ExecutionReportDeduplicator = None):
     """
     Set up a TesConnection that comes with request_sender and response_receiver.
     :param omega_endpoint: (str) The zmq endpoint to connect to Omega.
@@ -483,14 +803,79 @@ def configure_default_omega_connection(
     :param response_handler: (ResponseHandler) The handler object that will
         be called in a callback function when omega_connection receives a
         message.
+    :param wait_strategy: (WaitStrategy) Optional wait strategy used by all
+        three threads, e.g. BusySpinWaitStrategy on dedicated hosts.
+    :param outgoing_message_queue: (Queue) Optional outgoing queue of the
+        request sender, e.g. a PriorityRequestQueue.
+    :param rate_limiter: (RequestRateLimiter) Optional rate limiter of the
+        request sender.
+    :param max_queue_size: (int) Bound of the request sender's outgoing
+        queue if outgoing_message_queue is not passed, 0 for unbounded.
+    :param backpressure_policy: (BackpressurePolicy) Applied when the
+        bounded outgoing queue is full.
+    :param socket_options: (SocketOptions) High-water marks and buffer sizes
+        applied to the sockets of all three threads.
+    :param expired_request_callback: (Callable) Called with the TradeMessage
+        and its deadline for each request dropped because its deadline
+        passed.  Defaults to logging a warning.
+    :param response_filter: (Callable[[ResponseHeader], bool]) Optional
+        predicate on response headers; rejected responses are dropped
+        before they are decoded.
+    :param zero_copy: (bool) Pass responses as zmq.Frame buffers from the
+        Omega socket to the capnp reader without copying them, which pays
+        off for large snapshot responses.
+    :param traversal_limit_in_words: (int) capnp traversal limit of decoded
+        responses, raise for reports larger than 64 MiB.
+    :param nesting_limit: (int) capnp nesting limit of decoded responses.
+    :param batch_size: (int) Maximum number of queued responses the response
+        receiver dispatches together, e.g. to pass bursts of execution
+        reports to ResponseHandler.on_exec_reports.  1 disables batching,
+        the default unless conflate is set.
+    :param batch_time_budget_milli: (float) Time budget of receiving one
+        batch of responses.
+    :param conflate: (bool) Drop queued accountBalancesReport,
+        openPositionsReport and accountDataReport responses superseded by a
+        later one of the same account before decoding them, which bounds
+        the lag of a slow response handler.  Execution reports are never
+        dropped.
+    :param receive_lanes: (bool) Handle the responses that are not of a
+        fast lane type, e.g. large completedOrdersReports, on a background
+        thread of the response receiver, so that heartbeats and execution
+        reports are not delayed behind them.  Order is preserved within each
+        lane only, and callbacks run on both threads.
+    :param fast_lane_response_types: (Iterable[str]) Response types handled
+        on the response receiver thread, defaults to
+        response_lane.FAST_LANE_RESPONSE_TYPES.
+    :param deduplicator: (ExecutionReportDeduplicator) Optional stage of
+        the response receiver that drops repeated execution reports of the
+        same order state before they are decoded.
     :return: omega_connection, request_sender, response_receiver
     """
-    request_sender = RequestSender(zmq_context=zmq_context,
-                                   zmq_endpoint=REQUEST_SENDER_ENDPOINT)
+    request_sender = RequestSender(
+        zmq_context=zmq_context,
+        zmq_endpoint=REQUEST_SENDER_ENDPOINT,
+        outgoing_message_queue=outgoing_message_queue,
+        wait_strategy=wait_strategy,
+        rate_limiter=rate_limiter,
+        max_queue_size=max_queue_size,
+        backpressure_policy=backpressure_policy,
+        socket_options=socket_options,
+        expired_request_callback=expired_request_callback)
     response_receiver = ResponseReceiver(
         zmq_context=zmq_context,
         zmq_endpoint=RESPONSE_RECEIVER_ENDPOINT,
-        response_handler=response_handler)
+        response_handler=response_handler,
+        wait_strategy=wait_strategy,
+        socket_options=socket_options,
+        zero_copy=zero_copy,
+        traversal_limit_in_words=traversal_limit_in_words,
+        nesting_limit=nesting_limit,
+        batch_size=batch_size,
+        batch_time_budget_milli=batch_time_budget_milli,
+        conflate=conflate,
+        receive_lanes=receive_lanes,
+        fast_lane_response_types=fast_lane_response_types,
+        deduplicator=deduplicator)
     omega_connection = OmegaConnection(
         zmq_context=zmq_context,
         omega_endpoint=omega_endpoint,
@@ -498,5 +883,10 @@ def configure_default_omega_connection(
         response_receiver_endpoint=RESPONSE_RECEIVER_ENDPOINT,
         request_sender=request_sender,
         response_receiver=response_receiver,
-        server_zmq_encryption_key=omega_server_key)
+        server_zmq_encryption_key=omega_server_key,
+        wait_strategy=wait_strategy,
+        socket_options=socket_options,
+        expired_request_callback=expired_request_callback,
+        response_filter=response_filter,
+        zero_copy=zero_copy)
     return omega_connection
@@ -0,0 +1,337 @@
+"""
+Omega Reactor.  One I/O thread serving the sockets of many Omega sessions.
+"""
+import logging
+import os
+from queue import Empty, Queue
+from threading import Event, Lock, Thread
+import time
+from typing import Dict, Set
+
+# pylint: disable=W0611
+import capnp
+# pylint: enable=W0611
+import zmq
+
+from omega_client.communication.omega_connection import set_curve_keypair
+from omega_client.communication.request_sender import BaseRequestSender, \
+    log_expired_request
+from omega_client.communication.response_receiver import \
+    decode_response
+from omega_client.messaging.response_handler import ResponseHandler
+
+logger = logging.getLogger(__name__)
+
+
+class ReactorSession(BaseRequestSender):
+    """
+    One Omega session served by an OmegaReactor.  Exposes the same request
+    methods as RequestSender; requests are handed to the reactor thread
+    instead of a per-session RequestSender thread.
+
+    Attributes:
+        SESSION_ID: (str) Unique id of the session within its reactor.
+        OMEGA_ENDPOINT: (str) The zmq endpoint of Omega for this session.
+        RESPONSE_HANDLER: (ResponseHandler) Handler of this session's
+            responses.
+        SERVER_ZMQ_ENCRYPTION_KEY: (str) The public key of the Omega server.
+        OMEGA_SOCKET_IDENTITY: (bytes) Optional DEALER socket identity.
+    """
+    def __init__(self,
+                 reactor,
+                 session_id: str,
+                 omega_endpoint: str,
+                 response_handler: ResponseHandler,
+                 server_zmq_encryption_key: str = None,
+                 omega_socket_identity: bytes = None):
+        self._reactor = reactor
+        self.SESSION_ID = session_id
+        self.OMEGA_ENDPOINT = omega_endpoint
+        self.RESPONSE_HANDLER = response_handler
+        self.SERVER_ZMQ_ENCRYPTION_KEY = server_zmq_encryption_key
+        self.OMEGA_SOCKET_IDENTITY = omega_socket_identity
+
+    def _queue_message(self, omega_message_capnp: capnp._DynamicStructBuilder,
+                       deadline: float = None):
+        # pylint: disable=W0212
+        self._reactor._queue_request(self.SESSION_ID, omega_message_capnp,
+                                     deadline)
+        # pylint: enable=W0212
+
+
+class OmegaReactor(Thread):
+    """
+    Registers the Omega sockets of many sessions on a single zmq.Poller so
+    that a deployment holding N sessions runs one I/O thread (plus an
+    optional shared decode thread) instead of 3 threads per OmegaConnection.
+
+    Outgoing requests from any thread are put into one internal queue and
+    the reactor is woken up through a pipe registered on the same poller, so
+    no per-session RequestSender thread or inproc socket is needed.
+    Responses are decoded and passed to the session's ResponseHandler either
+    on the reactor thread or, with shared_decode_thread=True, on one decode
+    thread shared by all sessions.
+
+    Sessions may be added before or after start().  Sessions added while
+    running are connected on the next loop iteration.
+
+    Attributes:
+        _ZMQ_CONTEXT: (zmq.Context) Required to create sockets.
+        _POLLING_TIMEOUT_MILLI: (int) The polling timeout for the poller.
+        _sessions: (Dict[str, ReactorSession]) Sessions connected by the
+            reactor thread.
+        _session_ids: (Set[str]) Ids of the sessions added and not removed
+            yet, including those the reactor thread has not connected yet.
+        _session_ids_lock: (Lock) Guards _session_ids across the threads
+            adding and removing sessions.
+        _outgoing_message_queue: (Queue) (session_id, item, deadline)
+            tuples in call order, where item is a capnp request to send, a
+            ReactorSession to connect or None to remove the session.  One
+            queue keeps requests ordered with the removal of their session.
+        _decode_queue: (Queue) (ResponseHandler, frame) pairs waiting to be
+            decoded, only used with a shared decode thread.
+        _wakeup_lock: (Lock) Guards writes to the wakeup pipe against
+            cleanup closing it.
+        _wakeup_closed: (bool) Set once cleanup closed the wakeup pipe.
+        _is_running: (Event) An event to indicate if the reactor is running.
+    """
+    def __init__(self,
+                 zmq_context: zmq.Context,
+                 polling_timeout_milli: int = 1000,
+                 shared_decode_thread: bool = False,
+                 name: str = 'OmegaReactor'):
+        assert zmq_context
+        self._ZMQ_CONTEXT = zmq_context
+        self._POLLING_TIMEOUT_MILLI = polling_timeout_milli
+
+        self._sessions = dict()  # type: Dict[str, ReactorSession]
+        self._session_ids = set()  # type: Set[str]
+        self._session_ids_lock = Lock()
+        self._outgoing_message_queue = Queue()
+        self._wakeup_read_fd, self._wakeup_write_fd = os.pipe()
+        os.set_blocking(self._wakeup_read_fd, False)
+        os.set_blocking(self._wakeup_write_fd, False)
+        self._wakeup_lock = Lock()
+        self._wakeup_closed = False
+
+        self._decode_queue = Queue() if shared_decode_thread else None
+        self._decode_thread = (
+            Thread(target=self._decode_loop, name=name + 'Decoder')
+            if shared_decode_thread else None)
+
+        super().__init__(name=name)
+        self._is_running = Event()
+
+    def add_session(self,
+                    session_id: str,
+                    omega_endpoint: str,
+                    response_handler: ResponseHandler,
+                    server_zmq_encryption_key: str = None,
+                    omega_socket_identity: bytes = None):
+        """
+        Register a new Omega session.
+        :param session_id: (str) Unique id of the session within this
+            reactor.
+        :param omega_endpoint: (str) The zmq endpoint to connect to Omega.
+        :param response_handler: (ResponseHandler) Handler for the responses
+            received on this session.
+        :param server_zmq_encryption_key: (str) The public key of the Omega
+            server.
+        :param omega_socket_identity: (bytes) Optional DEALER socket
+            identity.
+        :return: (ReactorSession) Session object to send requests with.
+        """
+        with self._session_ids_lock:
+            assert session_id not in self._session_ids
+            self._session_ids.add(session_id)
+        session = ReactorSession(
+            reactor=self,
+            session_id=session_id,
+            omega_endpoint=omega_endpoint,
+            response_handler=response_handler,
+            server_zmq_encryption_key=server_zmq_encryption_key,
+            omega_socket_identity=omega_socket_identity)
+        self._outgoing_message_queue.put((session_id, session, None))
+        self._wakeup()
+        return session
+
+    def remove_session(self, session_id: str):
+        """
+        Close the socket of a session and stop serving it.  Requests of the
+        session queued before are sent first.
+        :param session_id: (str) The id the session was added with.
+        """
+        with self._session_ids_lock:
+            self._session_ids.discard(session_id)
+        self._outgoing_message_queue.put((session_id, None, None))
+        self._wakeup()
+
+    def _queue_request(self, session_id: str,
+                       omega_message_capnp: capnp._DynamicStructBuilder,
+                       deadline: float = None):
+        """
+        Queue a request of a session and wake up the reactor thread.
+        """
+        self._outgoing_message_queue.put(
+            (session_id, omega_message_capnp, deadline))
+        self._wakeup()
+
+    def _wakeup(self):
+        with self._wakeup_lock:
+            if self._wakeup_closed:
+                # The reactor has stopped; nothing is left to wake up.
+                return
+            try:
+                os.write(self._wakeup_write_fd, b'\0')
+            except BlockingIOError:
+                # The pipe is full, so the reactor is already due to wake up.
+                pass
+
+    ############################################################################
+    #                                                                          #
+    # ~~~~~~~~~~~~~~~~~~~~~~~~~~~~ Thread Methods ~~~~~~~~~~~~~~~~~~~~~~~~~~~~ #
+    #                                                                          #
+    ############################################################################
+
+    def cleanup(self):
+        """
+        Stop the reactor gracefully, join the thread and close the wakeup
+        pipe.
+        """
+        self.stop()
+        self.join()
+        with self._wakeup_lock:
+            if not self._wakeup_closed:
+                self._wakeup_closed = True
+                os.close(self._wakeup_read_fd)
+                os.close(self._wakeup_write_fd)
+
+    def is_running(self):
+        """
+        Return True if the thread is running, False otherwise.
+        """
+        return self._is_running.is_set()
+
+    def wait_until_running(self):
+        self._is_running.wait()
+
+    def stop(self):
+        """
+        Clear the _is_running Event, which terminates the reactor loop.
+        """
+        self._is_running.clear()
+        self._wakeup()
+
+    def _connect_session(self, session: ReactorSession, poller: zmq.Poller):
+        # pylint: disable=E1101
+        omega_socket = self._ZMQ_CONTEXT.socket(zmq.DEALER)
+        # pylint: enable=E1101
+        if session.SERVER_ZMQ_ENCRYPTION_KEY:
+            set_curve_keypair(omega_socket, session.SERVER_ZMQ_ENCRYPTION_KEY)
+        if session.OMEGA_SOCKET_IDENTITY:
+            omega_socket.setsockopt(zmq.IDENTITY,
+                                    session.OMEGA_SOCKET_IDENTITY)
+        omega_socket.connect(session.OMEGA_ENDPOINT)
+        # pylint: disable=E1101
+        poller.register(omega_socket, zmq.POLLIN)
+        # pylint: enable=E1101
+        self._sessions[session.SESSION_ID] = session
+        return omega_socket
+
+    def _remove_session(self, session_id: str, poller: zmq.Poller,
+                        omega_sockets: Dict, session_sockets: Dict):
+        omega_socket = session_sockets.pop(session_id, None)
+        if omega_socket is None:
+            return
+        self._sessions.pop(session_id, None)
+        poller.unregister(omega_socket)
+        del omega_sockets[omega_socket]
+        omega_socket.close()
+
+    def _process_queue(self, poller: zmq.Poller, omega_sockets: Dict,
+                       session_sockets: Dict):
+        """
+        Connect and remove sessions and send requests in the order they
+        were queued.
+        """
+        while True:
+            try:
+                session_id, item, deadline = (
+                    self._outgoing_message_queue.get_nowait())
+            except Empty:
+                return
+            if isinstance(item, ReactorSession):
+                omega_socket = self._connect_session(item, poller)
+                omega_sockets[omega_socket] = item.RESPONSE_HANDLER
+                session_sockets[session_id] = omega_socket
+                continue
+            if item is None:
+                self._remove_session(session_id, poller, omega_sockets,
+                                     session_sockets)
+                continue
+            if deadline is not None and time.time() > deadline:
+                log_expired_request(item, deadline)
+                continue
+            omega_socket = session_sockets.get(session_id)
+            if omega_socket is None:
+                logger.error('Dropping request for unknown session.',
+                             extra={'session_id': session_id})
+                continue
+            omega_socket.send(item.to_bytes())
+
+    def run(self):
+        """
+        Main loop of the reactor.  Polls the wakeup pipe and the Omega
+        socket of every session; sends queued requests when woken up and
+        hands received frames to the session's ResponseHandler.
+        """
+        poller = zmq.Poller()
+        # pylint: disable=E1101
+        poller.register(self._wakeup_read_fd, zmq.POLLIN)
+        # pylint: enable=E1101
+        omega_sockets = dict()  # Dict[zmq.Socket, ResponseHandler]
+        session_sockets = dict()  # Dict[str, zmq.Socket]
+        if self._decode_thread:
+            self._decode_thread.start()
+        self._is_running.set()
+        while self.is_running():
+            events = poller.poll(self._POLLING_TIMEOUT_MILLI)
+            for socket, _ in events:
+                if socket == self._wakeup_read_fd:
+                    try:
+                        os.read(self._wakeup_read_fd, 4096)
+                    except BlockingIOError:
+                        pass
+                    continue
+                self._handle_frame(omega_sockets[socket], socket.recv())
+            self._process_queue(poller, omega_sockets, session_sockets)
+        time.sleep(2.)
+        for omega_socket in omega_sockets:
+            omega_socket.close()
+        if self._decode_thread:
+            self._decode_queue.put(None)
+            self._decode_thread.join()
+
+    def _handle_frame(self, response_handler: ResponseHandler, frame: bytes):
+        if self._decode_queue is not None:
+            self._decode_queue.put((response_handler, frame))
+            return
+        self._decode_and_handle(response_handler, frame)
+
+    def _decode_loop(self):
+        """
+        Loop of the shared decode thread.  Exits on a None sentinel.
+        """
+        while True:
+            item = self._decode_queue.get()
+            if item is None:
+                return
+            self._decode_and_handle(*item)
+
+    @staticmethod
+    def _decode_and_handle(response_handler: ResponseHandler, frame: bytes):
+        try:
+            response_handler.dispatch_response(decode_response(frame))
+        except TypeError as e:
+            logger.error('Exception in decoding message' + repr(e),
+                         extra={'exception': repr(e)})
@@ -0,0 +1,525 @@
+"""
+Multi-lane outgoing request queue for RequestSender.  Cancels are sent ahead
+of replaces, replaces ahead of new orders, and new orders ahead of queries
+and heartbeats, except where a request must not overtake an earlier one.
+Optionally coalesces unsent replaces and cancels for the same order and
+bounds the number of queued requests.
+"""
+from collections import deque
+from enum import Enum, IntEnum
+from itertools import count
+import logging
+from queue import Empty, Full
+from threading import Condition, Lock
+import time
+from typing import Callable, Sequence
+
+logger = logging.getLogger(__name__)
+
+
+class RequestLane(IntEnum):
+    """Outgoing request lanes, highest priority first."""
+    cancel = 0
+    replace = 1
+    place = 2
+    other = 3
+
+
+# Logon and authorization refreshes share the cancel lane: every other lane
+# depends on a valid session.  Logoff stays in the other lane, behind every
+# request queued before it, which would be rejected after the session ends.
+# See request_fence_keys for the requests that do not overtake earlier ones.
+REQUEST_LANES = {
+    'cancelOrder': RequestLane.cancel,
+    'cancelAllOrders': RequestLane.cancel,
+    'logon': RequestLane.cancel,
+    'authorizationRefresh': RequestLane.cancel,
+    'replaceOrder': RequestLane.replace,
+    'placeSingleOrder': RequestLane.place,
+    'placeContingentOrder': RequestLane.place
+}
+
+
+def request_type(omega_message):
+    """
+    :param omega_message: (capnp._DynamicStructBuilder) TradeMessage request.
+    :return: (str) Name of the populated "TradeMessage.Request.body" union
+        member, e.g. 'placeSingleOrder'.
+    """
+    return omega_message.type.request.body.which()
+
+
+def request_lane(omega_message):
+    """
+    :param omega_message: (capnp._DynamicStructBuilder) TradeMessage request.
+    :return: (RequestLane) The lane the request is queued in.
+    """
+    return REQUEST_LANES.get(request_type(omega_message), RequestLane.other)
+
+
+def _placed_account_ids(place_order):
+    return {place_order.accountInfo.accountID}
+
+
+def _contingent_account_ids(place_contingent_order):
+    contingent_type = place_contingent_order.type
+    which = contingent_type.which()
+    if which == 'opo':
+        opo = contingent_type.opo
+        orders = [opo.primary]
+        orders.extend(getattr(opo.secondary, opo.secondary.which()))
+    else:
+        orders = getattr(contingent_type, which).orders
+    return {order.accountInfo.accountID for order in orders}
+
+
+_NO_KEYS = frozenset()
+_LOGOFF_KEYS = frozenset({('logoff',)})
+
+
+def request_fence_keys(omega_message):
+    """
+    Keys ordering a request with the earlier requests it must not overtake.
+    A cancelAllOrders follows the unsent orders placed on its account, which
+    would otherwise stay live, and a logon follows an unsent logoff, which
+    would otherwise end the new session.
+    :param omega_message: (capnp._DynamicStructBuilder) TradeMessage request.
+    :return: (Tuple[FrozenSet, FrozenSet]) The keys the request holds while
+        queued, and the keys of the earlier requests it follows.
+    """
+    body = omega_message.type.request.body
+    which = body.which()
+    if which == 'placeSingleOrder':
+        return frozenset(
+            ('place', account_id) for account_id in
+            _placed_account_ids(body.placeSingleOrder)), _NO_KEYS
+    if which == 'placeContingentOrder':
+        return frozenset(
+            ('place', account_id) for account_id in
+            _contingent_account_ids(body.placeContingentOrder)), _NO_KEYS
+    if which == 'cancelAllOrders':
+        return _NO_KEYS, frozenset(
+            {('place', body.cancelAllOrders.accountInfo.accountID)})
+    if which == 'logoff':
+        return _LOGOFF_KEYS, _NO_KEYS
+    if which == 'logon':
+        return _NO_KEYS, _LOGOFF_KEYS
+    return _NO_KEYS, _NO_KEYS
+
+
+COALESCED_REQUEST_TYPES = frozenset(('cancelOrder', 'replaceOrder'))
+
+
+def coalesce_key(omega_message):
+    """
+    :param omega_message: (capnp._DynamicStructBuilder) TradeMessage request.
+    :return: (Tuple[str, str, str]) (request_type, account_id, order_id) for
+        cancelOrder and replaceOrder requests, None for every other request.
+    """
+    body = omega_message.type.request.body
+    which = body.which()
+    if which not in COALESCED_REQUEST_TYPES:
+        return None
+    request = getattr(body, which)
+    return which, request.accountInfo.accountID, request.orderID
+
+
+class BackpressurePolicy(Enum):
+    """
+    What put does when a bounded PriorityRequestQueue is full.
+
+    block: wait for room up to the put timeout, then raise queue.Full.
+    reject: raise queue.Full immediately.
+    drop_oldest: drop the oldest queued request outside the cancel lane, or
+        the new request itself if it is the oldest such request.
+    """
+    block = 'block'
+    reject = 'reject'
+    drop_oldest = 'drop_oldest'
+
+
+class _Slot:
+    """
+    Queue entry.  Compared by identity so that a superseded entry can be
+    removed from its lane.
+    """
+    __slots__ = ('item', 'lane', 'seq', 'order', 'is_cancel', 'bounded',
+                 'fence_keys')
+
+    def __init__(self, item, lane: RequestLane, seq: int):
+        self.item = item
+        self.lane = lane
+        self.seq = seq
+        self.order = None
+        self.is_cancel = False
+        # Whether the slot counts towards maxsize, from its own lane even if
+        # it is queued behind requests of a lower lane.
+        self.bounded = lane != RequestLane.cancel
+        self.fence_keys = _NO_KEYS
+
+
+class PriorityRequestQueue:
+    """
+    Thread-safe drop-in replacement for the queue.Queue used by
+    RequestSender, with one FIFO lane per RequestLane.
+
+    With weights=None lanes are served in strict priority order, so a cancel
+    queued behind a burst of place_order or request_completed_orders calls
+    is sent next.  With weights, lanes are served weighted round-robin in
+    priority order: each lane may send up to its weight before lower lanes
+    get a turn, which bounds the starvation of queries under sustained order
+    flow.  Ordering within a lane is always FIFO.
+
+    A request is never sent before the earlier requests it follows, see
+    request_fence_keys: it is queued in the lane of the lowest priority
+    holding one of them, behind them, if that is below its own lane.  A
+    cancelAllOrders queued behind unsent orders of its account still counts
+    as a cancel towards maxsize.
+
+    With coalesce=True, requests that are already obsolete are never sent:
+    a replace for an order that has an unsent replace overwrites it in place,
+    keeping the older one's queue position; a cancel removes every unsent
+    replace for the order; a replace or cancel for an order with an unsent
+    cancel is dropped.
+
+    With a rate_limiter, a lane whose head request is rate limited is
+    skipped until its tokens are available, so a throttled place_order never
+    holds back the cancels and queries behind it.
+
+    With maxsize > 0, put applies the backpressure policy once maxsize
+    requests are queued outside the cancel lane.  Requests in the cancel
+    lane are always accepted, so a full queue never stops a cancel or a
+    logon.
+
+    Attributes:
+        _classify: (Callable) Maps a queued message to its RequestLane.
+        _coalesce_key: (Callable) Maps a queued message to
+            (request_type, account_id, order_id), or None if it is never
+            coalesced.  None disables coalescing.
+        _fence_keys: (Callable) Maps a queued message to the keys it holds
+            and the keys it follows, see request_fence_keys.  None disables
+            fences.
+        _rate_limiter: (RequestRateLimiter) Optional limiter consulted before
+            a request is dequeued.
+        _MAXSIZE: (int) Maximum number of queued requests outside the cancel
+            lane, 0 for unbounded.
+        _BACKPRESSURE: (BackpressurePolicy) Policy applied when full.
+        _PUT_TIMEOUT: (float) Default seconds put blocks for with
+            BackpressurePolicy.block, None to block indefinitely.
+        _WEIGHTS: (List[int]) Optional per-lane weights, highest priority
+            lane first.
+        _lanes: (List[deque]) One FIFO per lane.
+        _size: (int) Number of queued requests.
+        _bounded_size: (int) Number of queued requests outside the cancel
+            lane, the ones bounded by _MAXSIZE.
+        _credits: (List[int]) Remaining sends per lane in the current
+            weighted round.
+        _pending_replaces: (Dict[Tuple[str, str], _Slot]) Unsent replace per
+            (account_id, order_id).
+        _pending_cancels: (Dict[Tuple[str, str], _Slot]) Unsent cancel per
+            (account_id, order_id).
+        _fence_lanes: (Dict[Tuple, List[int]]) Number of queued requests
+            holding each fence key, per lane.
+        _coalesced_count: (int) Number of requests dropped or overwritten by
+            coalescing.
+        _dropped_count: (int) Number of requests dropped by
+            BackpressurePolicy.drop_oldest.
+    """
+    def __init__(self,
+                 weights: Sequence[int] = None,
+                 classify: Callable = request_lane,
+                 coalesce: bool = False,
+                 coalesce_key: Callable = coalesce_key,
+                 fence_keys: Callable = request_fence_keys,
+                 rate_limiter=None,
+                 maxsize: int = 0,
+                 backpressure: BackpressurePolicy = BackpressurePolicy.block,
+                 put_timeout: float = None):
+        if weights is not None:
+            assert len(weights) == len(RequestLane)
+            assert all(weight > 0 for weight in weights)
+        self._classify = classify
+        self._coalesce_key = coalesce_key if coalesce else None
+        self._fence_keys = fence_keys
+        self._rate_limiter = rate_limiter
+        self._MAXSIZE = maxsize
+        self._BACKPRESSURE = backpressure
+        self._PUT_TIMEOUT = put_timeout
+        self._WEIGHTS = list(weights) if weights is not None else None
+        self._credits = list(weights) if weights is not None else None
+        self._lanes = [deque() for _ in RequestLane]
+        self._size = 0
+        self._bounded_size = 0
+        self._seq = count()
+        self._lock = Lock()
+        self._not_empty = Condition(self._lock)
+        self._not_full = Condition(self._lock)
+        self._pending_replaces = dict()
+        self._pending_cancels = dict()
+        self._fence_lanes = dict()
+        self._coalesced_count = 0
+        self._dropped_count = 0
+
+    def qsize(self):
+        """
+        :return: (int) Total number of queued messages.
+        """
+        return self._size
+
+    def empty(self):
+        return self._size == 0
+
+    def lane_depths(self):
+        """
+        :return: (Dict[str, int]) Number of queued messages per lane name.
+        """
+        with self._lock:
+            return {lane.name: len(self._lanes[lane]) for lane in RequestLane}
+
+    def set_rate_limiter(self, rate_limiter):
+        """
+        Set _rate_limiter.
+        :param rate_limiter: (RequestRateLimiter)
+        """
+        with self._lock:
+            self._rate_limiter = rate_limiter
+            self._not_empty.notify_all()
+
+    def coalesced_count(self):
+        """
+        :return: (int) Number of requests dropped or overwritten by
+            coalescing so far.
+        """
+        return self._coalesced_count
+
+    def dropped_count(self):
+        """
+        :return: (int) Number of requests dropped by
+            BackpressurePolicy.drop_oldest so far.
+        """
+        return self._dropped_count
+
+    def put(self, item, block: bool = True, timeout: float = None):
+        """
+        Queue a message in its lane.
+        :param item: (capnp._DynamicStructBuilder) TradeMessage request.
+        :param block: (bool) With BackpressurePolicy.block, wait for room if
+            the queue is full.
+        :param timeout: (float) Maximum seconds to wait for room, defaults
+            to _PUT_TIMEOUT.
+        :raises: queue.Full if the request is rejected by the backpressure
+            policy.
+        """
+        lane = self._classify(item)
+        key = self._coalesce_key(item) if self._coalesce_key else None
+        fence_keys, follows = (self._fence_keys(item) if self._fence_keys
+                               else (_NO_KEYS, _NO_KEYS))
+        with self._lock:
+            slot = _Slot(item, lane, next(self._seq))
+            # _make_room may wait with _lock released, so the request is
+            # coalesced afterwards, against the state it is inserted into.
+            if (self._MAXSIZE and slot.bounded and
+                    self._bounded_size >= self._MAXSIZE and
+                    not (key is not None and self._is_absorbed(key)) and
+                    not self._make_room(block, timeout)):
+                self._dropped_count += 1
+                logger.warning('Outgoing request queue full, dropping '
+                               'request.', extra={'lane': lane.name})
+                return
+            if key is not None and not self._coalesce(key, slot):
+                return
+            if follows:
+                slot.lane = self._fenced_lane(lane, follows)
+            self._lanes[slot.lane].append(slot)
+            self._size += 1
+            if slot.bounded:
+                self._bounded_size += 1
+            if slot.order is not None:
+                pending = (self._pending_cancels if slot.is_cancel
+                           else self._pending_replaces)
+                pending[slot.order] = slot
+            if fence_keys:
+                slot.fence_keys = fence_keys
+                for fence_key in fence_keys:
+                    self._fence_lanes.setdefault(
+                        fence_key, [0] * len(RequestLane))[slot.lane] += 1
+            self._not_empty.notify()
+
+    def _fenced_lane(self, lane: RequestLane, follows):
+        """
+        Must be called holding _lock.
+        :return: (RequestLane) The lane of the lowest priority holding a
+            queued request with one of the keys in follows, if below lane.
+        """
+        for fence_key in follows:
+            counts = self._fence_lanes.get(fence_key)
+            if counts is None:
+                continue
+            for index in range(len(counts) - 1, lane, -1):
+                if counts[index]:
+                    lane = RequestLane(index)
+                    break
+        return lane
+
+    def _make_room(self, block: bool, timeout: float):
+        """
+        Apply the backpressure policy to a full queue.  Must be called
+        holding _lock.
+        :return: (bool) True if the new request may be queued, False if it
+            has to be dropped.
+        :raises: queue.Full if the new request is rejected.
+        """
+        if self._BACKPRESSURE == BackpressurePolicy.drop_oldest:
+            # A cancel queued behind requests of a lower lane is never
+            # dropped.
+            heads = [next((slot for slot in lane if slot.bounded), None)
+                     for lane in self._lanes[RequestLane.cancel + 1:]]
+            heads = [head for head in heads if head is not None]
+            if not heads:
+                return False
+            oldest = min(heads, key=lambda slot: slot.seq)
+            self._lanes[oldest.lane].remove(oldest)
+            self._dequeued(oldest)
+            self._dropped_count += 1
+            logger.warning('Outgoing request queue full, dropping oldest '
+                           'request.', extra={'lane': oldest.lane.name})
+            return True
+        if self._BACKPRESSURE == BackpressurePolicy.reject or not block:
+            raise Full
+        if timeout is None:
+            timeout = self._PUT_TIMEOUT
+        end_time = time.monotonic() + timeout if timeout is not None else None
+        while self._bounded_size >= self._MAXSIZE:
+            remaining = None
+            if end_time is not None:
+                remaining = end_time - time.monotonic()
+                if remaining <= 0.:
+                    raise Full
+            self._not_full.wait(remaining)
+        return True
+
+    def _is_absorbed(self, key):
+        """
+        Must be called holding _lock.
+        :return: (bool) True if _coalesce would currently drop or merge the
+            request instead of queueing it, so it needs no room.
+        """
+        request_type, account_id, order_id = key
+        order = (account_id, order_id)
+        return (order in self._pending_cancels or
+                (request_type == 'replaceOrder' and
+                 order in self._pending_replaces))
+
+    def _coalesce(self, key, slot: _Slot):
+        """
+        Coalesce a replace or cancel with the unsent requests for the same
+        order.  Must be called holding _lock.
+        :return: (bool) True if slot still needs to be queued.
+        """
+        request_type, account_id, order_id = key
+        order = (account_id, order_id)
+        if order in self._pending_cancels:
+            # The order is already being cancelled.
+            self._coalesced_count += 1
+            logger.debug('Dropping request for order with a pending cancel.',
+                         extra={'request_type': request_type,
+                                'account_id': account_id,
+                                'order_id': order_id})
+            return False
+        pending_replace = self._pending_replaces.get(order)
+        if request_type == 'replaceOrder':
+            if pending_replace is not None:
+                pending_replace.item = slot.item
+                self._coalesced_count += 1
+                return False
+            slot.order = order
+            return True
+        if pending_replace is not None:
+            self._lanes[pending_replace.lane].remove(pending_replace)
+            self._dequeued(pending_replace)
+            self._coalesced_count += 1
+        slot.order = order
+        slot.is_cancel = True
+        return True
+
+    def put_nowait(self, item):
+        self.put(item, block=False)
+
+    def get(self, block: bool = True, timeout: float = None):
+        """
+        Remove and return the next message to send.
+        :param block: (bool) Wait for a message if the queue is empty.
+        :param timeout: (float) Maximum seconds to wait if block is True.
+        :return: (capnp._DynamicStructBuilder) TradeMessage request.
+        :raises: queue.Empty if no message is available in time.
+        """
+        end_time = (time.monotonic() + timeout
+                    if block and timeout is not None else None)
+        with self._lock:
+            while True:
+                retry_after = None
+                if self._size:
+                    slot, retry_after = self._pop_slot()
+                    if slot is not None:
+                        return self._dequeued(slot)
+                if not block:
+                    raise Empty
+                wait_timeout = retry_after
+                if end_time is not None:
+                    remaining = end_time - time.monotonic()
+                    if remaining <= 0.:
+                        raise Empty
+                    wait_timeout = (remaining if wait_timeout is None
+                                    else min(wait_timeout, remaining))
+                self._not_empty.wait(wait_timeout)
+
+    def get_nowait(self):
+        return self.get(block=False)
+
+    def _dequeued(self, slot: _Slot):
+        """
+        Account for a slot removed from its lane.  Must be called holding
+        _lock.
+        """
+        self._size -= 1
+        if slot.bounded:
+            self._bounded_size -= 1
+            self._not_full.notify()
+        for fence_key in slot.fence_keys:
+            counts = self._fence_lanes[fence_key]
+            counts[slot.lane] -= 1
+            if not any(counts):
+                del self._fence_lanes[fence_key]
+        if slot.order is not None:
+            if self._pending_replaces.get(slot.order) is slot:
+                del self._pending_replaces[slot.order]
+            elif self._pending_cancels.get(slot.order) is slot:
+                del self._pending_cancels[slot.order]
+        return slot.item
+
+    def _pop_slot(self):
+        """
+        Pop the next sendable slot.  Must be called holding _lock.
+        :return: (_Slot, float) The slot, or None and the number of seconds
+            until the earliest rate limited lane head may be sent.
+        """
+        retry_after = None
+        weighted = self._WEIGHTS is not None
+        # With weights, a second pass starts a new round if every lane with
+        # a sendable head spent its credits.
+        for use_credits in ((True, False) if weighted else (False,)):
+            for index, lane in enumerate(self._lanes):
+                if not lane or (use_credits and self._credits[index] <= 0):
+                    continue
+                if self._rate_limiter is not None:
+                    delay = self._rate_limiter.acquire(lane[0].item)
+                    if delay > 0.:
+                        retry_after = (delay if retry_after is None
+                                       else min(retry_after, delay))
+                        continue
+                if weighted:
+                    if not use_credits:
+                        self._credits = list(self._WEIGHTS)
+                    self._credits[index] -= 1
+                return lane.popleft(), None
+        return None, retry_after
@@ -0,0 +1,220 @@
+"""
+Client-side request rate limiting.  Token buckets keyed by account_id and
+exchange smooth request bursts before they reach Omega, so that exchange rate
+limits are not exceeded.
+"""
+from threading import Lock
+import time
+from typing import Callable, Dict, Iterable
+
+from omega_client.messaging.common_types import AccountInfo, Exchange, \
+    ExchangePropertiesReport
+
+# Conservative (requests per second, burst) defaults per exchange.  Exchanges
+# publish their limits per API key and change them without notice, so
+# override these with set_exchange_limit where the account's limits are known.
+DEFAULT_EXCHANGE_RATE_LIMITS = {
+    Exchange.poloniex.name: (6., 6.),
+    Exchange.kraken.name: (1., 15.),
+    Exchange.gemini.name: (5., 10.),
+    Exchange.bitfinex.name: (1.5, 10.),
+    Exchange.bittrex.name: (1., 5.),
+    Exchange.binance.name: (10., 10.),
+    Exchange.coinbasePro.name: (5., 10.),
+    Exchange.coinbasePrime.name: (5., 10.),
+    Exchange.bitstamp.name: (10., 10.),
+    Exchange.itBit.name: (5., 10.),
+    Exchange.okEx.name: (10., 20.),
+    Exchange.hitBTC.name: (10., 20.)
+}
+
+# Requests that are never delayed.  They still consume tokens and may drive a
+# bucket into debt, which delays the next throttled requests instead.
+UNTHROTTLED_REQUEST_TYPES = frozenset(('cancelOrder', 'cancelAllOrders'))
+
+# Request types with a top-level accountInfo.
+ACCOUNT_REQUEST_TYPES = frozenset((
+    'placeSingleOrder', 'replaceOrder', 'cancelOrder', 'cancelAllOrders',
+    'getAccountData', 'getOpenPositions', 'getAccountBalances',
+    'getWorkingOrders', 'getOrderStatus', 'getCompletedOrders'))
+
+
+class TokenBucket:
+    """
+    Token bucket refilled at rate tokens per second up to burst tokens.  Not
+    thread-safe; RequestRateLimiter serializes access.
+
+    Attributes:
+        RATE: (float) Tokens added per second.
+        BURST: (float) Bucket capacity.
+        _tokens: (float) Available tokens, negative when in debt.
+        _last_refill: (float) Clock time of the last refill.
+    """
+    def __init__(self, rate: float, burst: float = None, now: float = None):
+        assert rate > 0.
+        self.RATE = float(rate)
+        self.BURST = float(burst if burst is not None else rate)
+        assert self.BURST >= 1.
+        self._tokens = self.BURST
+        self._last_refill = now if now is not None else time.monotonic()
+
+    def _refill(self, now: float):
+        elapsed = now - self._last_refill
+        if elapsed > 0.:
+            self._tokens = min(self.BURST, self._tokens + elapsed * self.RATE)
+            self._last_refill = now
+
+    def delay(self, now: float, tokens: float = 1.):
+        """
+        :param now: (float) Current clock time.
+        :param tokens: (float) Tokens needed.
+        :return: (float) Seconds until tokens are available, 0 if they are
+            available now.
+        """
+        self._refill(now)
+        # A request costing more than the burst waits for a full bucket.
+        missing = min(tokens, self.BURST) - self._tokens
+        return missing / self.RATE if missing > 0. else 0.
+
+    def consume(self, now: float, tokens: float = 1.):
+        """
+        Remove tokens, going into debt if not enough are available.
+        """
+        self._refill(now)
+        self._tokens -= tokens
+
+
+def request_account_id_and_cost(omega_message):
+    """
+    :param omega_message: (capnp._DynamicStructBuilder) TradeMessage request.
+    :return: (Tuple[int, int]) The account_id the request is sent on, or None
+        for requests without an account, and the number of exchange requests
+        it results in.
+    """
+    body = omega_message.type.request.body
+    which = body.which()
+    if which in ACCOUNT_REQUEST_TYPES:
+        return getattr(body, which).accountInfo.accountID, 1
+    if which == 'placeContingentOrder':
+        contingent_type = body.placeContingentOrder.type
+        which = contingent_type.which()
+        if which == 'opo':
+            opo = contingent_type.opo
+            secondary = getattr(opo.secondary, opo.secondary.which())
+            return (opo.primary.accountInfo.accountID,
+                    1 + len(secondary))
+        orders = getattr(contingent_type, which)
+        if not len(orders):
+            return None, 0
+        return orders[0].accountInfo.accountID, len(orders)
+    return None, 0
+
+
+class RequestRateLimiter:
+    """
+    Token buckets per account_id and per exchange.  A request on an account
+    is sent only when both the account bucket and the bucket of the
+    account's exchange have enough tokens.  Requests without an account,
+    e.g. logon and heartbeat, are never limited.
+
+    Cancels are never delayed: they consume their tokens immediately, even
+    into debt, so that order flow backs off instead of the cancels.
+
+    Thread-safe.  Install on RequestSender with the rate_limiter parameter.
+
+    Attributes:
+        _CLOCK: (Callable[[], float]) Monotonic clock in seconds.
+        _account_buckets: (Dict[int, TokenBucket]) Buckets per account_id.
+        _exchange_buckets: (Dict[str, TokenBucket]) Buckets per exchange.
+        _account_exchanges: (Dict[int, str]) Exchange of each account_id.
+    """
+    def __init__(self,
+                 account_exchanges: Dict[int, str] = None,
+                 clock: Callable[[], float] = time.monotonic):
+        self._CLOCK = clock
+        self._account_buckets = dict()  # type: Dict[int, TokenBucket]
+        self._exchange_buckets = dict()  # type: Dict[str, TokenBucket]
+        self._account_exchanges = dict(account_exchanges or {})
+        self._lock = Lock()
+
+    def set_account_limit(self, account_id: int, rate: float,
+                          burst: float = None):
+        """
+        :param account_id: (int) The account to limit.
+        :param rate: (float) Sustained requests per second.
+        :param burst: (float) Maximum burst, defaults to rate.
+        """
+        with self._lock:
+            self._account_buckets[int(account_id)] = TokenBucket(
+                rate, burst, now=self._CLOCK())
+
+    def set_exchange_limit(self, exchange: str, rate: float,
+                           burst: float = None):
+        """
+        :param exchange: (str) Exchange name, e.g. Exchange.kraken.name.
+        :param rate: (float) Sustained requests per second.
+        :param burst: (float) Maximum burst, defaults to rate.
+        """
+        with self._lock:
+            self._exchange_buckets[exchange] = TokenBucket(
+                rate, burst, now=self._CLOCK())
+
+    def set_account_exchange(self, account_id: int, exchange: str):
+        """
+        Map an account to the exchange whose limit it shares.
+        """
+        with self._lock:
+            self._account_exchanges[int(account_id)] = exchange
+
+    def set_accounts(self, accounts: Iterable[AccountInfo]):
+        """
+        Map accounts to their exchanges, e.g. from LogonAck.client_accounts.
+        """
+        for account_info in accounts:
+            if account_info.exchange:
+                self.set_account_exchange(account_info.account_id,
+                                          account_info.exchange)
+
+    def configure_from_exchange_properties(
+            self, exchange_properties_report: ExchangePropertiesReport):
+        """
+        Set the exchange limit of the reported exchange to its default from
+        DEFAULT_EXCHANGE_RATE_LIMITS, unless a limit is already set.
+        ExchangePropertiesReport does not carry rate limits, so only the
+        exchange name is taken from it.
+        :param exchange_properties_report: (ExchangePropertiesReport)
+        """
+        exchange = exchange_properties_report.exchange
+        default = DEFAULT_EXCHANGE_RATE_LIMITS.get(exchange)
+        if default is None or exchange in self._exchange_buckets:
+            return
+        self.set_exchange_limit(exchange, *default)
+
+    def acquire(self, omega_message):
+        """
+        Take the tokens a request needs if they are available.
+        :param omega_message: (capnp._DynamicStructBuilder) TradeMessage
+            request.
+        :return: (float) 0 if the request may be sent now, else the number
+            of seconds to wait before trying again.
+        """
+        account_id, cost = request_account_id_and_cost(omega_message)
+        if account_id is None or not cost:
+            return 0.
+        request_type = omega_message.type.request.body.which()
+        with self._lock:
+            buckets = [bucket for bucket in (
+                self._account_buckets.get(account_id),
+                self._exchange_buckets.get(
+                    self._account_exchanges.get(account_id)))
+                       if bucket is not None]
+            if not buckets:
+                return 0.
+            now = self._CLOCK()
+            if request_type not in UNTHROTTLED_REQUEST_TYPES:
+                delay = max(bucket.delay(now, cost) for bucket in buckets)
+                if delay > 0.:
+                    return delay
+            for bucket in buckets:
+                bucket.consume(now, cost)
+            return 0.
@@ -1,12 +1,20 @@
+from abc import abstractmethod
 import logging
 from queue import Empty, Queue
+import struct
 from threading import Event, Thread
 import time
-from typing import Dict, List, Union
+from typing import Callable, Dict, List, Set, Union
 
 import capnp
 import zmq
 
+from omega_client.communication.priority_request_queue import \
+    BackpressurePolicy, PriorityRequestQueue
+from omega_client.communication.rate_limiter import RequestRateLimiter
+from omega_client.communication.socket_options import SocketOptions
+from omega_client.communication.wait_strategy import \
+    set_thread_cpu_affinity, WaitStrategy
 from omega_client.fpg.fpg_lib import create_SOR_order, FPGAuth
 from omega_client.messaging.common_types import AccountBalancesReport, \
     AccountCredentials, AccountInfo, AuthorizationRefresh, \
@@ -27,98 +35,57 @@ logger = logging.getLogger(__name__)
 # TODO: Remove return types after adding easy conversion and access to
 # message body for debugging and testing
 
+# Deadlines travel from RequestSender to OmegaConnection as a second frame.
+DEADLINE_FRAME = struct.Struct('<d')
 
-class RequestSender(Thread):
+
+def log_expired_request(omega_message, deadline: float):
     """
-    Runs as an individual thread to send requests to TesConnection,
-    which then gets routed to Omega.  The motivation of the design is different
-    threads should not share zmq sockets, and that the TesConnection event
-    loop should not be blocked.
+    Default callback for requests dropped because their deadline passed.
+    :param omega_message: (capnp._DynamicStructBuilder or
+        capnp._DynamicStructReader) The expired TradeMessage.
+    :param deadline: (float) utc timestamp the request expired at.
+    """
+    request = omega_message.type.request
+    logger.warning('Dropping expired request.',
+                   extra={'request_type': request.body.which(),
+                          'request_id': request.requestID,
+                          'deadline': deadline})
 
-    When a request is "sent" from this class, it is placed into an internal
-    thread-safe queue.  The request sender loop checks if the queue has a
-    message, and if there is one, sends it to TesConnection through an inproc
-    connection.
 
-    Attributes:
-        _ZMQ_CONTEXT: (zmq.Context) Required to create sockets. It is
-            recommended that one application use one shared zmq context for
-            all sockets.
-        _ZMQ_ENDPOINT: (str) The zmq endpoint to connect to.
-        _QUEUE_POLLING_TIMEOUT_SECONDS: (int) The polling timeout for the
-            internal queue.
-        _outgoing_message_queue: (Queue) Internal message queue for outgoing
-            Omega Messages.
-        _is_running: (Event) Event object that indicates on/ off
-            behavior for the response handler loop.
+class ExpiringRequest:
     """
-    def __init__(self,
-                 zmq_context: zmq.Context,
-                 zmq_endpoint: str,
-                 outgoing_message_queue: Queue = None,
-                 queue_polling_timeout_seconds: int = 1,
-                 name: str='OmegaRequestSender'):
-        assert zmq_context
-        assert zmq_endpoint
+    A queued request with a deadline.  Exposes the type of the wrapped
+    TradeMessage, so queues and rate limiters classify it like the message
+    itself.
+    """
+    __slots__ = ('message', 'deadline')
 
-        self._ZMQ_CONTEXT = zmq_context
-        self._ZMQ_ENDPOINT = zmq_endpoint
-        self._QUEUE_POLLING_TIMEOUT_SECONDS = queue_polling_timeout_seconds
+    def __init__(self, message: capnp._DynamicStructBuilder, deadline: float):
+        self.message = message
+        self.deadline = deadline
 
-        self._outgoing_message_queue = outgoing_message_queue or Queue()
+    @property
+    def type(self):
+        return self.message.type
 
-        self._is_running = Event()
-        super().__init__(name=name)
-
-    def _queue_message(self, omega_message_capnp: capnp._DynamicStructBuilder):
-        """
-        Put a capnp message into the internal queue for sending to
-        TesConnection.
-        :param omega_message_capnp:
-        """
-        self._outgoing_message_queue.put(omega_message_capnp)
 
-    def cleanup(self):
-        """
-        Stop the response receiver gracefully and join the thread.
-        """
-        self.stop()
-        self.join()
-
-    def stop(self):
-        """
-        Clear the _is_running Event, which terminates the request sender loop.
-        """
-        self._is_running.clear()
-
-    def is_running(self):
-        """
-        Return True if the thread is running, False otherwise.
-        """
-        return self._is_running.is_set()
-
-    def run(self):
+class BaseRequestSender:
+    """
+    Builds Omega requests from Python objects and hands each serializable
+    capnp message to _queue_message.  Subclasses decide how queued messages
+    reach Omega, e.g. RequestSender forwards them from its own thread.
+    """
+    @abstractmethod
+    def _queue_message(self, omega_message_capnp: capnp._DynamicStructBuilder,
+                       deadline: float = None):
         """
-        Message sending loop.
-        Create the request_socket as a zmq.DEALER socket and then connect to
-        the provided _ZMQ_ENDPOINT.
-
-        Try to get a message for _QUEUE_POLLING_TIMEOUT_SECONDS and then send
-        it out to TesConnection.
+        Override in subclass to deliver a capnp message towards Omega.
+        :param omega_message_capnp: (capnp._DynamicStructBuilder) The
+            TradeMessage to send.
+        :param deadline: (float) Optional utc timestamp after which the
+            message must not be sent anymore.
         """
-        request_socket = self._ZMQ_CONTEXT.socket(zmq.DEALER)
-        request_socket.connect(self._ZMQ_ENDPOINT)
-        self._is_running.set()
-        while self._is_running.is_set():
-            try:
-                # Block for 1 second
-                capnp_request = self._outgoing_message_queue.get(
-                    timeout=self._QUEUE_POLLING_TIMEOUT_SECONDS)
-                request_socket.send(capnp_request.to_bytes())
-            except Empty:
-                continue
-        time.sleep(2.)
-        request_socket.close()
 
     ###########################################################################
     #                                                                         #
@@ -130,13 +97,16 @@ class RequestSender(Thread):
     def logon(self,
               request_header: RequestHeader,
               client_secret: str,
-              credentials: List[AccountCredentials]):
+              credentials: List[AccountCredentials],
+              deadline: float = None):
         """
         Logon to Omega for a specific client_id and set of credentials.
         :param request_header: Header parameter object for requests.
         :param client_secret: (str) client_secret key assigned by Fund3.
         :param credentials: (List[AccountCredentials]) List of exchange
             credentials in the form of AccountCredentials.
+        :param deadline: (float) (optional) utc timestamp after which the
+            request is dropped instead of sent.
         :return: (capnp._DynamicStructBuilder) Logon capnp object.
         """
         omega_message, logon = logon_capnp(
@@ -144,78 +114,94 @@ class RequestSender(Thread):
             client_secret=client_secret,
             credentials=credentials
         )
-        self._queue_message(omega_message)
+        self._queue_message(omega_message, deadline=deadline)
         return logon
 
-    def logoff(self, request_header: RequestHeader):
+    def logoff(self, request_header: RequestHeader, deadline: float = None):
         """
         Logoff Omega for a specific client_id.
         :param request_header: Header parameter object for requests.
+        :param deadline: (float) (optional) utc timestamp after which the
+            request is dropped instead of sent.
         :return: (capnp._DynamicStructBuilder) Logoff capnp object.
         """
         omega_message, body = logoff_capnp(request_header=request_header)
-        self._queue_message(omega_message)
+        self._queue_message(omega_message, deadline=deadline)
         return body
 
-    def send_heartbeat(self, request_header: RequestHeader):
+    def send_heartbeat(self, request_header: RequestHeader,
+                       deadline: float = None):
         """
         Sends a heartbeat to Omega for maintaining and verifying connection.
         Only clients that are logged on will receive heartbeat back from Omega.
         :param request_header: Header parameter object for requests.
+        :param deadline: (float) (optional) utc timestamp after which the
+            request is dropped instead of sent.
         :return: (capnp._DynamicStructBuilder) heartbeat capnp object.
         """
         omega_message, body = heartbeat_capnp(request_header=request_header)
-        self._queue_message(omega_message)
+        self._queue_message(omega_message, deadline=deadline)
         return body
 
     def send_test_message(self, request_header: RequestHeader,
-                          test_message: str):
+                          test_message: str,
+                          deadline: float = None):
         omega_message, body = omega_test_message_capnp(
             request_header=request_header, test_message=test_message)
-        self._queue_message(omega_message)
+        self._queue_message(omega_message, deadline=deadline)
         return body
 
-    def request_server_time(self, request_header: RequestHeader):
+    def request_server_time(self, request_header: RequestHeader,
+                            deadline: float = None):
         """
         Request Omega server time for syncing client and server timestamps.
         :param request_header: Header parameter object for requests.
+        :param deadline: (float) (optional) utc timestamp after which the
+            request is dropped instead of sent.
         :return: (capnp._DynamicStructBuilder) heartbeat capnp object.
         """
         omega_message, body = request_server_time_capnp(
             request_header=request_header)
-        self._queue_message(omega_message)
+        self._queue_message(omega_message, deadline=deadline)
         return body
 
-    def place_order(self, request_header: RequestHeader, order: Order):
+    def place_order(self, request_header: RequestHeader, order: Order,
+                    deadline: float = None):
         """
         Sends a request to Omega to place an order.
         :param request_header: Header parameter object for requests.
         :param order: (Order) Python object containing all required fields.
+        :param deadline: (float) (optional) utc timestamp after which the
+            request is dropped instead of sent.
         :return: (capnp._DynamicStructBuilder) place_order capnp object.
         """
         omega_message, place_order = place_order_capnp(
             request_header=request_header, order=order)
-        self._queue_message(omega_message)
+        self._queue_message(omega_message, deadline=deadline)
         return place_order
 
     def place_contingent_order(self, request_header: RequestHeader,
-                               contingent_order: Union[Batch, OPO, OCO]):
+                               contingent_order: Union[Batch, OPO, OCO],
+                               deadline: float = None):
         """
         Sends a request to Omega to place a contingent order.
         :param request_header: Header parameter object for requests.
         :param contingent_order: (Batch, OPO, or OCO) python object
+        :param deadline: (float) (optional) utc timestamp after which the
+            request is dropped instead of sent.
         :return: (capnp._DynamicStructBuilder) placeContingentOrder capnp
         object.
         """
         omega_message, place_contingent_order = place_contingent_order_capnp(
             request_header=request_header, contingent_order=contingent_order)
-        self._queue_message(omega_message)
+        self._queue_message(omega_message, deadline=deadline)
         return place_contingent_order
 
     def place_SOR_order(self, request_header: RequestHeader,
                         parent_order: Order,
                         accounts: Dict[str, AccountInfo],
-                        auth: FPGAuth):
+                        auth: FPGAuth,
+                        deadline: float = None):
         """
         Sends a request to FPG to split up parent order into child orders,
         which are then sent to Omega for execution
@@ -225,6 +211,8 @@ class RequestSender(Thread):
         :param accounts: (Dict[str, AccountInfo]) dict of exchanges:
         AccountInfo for which we will split up orders on
         :param auth: (FPGAuth) authentication used to sign request
+        :param deadline: (float) (optional) utc timestamp after which the
+            request is dropped instead of sent.
         :return: (List[capnp._DynamicStructBuilder]) list of place_order capnp
         objects, status_code (int), error_message (str)
         """
@@ -239,7 +227,8 @@ class RequestSender(Thread):
         for child_order in child_orders:
             place_child_orders.append(
                 self.place_order(
-                    request_header=request_header, order=child_order))
+                    request_header=request_header, order=child_order,
+                    deadline=deadline))
         return place_child_orders, status_code, error_message
 
     def replace_order(self,
@@ -253,7 +242,8 @@ class RequestSender(Thread):
                       stop_price: float = 0.0,
                       time_in_force: str = TimeInForce.gtc.name,
                       # pylint: enable=E1101
-                      expire_at: float = 0.0):
+                      expire_at: float = 0.0,
+                      deadline: float = None):
         """
         Sends a request to Omega to replace an order.
         :param request_header: Header parameter object for requests.
@@ -265,6 +255,8 @@ class RequestSender(Thread):
         :param stop_price: (float) (optional)
         :param time_in_force: (TimeInForce) (optional)
         :param expire_at: (float) (optional)
+        :param deadline: (float) (optional) utc timestamp after which the
+            request is dropped instead of sent.
         :return: (capnp._DynamicStructBuilder) replaceOrder capnp object.
         """
         omega_message, replace_order = replace_order_capnp(
@@ -278,18 +270,21 @@ class RequestSender(Thread):
             time_in_force=time_in_force,
             expire_at=expire_at
         )
-        self._queue_message(omega_message)
+        self._queue_message(omega_message, deadline=deadline)
         return replace_order
 
     def cancel_order(self,
                      request_header: RequestHeader,
                      account_info: AccountInfo,
-                     order_id: str):
+                     order_id: str,
+                     deadline: float = None):
         """
         Sends a request to Omega to cancel an order.
         :param request_header: Header parameter object for requests.
         :param account_info: (AccountInfo) Account on which to cancel order.
         :param order_id: (str) order_id as returned from the ExecutionReport.
+        :param deadline: (float) (optional) utc timestamp after which the
+            request is dropped instead of sent.
         :return: (capnp._DynamicStructBuilder) cancel_order object.
         """
         omega_message, cancel_order = cancel_order_capnp(
@@ -297,14 +292,15 @@ class RequestSender(Thread):
             account_info=account_info,
             order_id=order_id
         )
-        self._queue_message(omega_message)
+        self._queue_message(omega_message, deadline=deadline)
         return cancel_order
 
     def cancel_all_orders(self,
                           request_header: RequestHeader,
                           account_info: AccountInfo,
                           symbol: str = None,
-                          side: str = None):
+                          side: str = None,
+                          deadline: float = None):
         """
         Sends a request to Omega to cancel all orders. Optionally including
         side and/or symbol
@@ -312,6 +308,8 @@ class RequestSender(Thread):
         :param account_info: (AccountInfo) Account on which to cancel order.
         :param symbol: str (optional)
         :param side: str (optional)
+        :param deadline: (float) (optional) utc timestamp after which the
+            request is dropped instead of sent.
         :return: (capnp._DynamicStructBuilder) cancel_all_orders object.
         """
         omega_message, cancel_all_orders = cancel_all_orders_capnp(
@@ -321,79 +319,94 @@ class RequestSender(Thread):
             side=side)
         logger.debug('Cancelling All Orders.', extra={'symbol': symbol,
                                                       'side': side})
-        self._queue_message(omega_message)
+        self._queue_message(omega_message, deadline=deadline)
         return cancel_all_orders
 
     def request_account_data(self,
                              request_header: RequestHeader,
-                             account_info: AccountInfo):
+                             account_info: AccountInfo,
+                             deadline: float = None):
         """
         Sends a request to Omega for full account snapshot including balances,
         open positions, and working orders on specified account.
         :param request_header: Header parameter object for requests.
         :param account_info: (AccountInfo) Account from which to retrieve data.
+        :param deadline: (float) (optional) utc timestamp after which the
+            request is dropped instead of sent.
         :return: (capnp._DynamicStructBuilder) get_account_data capnp object.
         """
         omega_message, get_account_data = request_account_data_capnp(
             request_header=request_header, account_info=account_info)
-        self._queue_message(omega_message)
+        self._queue_message(omega_message, deadline=deadline)
         return get_account_data
 
     def request_open_positions(self,
                                request_header: RequestHeader,
-                               account_info: AccountInfo):
+                               account_info: AccountInfo,
+                               deadline: float = None):
         """
         Sends a request to Omega for open positions on an Account.
         :param request_header: Header parameter object for requests.
         :param account_info: (AccountInfo) Account from which to retrieve data.
+        :param deadline: (float) (optional) utc timestamp after which the
+            request is dropped instead of sent.
         :return: (capnp._DynamicStructBuilder) get_open_positions capnp
         object.
         """
         omega_message, get_open_positions = request_open_positions_capnp(
             request_header=request_header, account_info=account_info)
-        self._queue_message(omega_message)
+        self._queue_message(omega_message, deadline=deadline)
         return get_open_positions
 
     def request_account_balances(self,
                                  request_header: RequestHeader,
-                                 account_info: AccountInfo):
+                                 account_info: AccountInfo,
+                                 deadline: float = None):
         """
         Sends a request to Omega for full account balances snapshot on an
         Account.
         :param request_header: Header parameter object for requests.
         :param account_info: (AccountInfo) Account from which to retrieve data.
+        :param deadline: (float) (optional) utc timestamp after which the
+            request is dropped instead of sent.
         :return: (capnp._DynamicStructBuilder) get_account_balances capnp
         object.
         """
         omega_message, get_account_balances = request_account_balances_capnp(
             request_header=request_header, account_info=account_info)
-        self._queue_message(omega_message)
+        self._queue_message(omega_message, deadline=deadline)
         return get_account_balances
 
     def request_working_orders(self,
                                request_header: RequestHeader,
-                               account_info: AccountInfo):
+                               account_info: AccountInfo,
+                               deadline: float = None):
         """
         Sends a request to Omega for all working orders snapshot on an
         Account.
         :param request_header: Header parameter object for requests.
         :param account_info: (AccountInfo) Account from which to retrieve data.
+        :param deadline: (float) (optional) utc timestamp after which the
+            request is dropped instead of sent.
         :return: (capnp._DynamicStructBuilder) get_working_orders capnp object.
         """
         omega_message, get_working_orders = request_working_orders_capnp(
             request_header=request_header, account_info=account_info)
-        self._queue_message(omega_message)
+        self._queue_message(omega_message, deadline=deadline)
         return get_working_orders
 
     def request_order_status(self,
                              request_header: RequestHeader,
                              account_info: AccountInfo,
-                             order_id: str):
+                             order_id: str,
+                             deadline: float = None):
         """
         Sends a request to Omega to request status of a specific order.
         :param request_header: Header parameter object for requests.
         :param account_info: (AccountInfo) Account from which to retrieve data.
         :param order_id: (str) The id of the order of interest.
+        :param deadline: (float) (optional) utc timestamp after which the
+            request is dropped instead of sent.
         :return: (capnp._DynamicStructBuilder) get_order_status capnp object.
         """
         omega_message, get_order_status = request_order_status_capnp(
@@ -401,14 +414,15 @@ class RequestSender(Thread):
             account_info=account_info,
             order_id=order_id
         )
-        self._queue_message(omega_message)
+        self._queue_message(omega_message, deadline=deadline)
         return get_order_status
 
     def request_completed_orders(self,
                                  request_header: RequestHeader,
                                  account_info: AccountInfo,
                                  count: int = None,
-                                 since: float = None):
+                                 since: float = None,
+                                 deadline: float = None):
         """
         Sends a request to Omega for all completed orders on specified
         account.  If both 'count' and 'from_unix' are None, returns orders
@@ -419,6 +433,8 @@ class RequestSender(Thread):
             ones).
         :param since: (float) optional, returns all orders from provided unix
             timestamp to present.
+        :param deadline: (float) (optional) utc timestamp after which the
+            request is dropped instead of sent.
         :return: (capnp._DynamicStructBuilder) get_completed_orders capnp
             object.
         """
@@ -428,17 +444,20 @@ class RequestSender(Thread):
             count=count,
             since=since
         )
-        self._queue_message(omega_message)
+        self._queue_message(omega_message, deadline=deadline)
         return get_completed_orders
 
     def request_exchange_properties(self,
                                     request_header: RequestHeader,
-                                    exchange: str):
+                                    exchange: str,
+                                    deadline: float = None):
         """
         Sends a request to Omega for supported currencies, symbols and their
         associated properties, timeInForces, and orderTypes on an exchange.
         :param request_header: Header parameter object for requests.
         :param exchange: (str) The exchange of interest.
+        :param deadline: (float) (optional) utc timestamp after which the
+            request is dropped instead of sent.
         :return: (capnp._DynamicStructBuilder) get_exchange_properties capnp
             object.
         """
@@ -446,16 +465,19 @@ class RequestSender(Thread):
             request_exchange_properties_capnp(
                 request_header=request_header, exchange=exchange)
         )
-        self._queue_message(omega_message)
+        self._queue_message(omega_message, deadline=deadline)
         return get_exchange_properties
 
     def request_authorization_refresh(self,
                                       request_header: RequestHeader,
-                                      auth_refresh: AuthorizationRefresh):
+                                      auth_refresh: AuthorizationRefresh,
+                                      deadline: float = None):
         """
         Sends a request to Omega to refresh the session
         :param request_header: Header parameter object for requests.
         :param auth_refresh: AuthorizationRefresh python object
+        :param deadline: (float) (optional) utc timestamp after which the
+            request is dropped instead of sent.
         :return: (capnp._DynamicStructBuilder) authorization_refresh capnp
             object.
         """
@@ -463,5 +485,208 @@ class RequestSender(Thread):
             request_auth_refresh_capnp(
                 request_header=request_header, auth_refresh=auth_refresh)
         )
-        self._queue_message(omega_message)
+        self._queue_message(omega_message, deadline=deadline)
         return authorization_refresh
+
+
+class RequestSender(BaseRequestSender, Thread):
+    """
+    Runs as an individual thread to send requests to TesConnection,
+    which then gets routed to Omega.  The motivation of the design is different
+    threads should not share zmq sockets, and that the TesConnection event
+    loop should not be blocked.
+
+    When a request is "sent" from this class, it is placed into an internal
+    thread-safe queue.  The request sender loop checks if the queue has a
+    message, and if there is one, sends it to TesConnection through an inproc
+    connection.
+
+    Attributes:
+        _ZMQ_CONTEXT: (zmq.Context) Required to create sockets. It is
+            recommended that one application use one shared zmq context for
+            all sockets.
+        _ZMQ_ENDPOINT: (str) The zmq endpoint to connect to.
+        _QUEUE_POLLING_TIMEOUT_SECONDS: (int) The polling timeout for the
+            internal queue.
+        _WAIT_STRATEGY: (WaitStrategy) How the send loop waits for queued
+            messages, e.g. blocking Queue.get or busy-poll.
+        _CPU_AFFINITY: (Set[int]) Optional CPUs the sender thread is pinned
+            to.
+        _RATE_LIMITER: (RequestRateLimiter) Optional per-account and
+            per-exchange rate limiter.  Throttled requests are delayed, never
+            dropped.  With a PriorityRequestQueue the limiter is installed on
+            the queue, so that throttled lanes do not hold back cancels;
+            otherwise the send loop waits for the head of the queue.
+        _outgoing_message_queue: (Queue) Internal message queue for outgoing
+            Omega Messages.  Pass a PriorityRequestQueue to send cancels
+            ahead of new orders and queries, with coalesce=True to also
+            drop unsent replaces and cancels that became obsolete.  If no
+            queue is passed and max_queue_size > 0, a bounded
+            PriorityRequestQueue applying backpressure_policy is created.
+        _SOCKET_OPTIONS: (SocketOptions) High-water marks and buffer sizes
+            of request_socket.
+        _MAX_QUEUE_AGE_SECONDS: (float) Optional deadline, relative to the
+            time a request is queued, for requests without an explicit
+            deadline.
+        _EXPIRED_REQUEST_CALLBACK: (Callable) Called with the TradeMessage
+            and its deadline for each request dropped because its deadline
+            passed before it was sent.  Defaults to logging a warning.
+        _is_running: (Event) Event object that indicates on/ off
+            behavior for the response handler loop.
+    """
+    def __init__(self,
+                 zmq_context: zmq.Context,
+                 zmq_endpoint: str,
+                 outgoing_message_queue: Queue = None,
+                 queue_polling_timeout_seconds: int = 1,
+                 name: str='OmegaRequestSender',
+                 wait_strategy: WaitStrategy = None,
+                 cpu_affinity: Set[int] = None,
+                 rate_limiter: RequestRateLimiter = None,
+                 max_queue_size: int = 0,
+                 backpressure_policy: BackpressurePolicy =
+                 BackpressurePolicy.block,
+                 put_timeout_seconds: float = None,
+                 socket_options: SocketOptions = None,
+                 max_queue_age_seconds: float = None,
+                 expired_request_callback: Callable = None):
+        assert zmq_context
+        assert zmq_endpoint
+
+        self._ZMQ_CONTEXT = zmq_context
+        self._ZMQ_ENDPOINT = zmq_endpoint
+        self._QUEUE_POLLING_TIMEOUT_SECONDS = queue_polling_timeout_seconds
+        self._WAIT_STRATEGY = wait_strategy or WaitStrategy()
+        self._CPU_AFFINITY = cpu_affinity
+
+        self._SOCKET_OPTIONS = socket_options or SocketOptions()
+        self._MAX_QUEUE_AGE_SECONDS = max_queue_age_seconds
+        self._EXPIRED_REQUEST_CALLBACK = (expired_request_callback or
+                                          log_expired_request)
+
+        if outgoing_message_queue is None and max_queue_size > 0:
+            outgoing_message_queue = PriorityRequestQueue(
+                maxsize=max_queue_size,
+                backpressure=backpressure_policy,
+                put_timeout=put_timeout_seconds)
+        self._outgoing_message_queue = outgoing_message_queue or Queue()
+        self._RATE_LIMITER = rate_limiter
+        if rate_limiter and hasattr(self._outgoing_message_queue,
+                                    'set_rate_limiter'):
+            self._outgoing_message_queue.set_rate_limiter(rate_limiter)
+            self._RATE_LIMITER = None
+
+        self._is_running = Event()
+        super().__init__(name=name)
+
+    def _queue_message(self, omega_message_capnp: capnp._DynamicStructBuilder,
+                       deadline: float = None):
+        """
+        Put a capnp message into the internal queue for sending to
+        TesConnection.
+        :param omega_message_capnp:
+        :param deadline: (float) Optional utc timestamp after which the
+            message is dropped instead of sent.
+        :raises: queue.Full if a bounded queue rejects the message.
+        """
+        if deadline is None and self._MAX_QUEUE_AGE_SECONDS is not None:
+            deadline = time.time() + self._MAX_QUEUE_AGE_SECONDS
+        if deadline is None:
+            self._outgoing_message_queue.put(omega_message_capnp)
+        else:
+            self._outgoing_message_queue.put(
+                ExpiringRequest(omega_message_capnp, deadline))
+
+    def outgoing_queue_depths(self):
+        """
+        :return: (Dict[str, int]) Number of queued requests per lane if the
+            outgoing queue is a PriorityRequestQueue, else {'all': qsize}.
+        """
+        if hasattr(self._outgoing_message_queue, 'lane_depths'):
+            return self._outgoing_message_queue.lane_depths()
+        return {'all': self._outgoing_message_queue.qsize()}
+
+    def cleanup(self):
+        """
+        Stop the response receiver gracefully and join the thread.
+        """
+        self.stop()
+        self.join()
+
+    def stop(self):
+        """
+        Clear the _is_running Event, which terminates the request sender loop.
+        """
+        self._is_running.clear()
+
+    def is_running(self):
+        """
+        Return True if the thread is running, False otherwise.
+        """
+        return self._is_running.is_set()
+
+    def run(self):
+        """
+        Message sending loop.
+        Create the request_socket as a zmq.DEALER socket and then connect to
+        the provided _ZMQ_ENDPOINT.
+
+        Try to get a message for _QUEUE_POLLING_TIMEOUT_SECONDS and then send
+        it out to TesConnection.  With a non-blocking wait strategy the queue
+        is polled without blocking instead.
+        """
+        if self._CPU_AFFINITY:
+            set_thread_cpu_affinity(self._CPU_AFFINITY)
+        request_socket = self._ZMQ_CONTEXT.socket(zmq.DEALER)
+        self._SOCKET_OPTIONS.apply(request_socket)
+        request_socket.connect(self._ZMQ_ENDPOINT)
+        wait_strategy = self._WAIT_STRATEGY
+        block = wait_strategy.IS_BLOCKING
+        idle_count = 0
+        self._is_running.set()
+        while self._is_running.is_set():
+            try:
+                # Block for 1 second
+                capnp_request = self._outgoing_message_queue.get(
+                    block=block, timeout=self._QUEUE_POLLING_TIMEOUT_SECONDS)
+            except Empty:
+                idle_count += 1
+                wait_strategy.idle(idle_count)
+                continue
+            idle_count = 0
+            if type(capnp_request) is ExpiringRequest:
+                self._send_expiring_request(request_socket, capnp_request)
+                continue
+            if self._RATE_LIMITER:
+                self._wait_for_rate_limit(capnp_request)
+            request_socket.send(capnp_request.to_bytes())
+        time.sleep(2.)
+        request_socket.close()
+
+    def _send_expiring_request(self, request_socket: zmq.Socket,
+                               expiring_request: ExpiringRequest):
+        """
+        Send a request with its deadline as a second frame, so that
+        OmegaConnection can check it again before forwarding, or drop it if
+        the deadline already passed.
+        """
+        capnp_request = expiring_request.message
+        if self._RATE_LIMITER:
+            self._wait_for_rate_limit(capnp_request)
+        if time.time() > expiring_request.deadline:
+            self._EXPIRED_REQUEST_CALLBACK(capnp_request,
+                                           expiring_request.deadline)
+            return
+        request_socket.send_multipart(
+            [capnp_request.to_bytes(),
+             DEADLINE_FRAME.pack(expiring_request.deadline)])
+
+    def _wait_for_rate_limit(self,
+                             capnp_request: capnp._DynamicStructBuilder):
+        """
+        Sleep until the rate limiter lets capnp_request through.
+        """
+        delay = self._RATE_LIMITER.acquire(capnp_request)
+        while delay > 0.:
+            time.sleep(delay)
+            delay = self._RATE_LIMITER.acquire(capnp_request)
@@ -0,0 +1,131 @@
+"""
+Background receive lane of ResponseReceiver: bulk responses, e.g. a large
+completedOrdersReport, are decoded and handled on a separate thread so that
+they do not delay the latency-sensitive responses handled on the receiver
+thread.
+"""
+from queue import Empty, Queue
+from threading import Event, Thread
+from typing import Callable, Iterable, List
+
+from omega_client.messaging.header_peek import conflate_snapshots, \
+    peek_response_header
+
+# Response types handled on the ResponseReceiver thread by default, all
+# others go to the background lane.
+FAST_LANE_RESPONSE_TYPES = frozenset({
+    'heartbeat', 'executionReport', 'system', 'logonAck',
+    'authorizationGrant'})
+
+
+class BackgroundResponseLane(Thread):
+    """
+    Handles the responses that are not of a fast lane type on its own
+    thread, in arrival order.  Responses are routed by the header read from
+    the frame, so the receiver thread does not decode them.
+
+    Attributes:
+        _HANDLE_MESSAGES: (Callable[[List[bytes]], None]) Decodes and
+            dispatches a list of received messages.
+        _FAST_LANE_RESPONSE_TYPES: (frozenset) Response types left to the
+            receiver thread.
+        _POLLING_TIMEOUT_SECS: (float) Timeout of waiting for messages, after
+            which the lane checks whether it was stopped.
+        _CONFLATE: (bool) Drop snapshots superseded by a later queued one,
+            see header_peek.conflate_snapshots.
+        _queue: (Queue) Lists of received messages waiting to be handled.
+        _is_running: (Event) Event object that indicates on/ off
+            behavior for the lane loop.
+    """
+    def __init__(self,
+                 handle_messages: Callable[[List[bytes]], None],
+                 fast_lane_response_types: Iterable[str] = None,
+                 polling_timeout_milli: int = 1000,
+                 conflate: bool = False,
+                 name: str = 'BackgroundResponseLane'):
+        assert handle_messages
+        self._HANDLE_MESSAGES = handle_messages
+        self._FAST_LANE_RESPONSE_TYPES = frozenset(
+            fast_lane_response_types if fast_lane_response_types is not None
+            else FAST_LANE_RESPONSE_TYPES)
+        self._POLLING_TIMEOUT_SECS = polling_timeout_milli / 1000.
+        self._CONFLATE = conflate
+        self._queue = Queue()
+        self._is_running = Event()
+        super().__init__(name=name, daemon=True)
+
+    def is_background(self, binary_msg):
+        """
+        :param binary_msg: (bytes) A received message.
+        :return: (bool) True if binary_msg is a response of a type that is
+            not in the fast lane.  Invalid messages stay in the fast lane,
+            which logs their decoding error.
+        """
+        header = peek_response_header(binary_msg)
+        return (header is not None and header.response_type not in
+                self._FAST_LANE_RESPONSE_TYPES)
+
+    def put(self, binary_msgs: List[bytes]):
+        """
+        Queue binary_msgs to be handled on the lane thread.
+        """
+        self._queue.put(binary_msgs)
+
+    def route(self, binary_msgs: List[bytes]):
+        """
+        Queue the background messages of binary_msgs.
+        :return: (List[bytes]) The fast lane messages of binary_msgs, in
+            arrival order.
+        """
+        fast = []
+        background = []
+        for binary_msg in binary_msgs:
+            if self.is_background(binary_msg):
+                background.append(binary_msg)
+            else:
+                fast.append(binary_msg)
+        if background:
+            self.put(background)
+        return fast
+
+    def is_running(self):
+        """
+        Return True if the thread is running, False otherwise.
+        """
+        return self._is_running.is_set()
+
+    def stop(self):
+        """
+        Clear the _is_running Event, which terminates the lane loop once the
+        messages queued so far are handled.
+        """
+        self._is_running.clear()
+
+    def _drain(self, binary_msgs: List[bytes]):
+        """
+        :return: (List[bytes]) binary_msgs followed by every other queued
+            message.
+        """
+        binary_msgs = list(binary_msgs)
+        while True:
+            try:
+                binary_msgs.extend(self._queue.get_nowait())
+            except Empty:
+                return binary_msgs
+
+    def start(self):
+        # Set before the thread starts so that stop() cannot be undone.
+        self._is_running.set()
+        super().start()
+
+    def run(self):
+        while self._is_running.is_set() or not self._queue.empty():
+            try:
+                binary_msgs = self._queue.get(
+                    timeout=self._POLLING_TIMEOUT_SECS)
+            except Empty:
+                continue
+            binary_msgs = self._drain(binary_msgs)
+            if self._CONFLATE:
+                binary_msgs = conflate_snapshots(binary_msgs)
+            self._HANDLE_MESSAGES(binary_msgs)
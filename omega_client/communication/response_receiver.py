@@ -5,6 +5,7 @@ that is connected to Omega.
 import logging
 from threading import Event, Thread
 import time
+from typing import Iterable, Set
 
 # pylint: disable=W0611
 import capnp
@@ -16,10 +17,21 @@ import zmq
 import omega_protocol.TradeMessage_capnp as msgs_capnp
 # pylint: enable=E0401
 # pylint: enable=E0611
+from omega_client.communication.frame_journal import FrameJournalWriter
+from omega_client.communication.response_lane import BackgroundResponseLane
+from omega_client.communication.socket_options import SocketOptions
+from omega_client.communication.wait_strategy import \
+    set_thread_cpu_affinity, WaitStrategy
+from omega_client.messaging.deduplication import \
+    ExecutionReportDeduplicator
+from omega_client.messaging.header_peek import conflate_snapshots
 from omega_client.messaging.response_handler import ResponseHandler
 
 logger = logging.getLogger(__name__)
 
+# Batch size of a conflating ResponseReceiver if batch_size is not set.
+DEFAULT_CONFLATION_BATCH_SIZE = 1024
+
 
 class ResponseReceiver(Thread):
     """
@@ -42,6 +54,41 @@ class ResponseReceiver(Thread):
             ROUTER socket on the other side to identify the DEALER socket in
             this class.  Optional since zmq DEALER socket generates a default
             identity.
+        _WAIT_STRATEGY: (WaitStrategy) How the receive loop waits for
+            messages, e.g. blocking poll or busy-poll.
+        _CPU_AFFINITY: (Set[int]) Optional CPUs the receiver thread is pinned
+            to.
+        _SOCKET_OPTIONS: (SocketOptions) High-water marks and buffer sizes
+            of response_socket.
+        _ZERO_COPY: (bool) Receive zmq.Frame objects and decode directly
+            from their buffers instead of copying each message into bytes.
+        _TRAVERSAL_LIMIT_IN_WORDS: (int) capnp traversal limit of decoded
+            messages, None for the pycapnp default (8M words, i.e. 64 MiB).
+        _NESTING_LIMIT: (int) capnp nesting limit of decoded messages, None
+            for the pycapnp default.
+        _BATCH_SIZE: (int) Maximum number of immediately available messages
+            received before they are passed to
+            ResponseHandler.dispatch_responses together, so that bursts of
+            execution reports reach on_exec_reports in one call.  1 to
+            dispatch each message on receipt.
+        _BATCH_TIME_BUDGET_SECS: (float) Maximum time spent receiving one
+            batch.
+        _CONFLATE: (bool) Drop the snapshot responses, e.g.
+            accountBalancesReport, of each received batch that are
+            superseded by a later snapshot of the same type, client and
+            account, before decoding them.  Batches only hold more than one
+            message when messages arrive faster than they are handled.
+            With a background lane, the snapshots waiting in its queue are
+            conflated instead.
+        _background_lane: (BackgroundResponseLane) Optional lane that
+            handles the responses not of a fast lane type on its own thread,
+            so that large reports do not delay heartbeats and execution
+            reports.  Callbacks then run on both threads.
+        _frame_journal: (FrameJournalWriter) Optional journal that records
+            every received frame for offline replay.
+        _deduplicator: (ExecutionReportDeduplicator) Optional stage that
+            drops execution reports of an already seen order state before
+            they are decoded.
         _is_running: (Event) Event object that indicates on/ off
             behavior for the response handler loop.
     """
@@ -51,7 +98,20 @@ class ResponseReceiver(Thread):
                  response_handler: ResponseHandler,
                  polling_timeout_milli: int = 1000,
                  name: str = 'ResponseHandler',
-                 socket_identity: bytes = None):
+                 socket_identity: bytes = None,
+                 frame_journal: FrameJournalWriter = None,
+                 wait_strategy: WaitStrategy = None,
+                 cpu_affinity: Set[int] = None,
+                 socket_options: SocketOptions = None,
+                 zero_copy: bool = False,
+                 traversal_limit_in_words: int = None,
+                 nesting_limit: int = None,
+                 batch_size: int = None,
+                 batch_time_budget_milli: float = 1.,
+                 conflate: bool = False,
+                 receive_lanes: bool = False,
+                 fast_lane_response_types: Iterable[str] = None,
+                 deduplicator: ExecutionReportDeduplicator = None):
         assert zmq_context
         assert zmq_endpoint
         assert response_handler
@@ -62,6 +122,28 @@ class ResponseReceiver(Thread):
 
         self._POLLING_TIMEOUT_MILLI = polling_timeout_milli
         self._SOCKET_IDENTITY = socket_identity
+        self._WAIT_STRATEGY = wait_strategy or WaitStrategy()
+        self._CPU_AFFINITY = cpu_affinity
+        self._SOCKET_OPTIONS = socket_options or SocketOptions()
+        self._ZERO_COPY = zero_copy
+        self._TRAVERSAL_LIMIT_IN_WORDS = traversal_limit_in_words
+        self._NESTING_LIMIT = nesting_limit
+        if batch_size is None:
+            batch_size = DEFAULT_CONFLATION_BATCH_SIZE if conflate else 1
+        assert batch_size >= 1
+        self._BATCH_SIZE = batch_size
+        self._CONFLATE = conflate
+        self._BATCH_TIME_BUDGET_SECS = batch_time_budget_milli / 1000.
+        self._frame_journal = frame_journal
+        self._deduplicator = deduplicator
+        self._background_lane = None
+        if receive_lanes:
+            self._background_lane = BackgroundResponseLane(
+                self._handle_binary_omega_messages,
+                fast_lane_response_types=fast_lane_response_types,
+                polling_timeout_milli=polling_timeout_milli,
+                conflate=conflate,
+                name=name + 'BackgroundLane')
 
         self._is_running = Event()
         super().__init__(name=name)
@@ -106,8 +188,25 @@ class ResponseReceiver(Thread):
 
         The poller exists so that the response receiver can be stopped
         gracefully and not get blocked by socket.recv() or stuck in a loop.
+
+        With _BATCH_SIZE > 1, the messages that are already queued when one
+        arrives are received without polling, up to _BATCH_SIZE or
+        _BATCH_TIME_BUDGET_SECS, and dispatched together.  With _CONFLATE,
+        superseded snapshots are dropped from each batch; the frame journal
+        still records them.
+
+        With a _background_lane, only the fast lane responses are handled
+        here, the others are queued to the lane as they arrive.  The lane is
+        started and stopped with this thread.
+
+        With _ZERO_COPY, the capnp reader is built over the buffer of the
+        received zmq.Frame, which the reader keeps alive.  Readers passed to
+        the response handler are only valid during the callback either way.
         """
+        if self._CPU_AFFINITY:
+            set_thread_cpu_affinity(self._CPU_AFFINITY)
         response_socket = self._ZMQ_CONTEXT.socket(zmq.DEALER)
+        self._SOCKET_OPTIONS.apply(response_socket)
         if self._SOCKET_IDENTITY:
             response_socket.setsockopt(zmq.IDENTITY, self._SOCKET_IDENTITY)
         response_socket.connect(self._ZMQ_ENDPOINT)
@@ -115,27 +214,89 @@ class ResponseReceiver(Thread):
         # pylint: disable=E1101
         poller.register(response_socket, zmq.POLLIN)
         # pylint: enable=E1101
+        wait_strategy = self._WAIT_STRATEGY
+        polling_timeout_milli = wait_strategy.poll_timeout_milli(
+            self._POLLING_TIMEOUT_MILLI)
+        idle_count = 0
+        background_lane = self._background_lane
+        if background_lane is not None:
+            background_lane.start()
         self._is_running.set()
         while self._is_running.is_set():
-            socks = dict(poller.poll(self._POLLING_TIMEOUT_MILLI))
+            socks = dict(poller.poll(polling_timeout_milli))
+            if not socks:
+                idle_count += 1
+                wait_strategy.idle(idle_count)
+                continue
+            idle_count = 0
             if socks.get(response_socket) == zmq.POLLIN:
-                message = response_socket.recv()
+                if self._BATCH_SIZE > 1:
+                    messages = self._receive_batch(response_socket)
+                    if self._deduplicator is not None:
+                        messages = self._deduplicator.filter(messages)
+                    if background_lane is not None:
+                        messages = background_lane.route(messages)
+                    elif self._CONFLATE:
+                        messages = conflate_snapshots(messages)
+                    self._handle_binary_omega_messages(messages)
+                    continue
+                message = self._receive(response_socket)
+                if self._frame_journal:
+                    self._frame_journal.write(message)
+                if (self._deduplicator is not None and
+                        self._deduplicator.is_duplicate(message)):
+                    continue
+                if (background_lane is not None and
+                        background_lane.is_background(message)):
+                    background_lane.put([message])
+                    continue
                 self._handle_binary_omega_message(message)
+        if background_lane is not None:
+            background_lane.stop()
+            background_lane.join()
         time.sleep(2.)
         response_socket.close()
+        if self._frame_journal:
+            self._frame_journal.flush()
+
+    def _receive(self, response_socket: zmq.Socket, flags: int = 0):
+        if self._ZERO_COPY:
+            return response_socket.recv(flags, copy=False).buffer
+        return response_socket.recv(flags)
 
-    def _handle_response(self,
-                         response_type: str,
-                         response: capnp._DynamicStructBuilder):
+    def _receive_batch(self, response_socket: zmq.Socket):
         """
-        Pass response_type and response to the registered response handler.
-        :param response_type: (str) The type of TradeMessage embedded in the
-            response from Omega.
-        :param response: (capnp._DynamicStructBuilder) One of the types under
-            "TradeMessage.Response.body".
-            See omega_protocol.TradeMessage.capnp.
+        Receive one message and then every immediately available message, up
+        to _BATCH_SIZE messages or _BATCH_TIME_BUDGET_SECS.
+        :return: (List[bytes]) The received messages.
         """
-        self._RESPONSE_HANDLER.handle_response(response_type, response)
+        messages = [self._receive(response_socket)]
+        deadline = time.monotonic() + self._BATCH_TIME_BUDGET_SECS
+        while (len(messages) < self._BATCH_SIZE and
+               time.monotonic() < deadline):
+            try:
+                messages.append(self._receive(response_socket, zmq.NOBLOCK))
+            except zmq.Again:
+                break
+        if self._frame_journal:
+            for message in messages:
+                self._frame_journal.write(message)
+        return messages
+
+    def _handle_binary_omega_messages(self, binary_msgs):
+        """
+        Decode a batch of received messages and pass them to
+        ResponseHandler.dispatch_responses.
+        :param binary_msgs: (List[bytes]) The received binary messages.
+        """
+        responses = []
+        for binary_msg in binary_msgs:
+            try:
+                responses.append(self._decode_response(binary_msg))
+            except TypeError as e:
+                logger.error('Exception in decoding message' + repr(e),
+                             extra={'exception': repr(e)})
+        self._RESPONSE_HANDLER.dispatch_responses(responses)
 
     def _handle_binary_omega_message(self, binary_msg: bytes):
         """
@@ -143,10 +304,59 @@ class ResponseReceiver(Thread):
         :param binary_msg: (bytes) The received binary message.
         """
         try:
-            trade_message = msgs_capnp.TradeMessage.from_bytes(binary_msg)
-            response = trade_message.type.response
-            response_type = response.body.which()
-            self._handle_response(response_type, response)
+            self._RESPONSE_HANDLER.dispatch_response(
+                self._decode_response(binary_msg))
         except TypeError as e:
             logger.error('Exception in decoding message' + repr(e),
                          extra={'exception': repr(e)})
+
+    def _decode_response(self, binary_msg):
+        """
+        :param binary_msg: (Union[bytes, memoryview]) The received message.
+        :return: (capnp._DynamicStructReader) the TradeMessage.Response.
+        """
+        try:
+            return decode_response(
+                binary_msg,
+                traversal_limit_in_words=self._TRAVERSAL_LIMIT_IN_WORDS,
+                nesting_limit=self._NESTING_LIMIT)
+        except TypeError:
+            if not isinstance(binary_msg, memoryview):
+                raise
+            # pycapnp versions that only decode bytes.
+            return decode_response(
+                binary_msg.tobytes(),
+                traversal_limit_in_words=self._TRAVERSAL_LIMIT_IN_WORDS,
+                nesting_limit=self._NESTING_LIMIT)
+
+
+def decode_omega_response(binary_msg: bytes):
+    """
+    Decode a binary TradeMessage received from Omega.
+    :param binary_msg: (bytes) The received binary message.
+    :return: (str) response_type, the name of the populated
+        "TradeMessage.Response.body" union member,
+             (capnp._DynamicStructReader) the TradeMessage.Response.
+    """
+    trade_message = msgs_capnp.TradeMessage.from_bytes(binary_msg)
+    response = trade_message.type.response
+    return response.body.which(), response
+
+
+def decode_response(binary_msg: bytes,
+                    traversal_limit_in_words: int = None,
+                    nesting_limit: int = None):
+    """
+    Decode a binary TradeMessage received from Omega, for
+    ResponseHandler.dispatch_response.
+    :param binary_msg: (bytes) The received binary message, or a buffer such
+        as zmq.Frame.buffer, which is read without a copy.
+    :param traversal_limit_in_words: (int) Raise for very large reports that
+        exceed the pycapnp default limit.
+    :param nesting_limit: (int) Maximum nesting depth of the message.
+    :return: (capnp._DynamicStructReader) the TradeMessage.Response.
+    """
+    return msgs_capnp.TradeMessage.from_bytes(
+        binary_msg,
+        traversal_limit_in_words=traversal_limit_in_words,
+        nesting_limit=nesting_limit).type.response
@@ -0,0 +1,89 @@
+"""
+Omega Response Replayer.  Feed journaled inbound frames into a
+ResponseReceiver or ResponseHandler without a live Omega connection.
+"""
+import logging
+import time
+from typing import Iterable, Tuple, Union
+
+from omega_client.communication.frame_journal import read_frame_journal
+from omega_client.communication.response_receiver import \
+    decode_response, ResponseReceiver
+from omega_client.messaging.response_handler import ResponseHandler
+
+logger = logging.getLogger(__name__)
+
+
+class ResponseReplayer:
+    """
+    Replays recorded (timestamp, frame) pairs on the caller's thread.
+
+    Frames are passed to ResponseReceiver._handle_binary_omega_message when
+    the target is a ResponseReceiver, so the exact production decode path is
+    exercised.  When the target is a ResponseHandler, frames are decoded and
+    passed to ResponseHandler.dispatch_response directly.
+
+    Attributes:
+        _handle_frame: (Callable[[bytes], None]) The callable each frame is
+            passed to.
+    """
+    def __init__(self, target: Union[ResponseReceiver, ResponseHandler]):
+        assert target
+        if isinstance(target, ResponseReceiver):
+            # pylint: disable=W0212
+            self._handle_frame = target._handle_binary_omega_message
+            # pylint: enable=W0212
+        else:
+            self._handle_frame = (
+                lambda frame: target.dispatch_response(
+                    decode_response(frame)))
+
+    def replay(self,
+               frames: Iterable[Tuple[float, bytes]],
+               speed: float = None):
+        """
+        Replay frames in order.
+        :param frames: (Iterable[Tuple[float, bytes]]) (timestamp, frame)
+            pairs, e.g. from read_frame_journal.
+        :param speed: (float) None replays as fast as possible.  Otherwise
+            the recorded inter-arrival times are preserved, scaled by speed,
+            e.g. 1.0 is real time and 10.0 is ten times faster.
+        :return: (int) The number of frames replayed.
+        """
+        assert speed is None or speed > 0.
+        handle_frame = self._handle_frame
+        count = 0
+        if speed is None:
+            for _, frame in frames:
+                handle_frame(frame)
+                count += 1
+            return count
+
+        first_timestamp = None
+        replay_start = None
+        for timestamp, frame in frames:
+            if first_timestamp is None:
+                first_timestamp = timestamp
+                replay_start = time.perf_counter()
+            delay = (replay_start + (timestamp - first_timestamp) / speed -
+                     time.perf_counter())
+            if delay > 0.:
+                time.sleep(delay)
+            handle_frame(frame)
+            count += 1
+        return count
+
+    def replay_journal(self, path: str, speed: float = None):
+        """
+        Replay a journal file written by FrameJournalWriter.
+        :param path: (str) Path of the journal file.
+        :param speed: (float) See replay.
+        :return: (int) The number of frames replayed.
+        """
+        start = time.perf_counter()
+        count = self.replay(read_frame_journal(path), speed=speed)
+        elapsed = time.perf_counter() - start
+        logger.debug('Replayed frame journal.',
+                     extra={'path': path, 'frames': count,
+                            'elapsed_seconds': elapsed})
+        return count
@@ -72,65 +72,80 @@ class SingleClientOmegaConnection:
 
     def logon(self,
               client_secret: str,
-              credentials: List[AccountCredentials]):
+              credentials: List[AccountCredentials],
+              deadline: float = None):
         """
         Logon to Omega for a specific client_id and set of credentials.
         :param client_secret: (str) client_secret key assigned by Fund3.
         :param credentials: (List[AccountCredentials]) List of exchange
             credentials in the form of AccountCredentials.
+        :param deadline: (float) (optional) utc timestamp after which the
+            request is dropped instead of sent.
         :return: (capnp._DynamicStructBuilder) Logon capnp object.
         """
         return self._request_sender.logon(
             client_secret=client_secret,
-            credentials=credentials
+            credentials=credentials,
+            deadline=deadline
         )
 
-    def logoff(self):
+    def logoff(self, deadline: float = None):
         """
         Logoff Omega for a specific client_id.
+        :param deadline: (float) (optional) utc timestamp after which the
+            request is dropped instead of sent.
         :return: (capnp._DynamicStructBuilder) Logoff capnp object.
         """
-        return self._request_sender.logoff()
+        return self._request_sender.logoff(deadline=deadline)
 
-    def send_test_message(self, test_message: str):
+    def send_test_message(self, test_message: str, deadline: float = None):
         return self._request_sender.send_test_message(
-            test_message=test_message)
+            test_message=test_message, deadline=deadline)
 
-    def send_heartbeat(self):
+    def send_heartbeat(self, deadline: float = None):
         """
         Sends a heartbeat to Omega for maintaining and verifying connection.
         Only clients that are logged on will receive heartbeat back from
         Omega.
+        :param deadline: (float) (optional) utc timestamp after which the
+            request is dropped instead of sent.
         :return: (capnp._DynamicStructBuilder) heartbeat capnp object.
         """
-        return self._request_sender.send_heartbeat()
+        return self._request_sender.send_heartbeat(deadline=deadline)
 
-    def request_server_time(self):
+    def request_server_time(self, deadline: float = None):
         """
         Request Omega server time for syncing client and server timestamps.
+        :param deadline: (float) (optional) utc timestamp after which the
+            request is dropped instead of sent.
         :return: (capnp._DynamicStructBuilder) request_server_time capnp
         object.
         """
-        return self._request_sender.request_server_time()
+        return self._request_sender.request_server_time(deadline=deadline)
 
-    def place_order(self, order: Order):
+    def place_order(self, order: Order, deadline: float = None):
         """
         Sends a request to Omega to place an order.
         :param order: (Order) Python object containing all required fields.
+        :param deadline: (float) (optional) utc timestamp after which the
+            request is dropped instead of sent.
         :return: (capnp._DynamicStructBuilder) place_order capnp object.
         """
-        return self._request_sender.place_order(order=order)
+        return self._request_sender.place_order(order=order, deadline=deadline)
 
     def place_contingent_order(self,
-                               contingent_order: Union[Batch, OPO, OCO]):
+                               contingent_order: Union[Batch, OPO, OCO],
+                               deadline: float = None):
         """
         Sends a request to Omega to place a contingent order.
         :param contingent_order: (Batch, OPO, or OCO) python object
+        :param deadline: (float) (optional) utc timestamp after which the
+            request is dropped instead of sent.
         :return: (capnp._DynamicStructBuilder) placeContingentOrder capnp
         object.
         """
         return self._request_sender.place_contingent_order(
-            contingent_order=contingent_order)
+            contingent_order=contingent_order, deadline=deadline)
 
     def replace_order(self,
                       account_info: AccountInfo,
@@ -142,7 +157,8 @@ class SingleClientOmegaConnection:
                       stop_price: float = 0.0,
                       time_in_force: str = TimeInForce.gtc.name,
                       # pylint: enable=E1101
-                      expire_at: float = 0.0):
+                      expire_at: float = 0.0,
+                      deadline: float = None):
         """
         Sends a request to Omega to replace an order.
         :param account_info: (AccountInfo) Account on which to cancel order.
@@ -154,6 +170,8 @@ class SingleClientOmegaConnection:
         :param stop_price: (float) (optional)
         :param time_in_force: (TimeInForce) (optional)
         :param expire_at: (float) (optional)
+        :param deadline: (float) (optional) utc timestamp after which the
+            request is dropped instead of sent.
         :return: (capnp._DynamicStructBuilder) replaceOrder capnp object.
         """
         return self._request_sender.replace_order(
@@ -164,118 +182,148 @@ class SingleClientOmegaConnection:
             price=price,
             stop_price=stop_price,
             time_in_force=time_in_force,
-            expire_at=expire_at
+            expire_at=expire_at,
+            deadline=deadline
         )
 
     def cancel_order(self,
                      account_info: AccountInfo,
-                     order_id: str):
+                     order_id: str,
+                     deadline: float = None):
         """
         Sends a request to Omega to cancel an order.
         :param account_info: (AccountInfo) Account on which to cancel order.
         :param order_id: (str) order_id as returned from the
         ExecutionReport.
+        :param deadline: (float) (optional) utc timestamp after which the
+            request is dropped instead of sent.
         :return: (capnp._DynamicStructBuilder) cancel_order object.
         """
         return self._request_sender.cancel_order(
             account_info=account_info,
-            order_id=order_id
+            order_id=order_id,
+            deadline=deadline
         )
 
     def cancel_all_orders(self,
                           account_info: AccountInfo,
                           symbol: str = None,
-                          side: str = None):
+                          side: str = None,
+                          deadline: float = None):
         """
         Sends a request to Omega to cancel an order.
         :param account_info: (AccountInfo) Account on which to cancel order.
         :param symbol: (str) (optional)
         :param side: (str) (optional)
+        :param deadline: (float) (optional) utc timestamp after which the
+            request is dropped instead of sent.
         :return (capnp._DynamicStructBuilder) cancel_all_orders object.
         """
         return self._request_sender.cancel_all_orders(
             account_info=account_info,
             symbol=symbol,
-            side=side
+            side=side,
+            deadline=deadline
         )
 
     def request_account_data(self,
-                             account_info: AccountInfo):
+                             account_info: AccountInfo,
+                             deadline: float = None):
         """
         Sends a request to Omega for full account snapshot including
         balances,
         open positions, and working orders on specified account.
         :param account_info: (AccountInfo) Account from which to retrieve
         data.
+        :param deadline: (float) (optional) utc timestamp after which the
+            request is dropped instead of sent.
         :return: (capnp._DynamicStructBuilder) request_account_data capnp
             object.
         """
         return self._request_sender.request_account_data(
-            account_info=account_info
+            account_info=account_info,
+            deadline=deadline
         )
 
     def request_open_positions(self,
-                               account_info: AccountInfo):
+                               account_info: AccountInfo,
+                               deadline: float = None):
         """
         Sends a request to Omega for open positions on an Account.
         :param account_info: (AccountInfo) Account from which to retrieve
         data.
+        :param deadline: (float) (optional) utc timestamp after which the
+            request is dropped instead of sent.
         :return: (capnp._DynamicStructBuilder) request_open_positions capnp
             object.
         """
         return self._request_sender.request_open_positions(
-            account_info=account_info
+            account_info=account_info,
+            deadline=deadline
         )
 
     def request_account_balances(self,
-                                 account_info: AccountInfo):
+                                 account_info: AccountInfo,
+                                 deadline: float = None):
         """
         Sends a request to Omega for full account balances snapshot on an
         Account.
         :param account_info: (AccountInfo) Account from which to retrieve
         data.
+        :param deadline: (float) (optional) utc timestamp after which the
+            request is dropped instead of sent.
         :return: (capnp._DynamicStructBuilder) request_account_balances
         capnp
             object.
         """
         return self._request_sender.request_account_balances(
-            account_info=account_info
+            account_info=account_info,
+            deadline=deadline
         )
 
     def request_working_orders(self,
-                               account_info: AccountInfo):
+                               account_info: AccountInfo,
+                               deadline: float = None):
         """
         Sends a request to Omega for all working orders snapshot on an
         Account.
         :param account_info: (AccountInfo) Account from which to retrieve
         data.
+        :param deadline: (float) (optional) utc timestamp after which the
+            request is dropped instead of sent.
         :return: (capnp._DynamicStructBuilder) request_working_orders capnp
             object.
         """
         return self._request_sender.request_working_orders(
-            account_info=account_info
+            account_info=account_info,
+            deadline=deadline
         )
 
     def request_order_status(self,
                              account_info: AccountInfo,
-                             order_id: str):
+                             order_id: str,
+                             deadline: float = None):
         """
         Sends a request to Omega to request status of a specific order.
         :param account_info: (AccountInfo) Account from which to retrieve
         data.
         :param order_id: (str) The id of the order of interest.
+        :param deadline: (float) (optional) utc timestamp after which the
+            request is dropped instead of sent.
         :return: (capnp._DynamicStructBuilder) request_order_status capnp
             object.
         """
         return self._request_sender.request_order_status(
             account_info=account_info,
-            order_id=order_id
+            order_id=order_id,
+            deadline=deadline
         )
 
     def request_completed_orders(self,
                                  account_info: AccountInfo,
                                  count: int = None,
-                                 since: float = None):
+                                 since: float = None,
+                                 deadline: float = None):
         """
         Sends a request to Omega for all completed orders on specified
         account.  If both 'count' and 'from_unix' are None, returns orders
@@ -287,6 +335,8 @@ class SingleClientOmegaConnection:
         :param since: (float) optional, returns all orders from provided
         unix
             timestamp to present.
+        :param deadline: (float) (optional) utc timestamp after which the
+            request is dropped instead of sent.
         :return: (capnp._DynamicStructBuilder) request_completed_orders
         capnp
             object.
@@ -294,33 +344,42 @@ class SingleClientOmegaConnection:
         return self._request_sender.request_completed_orders(
             account_info=account_info,
             count=count,
-            since=since
+            since=since,
+            deadline=deadline
         )
 
     def request_exchange_properties(self,
-                                    exchange: str):
+                                    exchange: str,
+                                    deadline: float = None):
         """
         Sends a request to Omega for supported currencies, symbols and their
         associated properties, timeInForces, and orderTypes on an exchange.
         :param exchange: (str) The exchange of interest.
+        :param deadline: (float) (optional) utc timestamp after which the
+            request is dropped instead of sent.
         :return: (capnp._DynamicStructBuilder)
         request_exchange_properties capnp
             object.
         """
         return self._request_sender.request_exchange_properties(
-            exchange=exchange
+            exchange=exchange,
+            deadline=deadline
         )
 
     def request_authorization_refresh(self,
-                                      auth_refresh: AuthorizationRefresh):
+                                      auth_refresh: AuthorizationRefresh,
+                                      deadline: float = None):
         """
         Sends a request to Omega to refresh the session
         :param auth_refresh: AuthorizationRefresh python object
+        :param deadline: (float) (optional) utc timestamp after which the
+            request is dropped instead of sent.
         :return: (capnp._DynamicStructBuilder) authorization_refresh capnp
             object.
         """
         return self._request_sender.request_authorization_refresh(
-            auth_refresh=auth_refresh
+            auth_refresh=auth_refresh,
+            deadline=deadline
         )
 
 
@@ -70,35 +70,44 @@ class SingleClientRequestSender:
     """
     def logon(self,
               client_secret: str,
-              credentials: List[AccountCredentials]):
+              credentials: List[AccountCredentials],
+              deadline: float = None):
         return self._request_sender.logon(
             request_header=self._request_header,
             client_secret=client_secret,
-            credentials=credentials)
+            credentials=credentials,
+            deadline=deadline)
 
-    def logoff(self):
-        return self._request_sender.logoff(request_header=self._request_header)
+    def logoff(self, deadline: float = None):
+        return self._request_sender.logoff(
+            request_header=self._request_header, deadline=deadline)
 
-    def send_test_message(self, test_message: str):
+    def send_test_message(self, test_message: str, deadline: float = None):
         return self._request_sender.send_test_message(
-            request_header=self._request_header, test_message=test_message)
+            request_header=self._request_header, test_message=test_message,
+            deadline=deadline)
 
-    def send_heartbeat(self):
+    def send_heartbeat(self, deadline: float = None):
         return self._request_sender.send_heartbeat(
-            request_header=self._request_header)
+            request_header=self._request_header,
+            deadline=deadline)
 
-    def request_server_time(self):
+    def request_server_time(self, deadline: float = None):
         return self._request_sender.request_server_time(
-            request_header=self._request_header)
+            request_header=self._request_header,
+            deadline=deadline)
 
-    def place_order(self, order: Order):
+    def place_order(self, order: Order, deadline: float = None):
         return self._request_sender.place_order(
-            request_header=self._request_header, order=order)
+            request_header=self._request_header, order=order,
+            deadline=deadline)
 
-    def place_contingent_order(self, contingent_order: Union[Batch, OPO, OCO]):
+    def place_contingent_order(self, contingent_order: Union[Batch, OPO, OCO],
+                               deadline: float = None):
         return self._request_sender.place_contingent_order(
             request_header=self._request_header,
-            contingent_order=contingent_order
+            contingent_order=contingent_order,
+            deadline=deadline
         )
 
     def replace_order(self, account_info: AccountInfo,
@@ -108,7 +117,8 @@ class SingleClientRequestSender:
                       price: float = 0.0,
                       stop_price: float = 0.0,
                       time_in_force: str = TimeInForce.gtc.name,
-                      expire_at: float = 0.0):
+                      expire_at: float = 0.0,
+                      deadline: float = None):
         return self._request_sender.replace_order(
             request_header=self._request_header,
             account_info=account_info,
@@ -118,63 +128,84 @@ class SingleClientRequestSender:
             price=price,
             stop_price=stop_price,
             time_in_force=time_in_force,
-            expire_at=expire_at
+            expire_at=expire_at,
+            deadline=deadline
         )
 
     def cancel_order(self, account_info: AccountInfo,
-                     order_id: str):
+                     order_id: str,
+                     deadline: float = None):
         return self._request_sender.cancel_order(
             request_header=self._request_header,
             account_info=account_info,
-            order_id=order_id)
+            order_id=order_id,
+            deadline=deadline)
 
     def cancel_all_orders(self, account_info: AccountInfo,
                           symbol: str = None,
-                          side: str = None):
+                          side: str = None,
+                          deadline: float = None):
         return self._request_sender.cancel_all_orders(
             request_header=self._request_header,
             account_info=account_info,
             symbol=symbol,
-            side=side)
+            side=side,
+            deadline=deadline)
 
-    def request_account_data(self, account_info: AccountInfo):
+    def request_account_data(self, account_info: AccountInfo,
+                             deadline: float = None):
         return self._request_sender.request_account_data(
-            request_header=self._request_header, account_info=account_info)
+            request_header=self._request_header, account_info=account_info,
+            deadline=deadline)
 
-    def request_open_positions(self, account_info: AccountInfo):
+    def request_open_positions(self, account_info: AccountInfo,
+                               deadline: float = None):
         return self._request_sender.request_open_positions(
-            request_header=self._request_header, account_info=account_info)
+            request_header=self._request_header, account_info=account_info,
+            deadline=deadline)
 
-    def request_account_balances(self, account_info: AccountInfo):
+    def request_account_balances(self, account_info: AccountInfo,
+                                 deadline: float = None):
         return self._request_sender.request_account_balances(
-            request_header=self._request_header, account_info=account_info)
+            request_header=self._request_header, account_info=account_info,
+            deadline=deadline)
 
-    def request_working_orders(self, account_info: AccountInfo):
+    def request_working_orders(self, account_info: AccountInfo,
+                               deadline: float = None):
         return self._request_sender.request_working_orders(
-            request_header=self._request_header, account_info=account_info)
+            request_header=self._request_header, account_info=account_info,
+            deadline=deadline)
 
     def request_order_status(self, account_info: AccountInfo,
-                             order_id: str):
+                             order_id: str,
+                             deadline: float = None):
         return self._request_sender.request_order_status(
             request_header=self._request_header,
             account_info=account_info,
-            order_id=order_id)
+            order_id=order_id,
+            deadline=deadline)
 
     def request_completed_orders(self, account_info: AccountInfo,
                                  count: int = None,
-                                 since: float = None):
+                                 since: float = None,
+                                 deadline: float = None):
         return self._request_sender.request_completed_orders(
             request_header=self._request_header,
             account_info=account_info,
             count=count,
-            since=since)
+            since=since,
+            deadline=deadline)
 
-    def request_exchange_properties(self, exchange: str):
+    def request_exchange_properties(self, exchange: str,
+                                    deadline: float = None):
         return self._request_sender.request_exchange_properties(
-            request_header=self._request_header, exchange=exchange)
+            request_header=self._request_header, exchange=exchange,
+            deadline=deadline)
 
     def request_authorization_refresh(self,
-                                      auth_refresh: AuthorizationRefresh):
+                                      auth_refresh: AuthorizationRefresh,
+                                      deadline: float = None):
         return self._request_sender.request_authorization_refresh(
-            request_header=self._request_header, auth_refresh=auth_refresh
+            request_header=self._request_header, auth_refresh=auth_refresh,
+            deadline=deadline
         )
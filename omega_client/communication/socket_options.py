@@ -0,0 +1,47 @@
+"""
+zmq socket options shared by OmegaConnection, RequestSender and
+ResponseReceiver.
+"""
+import zmq
+
+
+class SocketOptions:
+    """
+    High-water marks and kernel buffer sizes applied to a socket before it
+    is bound or connected.  Options left as None keep the zmq defaults
+    (1000 messages for the high-water marks, OS defaults for the buffers).
+
+    When the send high-water mark of a DEALER socket is reached, send blocks
+    instead of queueing more messages in memory, which turns a stalled Omega
+    link into backpressure on the sender thread and its outgoing queue.
+
+    Attributes:
+        SNDHWM: (int) Maximum number of outgoing messages queued per peer.
+        RCVHWM: (int) Maximum number of incoming messages queued per peer.
+        SNDBUF: (int) Kernel TCP send buffer size in bytes.
+        RCVBUF: (int) Kernel TCP receive buffer size in bytes.
+    """
+    def __init__(self,
+                 sndhwm: int = None,
+                 rcvhwm: int = None,
+                 sndbuf: int = None,
+                 rcvbuf: int = None):
+        self.SNDHWM = sndhwm
+        self.RCVHWM = rcvhwm
+        self.SNDBUF = sndbuf
+        self.RCVBUF = rcvbuf
+
+    def apply(self, socket: zmq.Socket):
+        """
+        Set the configured options on socket.
+        :param socket: (zmq.Socket) A socket that is not bound or connected
+            yet.
+        """
+        # pylint: disable=E1101
+        for option, value in ((zmq.SNDHWM, self.SNDHWM),
+                              (zmq.RCVHWM, self.RCVHWM),
+                              (zmq.SNDBUF, self.SNDBUF),
+                              (zmq.RCVBUF, self.RCVBUF)):
+            # pylint: enable=E1101
+            if value is not None:
+                socket.setsockopt(option, value)
@@ -0,0 +1,106 @@
+"""
+Wait strategies for the OmegaConnection, RequestSender and ResponseReceiver
+loops, and CPU affinity pinning for their threads.
+
+The default BlockingWaitStrategy blocks in zmq poll or Queue.get with the
+configured timeout, so wake-up latency depends on the OS scheduler.  The
+busy-poll strategies never block; they trade CPU for lower and more
+predictable wake-up latency and are meant for dedicated trading hosts.
+Note that a spinning thread competes for the GIL with every other Python
+thread in the process.
+"""
+import logging
+import os
+import time
+from typing import Iterable
+
+logger = logging.getLogger(__name__)
+
+
+class WaitStrategy:
+    """
+    Base wait strategy.  Loops block for their polling timeout and idle
+    does nothing.
+
+    Attributes:
+        IS_BLOCKING: (bool) True if loops should block while waiting.
+    """
+    IS_BLOCKING = True
+
+    def poll_timeout_milli(self, polling_timeout_milli: int):
+        """
+        :param polling_timeout_milli: (int) The loop's configured timeout.
+        :return: (int) The timeout to poll with.
+        """
+        return polling_timeout_milli
+
+    def idle(self, idle_count: int):
+        """
+        Called after a poll that returned no work.
+        :param idle_count: (int) Number of consecutive polls without work,
+            starting at 1.
+        """
+
+
+class BlockingWaitStrategy(WaitStrategy):
+    """
+    Block in poll or Queue.get for the loop's polling timeout.  The default.
+    """
+
+
+class BusySpinWaitStrategy(WaitStrategy):
+    """
+    Pure spin: poll without timeout and never give up the CPU.
+    """
+    IS_BLOCKING = False
+
+    def poll_timeout_milli(self, polling_timeout_milli: int):
+        return 0
+
+
+class SpinYieldWaitStrategy(BusySpinWaitStrategy):
+    """
+    Spin for spin_count empty polls, then yield the CPU to other runnable
+    threads on every further empty poll.
+    """
+    def __init__(self, spin_count: int = 1000):
+        self._SPIN_COUNT = spin_count
+
+    def idle(self, idle_count: int):
+        if idle_count > self._SPIN_COUNT:
+            _yield_cpu()
+
+
+class SpinSleepWaitStrategy(BusySpinWaitStrategy):
+    """
+    Spin for spin_count empty polls, then sleep for sleep_seconds on every
+    further empty poll.
+    """
+    def __init__(self, spin_count: int = 1000, sleep_seconds: float = 50e-6):
+        self._SPIN_COUNT = spin_count
+        self._SLEEP_SECONDS = sleep_seconds
+
+    def idle(self, idle_count: int):
+        if idle_count > self._SPIN_COUNT:
+            time.sleep(self._SLEEP_SECONDS)
+
+
+def _yield_cpu():
+    if hasattr(os, 'sched_yield'):
+        os.sched_yield()
+    else:
+        time.sleep(0)
+
+
+def set_thread_cpu_affinity(cpus: Iterable[int]):
+    """
+    Pin the calling thread to a set of CPUs.  Only supported on platforms
+    that provide os.sched_setaffinity, e.g. Linux; elsewhere a warning is
+    logged and the thread is left unpinned.
+    :param cpus: (Iterable[int]) CPU ids the thread may run on.
+    """
+    if not hasattr(os, 'sched_setaffinity'):
+        logger.warning('CPU affinity is not supported on this platform.')
+        return
+    # pid 0 refers to the calling thread.
+    os.sched_setaffinity(0, set(cpus))
@@ -0,0 +1,107 @@
+"""
+Compare the per-response dispatch overhead of the string-keyed unpacker
+lookup with the fused, discriminant-indexed dispatch table of
+ResponseHandler.  Responses are decoded once up front, so only dispatch,
+including the unpacking of fields into common_types, is timed.
+executionReport is the bulk of the traffic of a trading session; heartbeat
+and serverTime show the fixed overhead per response.
+"""
+import timeit
+
+# pylint: disable=W0611
+import capnp
+# pylint: enable=W0611
+
+# pylint: disable=E0611
+# pylint: disable=E0401
+import omega_protocol.TradeMessage_capnp as msgs_capnp
+# pylint: enable=E0401
+# pylint: enable=E0611
+from omega_client.messaging.response_handler import ResponseHandler
+from omega_client.messaging.response_unpacker import unpack_response
+
+# Dispatches per timing of each response type.
+NUMBERS = {
+    'heartbeat': 200000,
+    'serverTime': 200000,
+    'executionReport': 20000
+}
+
+
+class CountingResponseHandler(ResponseHandler):
+    def __init__(self):
+        self.count = 0
+        super().__init__()
+
+    def on_heartbeat(self, client_id, sender_comp_id, request_id):
+        self.count += 1
+
+    def on_server_time(self, server_time, client_id, sender_comp_id,
+                       request_id):
+        self.count += 1
+
+    def on_exec_report(self, report, client_id, sender_comp_id, request_id):
+        self.count += 1
+
+
+def make_response(response_type):
+    omega_mess = msgs_capnp.TradeMessage.new_message()
+    response = omega_mess.init('type').init('response')
+    response.clientID = 123
+    response.senderCompID = '987'
+    response.requestID = 100001
+    if response_type == 'heartbeat':
+        response.body.heartbeat = None
+    elif response_type == 'serverTime':
+        response.body.serverTime = 1551761395.
+    else:
+        er = response.body.init('executionReport')
+        er.orderID = 'c137'
+        er.clientOrderID = '123456789000000'
+        er.exchangeOrderID = 'e137'
+        er.accountInfo.accountID = 100
+        er.symbol = 'BTC/USD'
+        er.side = 'buy'
+        er.orderType = 'limit'
+        er.quantity = 1.1
+        er.price = 6500.
+        er.timeInForce = 'gtc'
+        er.orderStatus = 'partiallyFilled'
+        er.filledQuantity = 0.5
+        er.avgFillPrice = 6500.
+        er.fee = 1.5
+        er.creationTime = 1551761395.
+        er.submissionTime = 1551761395.
+        er.rejectionReason.body = '<NONE>'
+        er.executionType = 'orderFilled'
+    return omega_mess.as_reader().type.response
+
+
+def main():
+    handler = CountingResponseHandler()
+    # pylint: disable=W0212
+    command_dispatcher = handler._command_dispatcher
+    # pylint: enable=W0212
+
+    def string_keyed(response):
+        response_type = response.body.which()
+        command_dispatcher[response_type](
+            *unpack_response(response_type, response))
+
+    def by_name(response):
+        handler.handle_response(response.body.which(), response)
+
+    for response_type, number in NUMBERS.items():
+        response = make_response(response_type)
+        for name, dispatch in (('string-keyed', string_keyed),
+                               ('handle_response', by_name),
+                               ('dispatch_response',
+                                handler.dispatch_response)):
+            seconds = min(timeit.repeat(lambda: dispatch(response),
+                                        number=number, repeat=5))
+            print('{:<16} {:<18} {:8.3f} us/response'.format(
+                response_type, name, seconds / number * 1e6))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,160 @@
+"""
+Minimal reader of the capnp wire format (unpacked, any number of segments)
+over bytes or any buffer, used where pycapnp's dynamic readers are too slow:
+the response header peek and the generated decoders.
+
+A struct is referenced by a StructRef tuple (segment, data, data_size,
+pointers, pointer_count): its segment, the byte offset and byte size of its
+data section, and the word index and count of its pointer section.  Fields
+outside the sections, e.g. of structs written with an older schema, read as
+their defaults.
+"""
+import struct
+
+_UINT32 = struct.Struct('<I')
+_WORD = struct.Struct('<Q')
+_TWO_WORDS = struct.Struct('<QQ')
+
+# List element size codes.
+_BYTE_ELEMENTS = 2
+_POINTER_ELEMENTS = 6
+_COMPOSITE_ELEMENTS = 7
+
+# Byte size of the list element size codes 2 to 5.
+_ELEMENT_BYTES = {2: 1, 3: 2, 4: 4, 5: 8}
+
+# StructRef of a null struct pointer: every field reads as its default.
+EMPTY_STRUCT = (0, 0, 0, 0, 0)
+
+
+def segment_starts(buf):
+    """
+    :param buf: (bytes) A serialized capnp message.
+    :return: (List[int]) Byte offset of each segment of the message.
+    """
+    segment_count = _UINT32.unpack_from(buf, 0)[0] + 1
+    sizes = struct.unpack_from('<%dI' % segment_count, buf, 4)
+    start = (4 + 4 * segment_count + 7) & ~7
+    starts = []
+    for size in sizes:
+        starts.append(start)
+        start += 8 * size
+    if start > len(buf):
+        raise ValueError('Truncated message.')
+    return starts
+
+
+def follow_pointer(buf, starts, segment, index):
+    """
+    Resolve the pointer at word index of segment, following far pointers.
+    :return: (int, int, int) segment and word index of the target, and the
+        pointer word carrying its size; the pointer word is 0 for a null
+        pointer.
+    """
+    word = _WORD.unpack_from(buf, starts[segment] + 8 * index)[0]
+    if not word:
+        return segment, index, 0
+    if word & 3 == 2:
+        landing_pad = (word >> 3) & 0x1fffffff
+        segment = word >> 32
+        if not word & 4:
+            pad = _WORD.unpack_from(buf, starts[segment] + 8 * landing_pad)[0]
+            if pad & 3 == 2:
+                raise ValueError('Far pointer landing pad is a far pointer.')
+            return follow_pointer(buf, starts, segment, landing_pad)
+        far, tag = _TWO_WORDS.unpack_from(
+            buf, starts[segment] + 8 * landing_pad)
+        return far >> 32, (far >> 3) & 0x1fffffff, tag
+    offset = (word & 0xffffffff) >> 2
+    if offset & 0x20000000:
+        offset -= 0x40000000
+    return segment, index + 1 + offset, word
+
+
+def read_struct(buf, starts, segment, index):
+    """
+    :return: (Tuple[int, int, int, int, int]) StructRef of the struct
+        pointed to by the pointer at word index of segment, None for a null
+        pointer.
+    """
+    segment, index, tag = follow_pointer(buf, starts, segment, index)
+    if not tag:
+        return None
+    if tag & 3:
+        raise ValueError('Not a struct pointer.')
+    data_words = (tag >> 32) & 0xffff
+    return (segment, starts[segment] + 8 * index, 8 * data_words,
+            index + data_words, tag >> 48)
+
+
+def _read_list(buf, starts, segment, index, element_size):
+    segment, index, tag = follow_pointer(buf, starts, segment, index)
+    if not tag:
+        return segment, index, 0
+    if tag & 3 != 1 or (tag >> 32) & 7 != element_size:
+        raise ValueError('Unexpected list pointer.')
+    return segment, index, tag >> 35
+
+
+def read_text(buf, starts, segment, index):
+    """
+    :return: (str) The Text pointed to by the pointer at word index of
+        segment, '' for a null pointer.
+    """
+    segment, index, count = _read_list(buf, starts, segment, index,
+                                       _BYTE_ELEMENTS)
+    if not count:
+        return ''
+    start = starts[segment] + 8 * index
+    # The element count includes the NUL terminator.
+    return bytes(buf[start:start + count - 1]).decode('utf-8')
+
+
+def read_text_list(buf, starts, segment, index):
+    """
+    :return: (List[str]) The List(Text) pointed to by the pointer at word
+        index of segment.
+    """
+    segment, index, count = _read_list(buf, starts, segment, index,
+                                       _POINTER_ELEMENTS)
+    return [read_text(buf, starts, segment, index + i) for i in range(count)]
+
+
+def read_struct_list(buf, starts, segment, index):
+    """
+    :return: (List[Tuple[int, int, int, int, int]]) StructRefs of the
+        elements of the List(struct) pointed to by the pointer at word index
+        of segment.
+    """
+    segment, index, words = _read_list(buf, starts, segment, index,
+                                       _COMPOSITE_ELEMENTS)
+    if not words:
+        return []
+    tag = _WORD.unpack_from(buf, starts[segment] + 8 * index)[0]
+    count = (tag & 0xffffffff) >> 2
+    data_words = (tag >> 32) & 0xffff
+    pointer_count = tag >> 48
+    stride = data_words + pointer_count
+    start = starts[segment]
+    first = index + 1
+    return [(segment, start + 8 * (first + i * stride), 8 * data_words,
+             first + i * stride + data_words, pointer_count)
+            for i in range(count)]
+
+
+def read_primitive_list(buf, starts, segment, index, fmt: struct.Struct):
+    """
+    :param fmt: (struct.Struct) Little-endian format of one element, e.g.
+        '<d' for List(Float64) or '<H' for a List of an enum.
+    :return: (list) The elements of the list pointed to by the pointer at
+        word index of segment.
+    """
+    segment, index, tag = follow_pointer(buf, starts, segment, index)
+    if not tag:
+        return []
+    if tag & 3 != 1 or _ELEMENT_BYTES.get((tag >> 32) & 7) != fmt.size:
+        raise ValueError('Unexpected list pointer.')
+    count = tag >> 35
+    start = starts[segment] + 8 * index
+    return [value for value, in fmt.iter_unpack(
+        bytes(buf[start:start + count * fmt.size]))]
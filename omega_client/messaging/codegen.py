@@ -0,0 +1,513 @@
+"""
+Generate specialized response decoders from the omega_protocol capnp schema.
+
+The generated module decodes a serialized TradeMessage response straight from
+the wire format with capnp_wire: field offsets, defaults and enum tables are
+resolved from the schema when the code is generated, so decoding a field is
+a single struct.unpack_from instead of pycapnp's dynamic attribute lookup.
+The decoders build the same common_types objects as the *_py functions in
+message_factory.
+
+Run at build time, after omega_protocol is installed:
+    python -m omega_client.messaging.codegen [output_path]
+load_generated_decoders falls back to generating the module in memory when
+the build step did not run, or when the module was generated from another
+schema, e.g. before omega_protocol was updated.
+
+ResponseHandler and ResponseReceiver still decode responses with pycapnp;
+unpack_frame is an entry point for callers decoding raw frames themselves.
+"""
+import hashlib
+import logging
+import os
+import struct
+import sys
+import types
+
+# pylint: disable=W0611
+import capnp
+# pylint: enable=W0611
+
+# pylint: disable=E0611
+# pylint: disable=E0401
+import omega_protocol.TradeMessage_capnp as msgs_capnp
+# pylint: enable=E0611
+# pylint: enable=E0401
+
+logger = logging.getLogger(__name__)
+
+GENERATED_MODULE = 'omega_client.messaging.generated_decoders'
+DEFAULT_OUTPUT_PATH = os.path.join(os.path.dirname(__file__),
+                                   'generated_decoders.py')
+
+# Decoder specs: the common_types class each decoder builds, None to return
+# the only field as is, and (keyword, capnp field, nested spec, dict key)
+# tuples for its fields.  nested spec names the spec of struct and
+# List(struct) fields; dict key turns a List(struct) into a dict keyed by
+# that attribute of its elements.
+DECODER_SPECS = {
+    'Message': ('Message', (
+        ('code', 'code'),
+        ('body', 'body'))),
+    'AccountInfo': ('AccountInfo', (
+        ('account_id', 'accountID'),
+        ('exchange_account_id', 'exchangeAccountID'),
+        ('account_type', 'accountType'),
+        ('exchange_client_id', 'exchangeClientID'))),
+    'Balance': ('Balance', (
+        ('currency', 'currency'),
+        ('full_balance', 'fullBalance'),
+        ('available_balance', 'availableBalance'))),
+    'OpenPosition': ('OpenPosition', (
+        ('symbol', 'symbol'),
+        ('side', 'side'),
+        ('quantity', 'quantity'),
+        ('initial_price', 'initialPrice'),
+        ('unrealized_pl', 'unrealizedPL'))),
+    'ExecutionReport': ('ExecutionReport', (
+        ('order_id', 'orderID'),
+        ('client_order_id', 'clientOrderID'),
+        ('exchange_order_id', 'exchangeOrderID'),
+        ('client_order_link_id', 'clientOrderLinkID'),
+        ('account_info', 'accountInfo', 'AccountInfo'),
+        ('order_class', 'orderClass'),
+        ('contingent_type', 'contingentType'),
+        ('parent_order_id', 'parentOrderID'),
+        ('sub_order_ids', 'subOrderIDs'),
+        ('linked_order_ids', 'linkedOrderIDs'),
+        ('symbol', 'symbol'),
+        ('side', 'side'),
+        ('order_type', 'orderType'),
+        ('quantity', 'quantity'),
+        ('price', 'price'),
+        ('stop_price', 'stopPrice'),
+        ('time_in_force', 'timeInForce'),
+        ('expire_at', 'expireAt'),
+        ('leverage_type', 'leverageType'),
+        ('leverage', 'leverage'),
+        ('order_status', 'orderStatus'),
+        ('filled_quantity', 'filledQuantity'),
+        ('avg_fill_price', 'avgFillPrice'),
+        ('fee', 'fee'),
+        ('creation_time', 'creationTime'),
+        ('submission_time', 'submissionTime'),
+        ('completion_time', 'completionTime'),
+        ('execution_report_type', 'executionType'),
+        ('rejection_reason', 'rejectionReason', 'Message'))),
+    'TestMessage': (None, (
+        ('string', 'string'),)),
+    'SystemMessage': ('SystemMessage', (
+        ('account_info', 'accountInfo', 'AccountInfo'),
+        ('message', 'message', 'Message'))),
+    'AuthorizationGrant': ('AuthorizationGrant', (
+        ('success', 'success'),
+        ('message', 'message', 'Message'),
+        ('access_token', 'accessToken'),
+        ('refresh_token', 'refreshToken'),
+        ('expire_at', 'expireAt'))),
+    'LogonAck': ('LogonAck', (
+        ('success', 'success'),
+        ('message', 'message', 'Message'),
+        ('client_accounts', 'clientAccounts', 'AccountInfo'),
+        ('authorization_grant', 'authorizationGrant',
+         'AuthorizationGrant'))),
+    'LogoffAck': ('LogoffAck', (
+        ('success', 'success'),
+        ('message', 'message', 'Message'))),
+    'AccountDataReport': ('AccountDataReport', (
+        ('account_info', 'accountInfo', 'AccountInfo'),
+        ('balances', 'balances', 'Balance'),
+        ('open_positions', 'openPositions', 'OpenPosition'),
+        ('orders', 'orders', 'ExecutionReport'))),
+    'AccountBalancesReport': ('AccountBalancesReport', (
+        ('account_info', 'accountInfo', 'AccountInfo'),
+        ('balances', 'balances', 'Balance'))),
+    'OpenPositionsReport': ('OpenPositionsReport', (
+        ('account_info', 'accountInfo', 'AccountInfo'),
+        ('open_positions', 'openPositions', 'OpenPosition'))),
+    'WorkingOrdersReport': ('WorkingOrdersReport', (
+        ('account_info', 'accountInfo', 'AccountInfo'),
+        ('orders', 'orders', 'ExecutionReport'))),
+    'CompletedOrdersReport': ('CompletedOrdersReport', (
+        ('account_info', 'accountInfo', 'AccountInfo'),
+        ('orders', 'orders', 'ExecutionReport'))),
+    'SymbolProperties': ('SymbolProperties', (
+        ('symbol', 'symbol'),
+        ('price_precision', 'pricePrecision'),
+        ('quantity_precision', 'quantityPrecision'),
+        ('min_quantity', 'minQuantity'),
+        ('max_quantity', 'maxQuantity'),
+        ('margin_supported', 'marginSupported'),
+        ('leverage', 'leverage'))),
+    'ExchangePropertiesReport': ('ExchangePropertiesReport', (
+        ('exchange', 'exchange'),
+        ('currencies', 'currencies'),
+        ('symbol_properties', 'symbolProperties', 'SymbolProperties',
+         'symbol'),
+        ('time_in_forces', 'timeInForces'),
+        ('order_types', 'orderTypes')))
+}
+
+# Decoder spec of the body of each response type; heartbeat has no body and
+# serverTime is a Float64.
+RESPONSE_DECODER_SPECS = {
+    'heartbeat': None,
+    'test': 'TestMessage',
+    'serverTime': None,
+    'system': 'SystemMessage',
+    'logonAck': 'LogonAck',
+    'logoffAck': 'LogoffAck',
+    'executionReport': 'ExecutionReport',
+    'accountDataReport': 'AccountDataReport',
+    'workingOrdersReport': 'WorkingOrdersReport',
+    'accountBalancesReport': 'AccountBalancesReport',
+    'openPositionsReport': 'OpenPositionsReport',
+    'completedOrdersReport': 'CompletedOrdersReport',
+    'exchangePropertiesReport': 'ExchangePropertiesReport',
+    'authorizationGrant': 'AuthorizationGrant'
+}
+
+_PRIMITIVE_FORMATS = {
+    'int8': 'b', 'int16': 'h', 'int32': 'i', 'int64': 'q',
+    'uint8': 'B', 'uint16': 'H', 'uint32': 'I', 'uint64': 'Q',
+    'float32': 'f', 'float64': 'd', 'enum': 'H'
+}
+_FLOAT_BITS_FORMATS = {'float32': 'I', 'float64': 'Q'}
+
+
+def _camel_to_snake(name: str):
+    snake = ''
+    for i, char in enumerate(name):
+        if char.isupper() and i and not name[i - 1].isupper():
+            snake += '_'
+        snake += char.lower()
+    return snake
+
+
+class _DecoderGenerator:
+    """
+    Emits one decoder function per spec and the unpack_frame entry point.
+    """
+    def __init__(self, trade_message_schema):
+        self._TRADE_MESSAGE_SCHEMA = trade_message_schema
+        self._formats = set()
+        self._enum_tables = dict()  # type: Dict[str, Tuple[str, ...]]
+        self._functions = dict()  # type: Dict[str, str]
+        self._classes = set()
+
+    def _format(self, code: str):
+        self._formats.add(code)
+        return '_' + code
+
+    def _enum_table(self, enum_schema):
+        name = '_ENUM_' + _camel_to_snake(
+            enum_schema.node.displayName.split(':')[-1].replace('.', '_')
+        ).upper()
+        enumerants = enum_schema.enumerants
+        table = [None] * len(enumerants)
+        for enumerant, value in enumerants.items():
+            table[value] = enumerant
+        assert self._enum_tables.get(name, tuple(table)) == tuple(table)
+        self._enum_tables[name] = tuple(table)
+        return name
+
+    def _primitive(self, type_name: str, slot):
+        """
+        :return: (str) Expression of a data section field of the StructRef
+            unpacked into segment, data, data_size, pointers, pointer_count.
+        """
+        if type_name == 'void':
+            return 'None'
+        default = getattr(slot.defaultValue, type_name)
+        if type_name == 'bool':
+            byte, bit = divmod(slot.offset, 8)
+            expression = 'buf[data + {}] >> {} & 1 == {}'.format(
+                byte, bit, 0 if default else 1)
+            return '({} if data_size > {} else {!r})'.format(
+                expression, byte, bool(default))
+        code = _PRIMITIVE_FORMATS[type_name]
+        size = struct.calcsize(code)
+        offset = size * slot.offset
+        if type_name in _FLOAT_BITS_FORMATS and default:
+            bits_code = _FLOAT_BITS_FORMATS[type_name]
+            default_bits = struct.unpack(
+                '<' + bits_code, struct.pack('<' + code, default))[0]
+            expression = '{}.unpack({}.pack({}.unpack_from(buf, data + {})' \
+                '[0] ^ {}))[0]'.format(
+                    self._format(code), self._format(bits_code),
+                    self._format(bits_code), offset, default_bits)
+        else:
+            expression = '{}.unpack_from(buf, data + {})[0]'.format(
+                self._format(code), offset)
+            if default:
+                expression += ' ^ {!r}'.format(default)
+        return '({} if data_size >= {} else {!r})'.format(
+            expression, offset + size, default)
+
+    def _pointer(self, expression: str, slot, default: str):
+        return '({} if pointer_count > {} else {})'.format(
+            expression.format(index='pointers + {}'.format(slot.offset)),
+            slot.offset, default)
+
+    def _field(self, field, nested_spec: str = None, dict_key: str = None):
+        """
+        :return: (str) Expression of field for the decoder function body.
+        """
+        slot = field.proto.slot
+        type_name = slot.type.which()
+        if type_name == 'enum':
+            return '_enum({}, {})'.format(
+                self._enum_table(field.schema),
+                self._primitive('uint16', _EnumSlot(slot)))
+        if type_name in _PRIMITIVE_FORMATS or type_name in ('void', 'bool'):
+            return self._primitive(type_name, slot)
+        if type_name == 'text':
+            return self._pointer(
+                'read_text(buf, starts, segment, {index})', slot, "''")
+        if type_name == 'struct':
+            decoder = self._decoder(nested_spec, field.schema)
+            return '{}(buf, starts, {})'.format(decoder, self._pointer(
+                'read_struct(buf, starts, segment, {index})', slot, 'None'))
+        if type_name == 'list':
+            return self._list(field, slot, nested_spec, dict_key)
+        raise NotImplementedError('Unsupported field type: ' + type_name)
+
+    def _list(self, field, slot, nested_spec: str, dict_key: str):
+        element_type = slot.type.list.elementType.which()
+        if element_type == 'text':
+            return self._pointer(
+                'read_text_list(buf, starts, segment, {index})', slot, '[]')
+        if element_type == 'struct':
+            decoder = self._decoder(nested_spec, field.schema.elementType)
+            refs = self._pointer(
+                'read_struct_list(buf, starts, segment, {index})', slot, '[]')
+            if dict_key:
+                return ('{{element.{}: element for element in ({}('
+                        'buf, starts, ref) for ref in {})}}'.format(
+                            dict_key, decoder, refs))
+            return '[{}(buf, starts, ref) for ref in {}]'.format(decoder, refs)
+        if element_type in _PRIMITIVE_FORMATS:
+            values = self._pointer(
+                'read_primitive_list(buf, starts, segment, {{index}}, {})'
+                .format(self._format(_PRIMITIVE_FORMATS[element_type])),
+                slot, '[]')
+            if element_type == 'enum':
+                return '[_enum({}, value) for value in {}]'.format(
+                    self._enum_table(field.schema.elementType), values)
+            return values
+        raise NotImplementedError('Unsupported list type: ' + element_type)
+
+    def _decoder(self, spec_name: str, struct_schema):
+        """
+        Generate the decoder of spec_name once.
+        :return: (str) Name of the decoder function.
+        """
+        function_name = '_decode_' + _camel_to_snake(spec_name)
+        if spec_name in self._functions:
+            return function_name
+        self._functions[spec_name] = None
+        class_name, fields = DECODER_SPECS[spec_name]
+        arguments = []
+        for keyword, capnp_field, *nested in fields:
+            arguments.append((keyword, self._field(
+                struct_schema.fields[capnp_field], *nested)))
+        lines = [
+            'def {}(buf, starts, ref):'.format(function_name),
+            '    segment, data, data_size, pointers, pointer_count = '
+            '(ref or EMPTY_STRUCT)'
+        ]
+        if class_name is None:
+            lines.append('    return ' + arguments[0][1])
+        else:
+            self._classes.add(class_name)
+            lines.append('    return {}('.format(class_name))
+            lines.extend('        {}={},'.format(keyword, expression)
+                         for keyword, expression in arguments)
+            lines[-1] = lines[-1][:-1] + ')'
+        self._functions[spec_name] = '\n'.join(lines)
+        return function_name
+
+    def _unpack_frame(self):
+        type_schema = self._TRADE_MESSAGE_SCHEMA.fields['type'].schema
+        response_field = type_schema.fields['response']
+        response_schema = response_field.schema
+        body_schema = response_schema.fields['body'].schema
+        fields = response_schema.fields
+        header = ', '.join((
+            self._field(fields['clientID']),
+            self._field(fields['senderCompID']),
+            self._field(fields['requestID'])))
+        lines = [
+            'def unpack_frame(buf):',
+            '    starts = segment_starts(buf)',
+            '    segment, data, data_size, pointers, pointer_count = '
+            '(read_struct(buf, starts, 0, 0) or EMPTY_STRUCT)',
+            '    if ({} != {} or pointer_count <= {}):'.format(
+                self._primitive('uint16', _DiscriminantSlot(
+                    type_schema.node.struct.discriminantOffset)),
+                response_field.proto.discriminantValue,
+                response_field.proto.slot.offset),
+            '        return None, None',
+            '    segment, data, data_size, pointers, pointer_count = '
+            '(read_struct(buf, starts, segment, pointers + {}) or '
+            'EMPTY_STRUCT)'.format(response_field.proto.slot.offset),
+            '    header = ({},)'.format(header),
+            '    which = {}'.format(self._primitive(
+                'uint16', _DiscriminantSlot(
+                    body_schema.node.struct.discriminantOffset)))
+        ]
+        for field in body_schema.node.struct.fields:
+            if field.name not in RESPONSE_DECODER_SPECS:
+                continue
+            body_field = body_schema.fields[field.name]
+            lines.append('    if which == {}:'.format(
+                field.discriminantValue))
+            if field.name == 'heartbeat':
+                lines.append("        return 'heartbeat', header")
+                continue
+            lines.append("        return {!r}, ({},) + header".format(
+                field.name, self._field(
+                    body_field, RESPONSE_DECODER_SPECS[field.name])))
+        lines.append('    return None, None')
+        return '\n'.join(lines)
+
+    def generate(self):
+        """
+        :return: (str) Source of the generated decoder module.
+        """
+        unpack_frame = self._unpack_frame()
+        sections = [
+            '"""\nGenerated by omega_client.messaging.codegen from the '
+            'omega_protocol\nschema.  Do not edit.\n"""\n'
+            'import struct\n\n'
+            'from omega_client.messaging.capnp_wire import EMPTY_STRUCT, \\\n'
+            '    read_primitive_list, read_struct, read_struct_list, '
+            'read_text, \\\n    read_text_list, segment_starts\n'
+            'from omega_client.messaging.common_types import ' +
+            ', '.join(sorted(self._classes)),
+            'SCHEMA_ID = {:#x}\nSCHEMA_HASH = {!r}'.format(
+                self._TRADE_MESSAGE_SCHEMA.node.id,
+                schema_hash(self._TRADE_MESSAGE_SCHEMA)),
+            '\n'.join("_{0} = struct.Struct('<{0}')".format(code)
+                      for code in sorted(self._formats)),
+            '\n'.join('{} = {!r}'.format(name, table) for name, table in
+                      sorted(self._enum_tables.items())),
+            'def _enum(table, value):\n'
+            '    return table[value] if value < len(table) else str(value)'
+        ]
+        sections.extend(self._functions[spec_name]
+                        for spec_name in sorted(self._functions))
+        sections.append(unpack_frame)
+        return '\n\n\n'.join(section for section in sections if section) + \
+            '\n'
+
+
+class _EnumSlot:
+    """
+    Slot of an enum field read as its uint16 enumerant index.
+    """
+    def __init__(self, slot):
+        self.offset = slot.offset
+        self.defaultValue = _Default(uint16=slot.defaultValue.enum)
+
+
+class _DiscriminantSlot:
+    """
+    Slot of a union discriminant, which defaults to 0.
+    """
+    def __init__(self, offset: int):
+        self.offset = offset
+        self.defaultValue = _Default(uint16=0)
+
+
+class _Default:
+    def __init__(self, **values):
+        self.__dict__.update(values)
+
+
+def schema_hash(trade_message_schema=None):
+    """
+    :param trade_message_schema: (capnp._StructSchema) Schema of
+        TradeMessage, defaults to the installed omega_protocol.
+    :return: (str) sha256 hex digest of the schema nodes reachable from
+        TradeMessage and of the decoder specs, which changes with any field
+        offset, default or enumerant the generated decoders depend on.
+    """
+    schema = trade_message_schema or msgs_capnp.TradeMessage.schema
+    digest = hashlib.sha256(
+        repr((DECODER_SPECS, RESPONSE_DECODER_SPECS)).encode())
+    seen = set()
+    pending = [schema]
+    while pending:
+        node_schema = pending.pop()
+        node = node_schema.node
+        if node.id in seen:
+            continue
+        seen.add(node.id)
+        digest.update(node.as_builder().to_bytes())
+        if node.which() != 'struct':
+            continue
+        for field in node.struct.fields:
+            if field.which() == 'group':
+                pending.append(node_schema.fields[field.name].schema)
+                continue
+            field_type = field.slot.type
+            field_schema = None
+            if field_type.which() in ('struct', 'enum', 'list'):
+                field_schema = node_schema.fields[field.name].schema
+            while field_type.which() == 'list':
+                field_type = field_type.list.elementType
+                field_schema = (field_schema.elementType
+                                if field_type.which() in
+                                ('struct', 'enum', 'list') else None)
+            if field_schema is not None:
+                pending.append(field_schema)
+    return digest.hexdigest()
+
+
+def generate_decoders_source(trade_message_schema=None):
+    """
+    :param trade_message_schema: (capnp._StructSchema) Schema of
+        TradeMessage, defaults to the installed omega_protocol.
+    :return: (str) Source of the generated decoder module.  Its
+        unpack_frame(buf) returns the response type and the same argument
+        tuple as response_unpacker.unpack_response, or (None, None) for
+        frames that are not responses of a known type.
+    """
+    return _DecoderGenerator(
+        trade_message_schema or msgs_capnp.TradeMessage.schema).generate()
+
+
+def load_generated_decoders():
+    """
+    :return: (module) The generated decoder module, generated in memory if
+        the build step did not write it or wrote it from another schema.
+    """
+    try:
+        # pylint: disable=E0611
+        from omega_client.messaging import generated_decoders
+        # pylint: enable=E0611
+    except ImportError:
+        generated_decoders = None
+    schema = msgs_capnp.TradeMessage.schema
+    if generated_decoders is not None:
+        if (getattr(generated_decoders, 'SCHEMA_ID', None) == schema.node.id
+                and getattr(generated_decoders, 'SCHEMA_HASH', None) ==
+                schema_hash(schema)):
+            return generated_decoders
+        logger.warning('Generated decoders do not match the omega_protocol '
+                       'schema, regenerating them.  Run make codegen to '
+                       'update ' + generated_decoders.__file__ + '.')
+    module = types.ModuleType(GENERATED_MODULE)
+    exec(compile(generate_decoders_source(schema), GENERATED_MODULE, 'exec'),
+         module.__dict__)
+    return module
+
+
+def main(output_path: str = DEFAULT_OUTPUT_PATH):
+    with open(output_path, 'w') as output_file:
+        output_file.write(generate_decoders_source())
+
+
+if __name__ == '__main__':
+    main(*sys.argv[1:])
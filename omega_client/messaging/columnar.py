@@ -0,0 +1,335 @@
+"""
+Columnar export of the orders of completedOrdersReport and
+workingOrdersReport responses into NumPy structured arrays or pandas
+DataFrames, without building an ExecutionReport object per order.  Requires
+numpy; to_dataframe also requires pandas, see the 'dataframe' extra.
+"""
+import logging
+import struct
+
+import numpy as np
+
+# pylint: disable=W0611
+import capnp
+# pylint: enable=W0611
+
+# pylint: disable=E0611
+# pylint: disable=E0401
+import omega_protocol.TradeMessage_capnp as msgs_capnp
+# pylint: enable=E0611
+# pylint: enable=E0401
+from omega_client.messaging.capnp_wire import EMPTY_STRUCT, read_struct, \
+    read_struct_list, read_text, segment_starts
+
+logger = logging.getLogger(__name__)
+
+# Response types whose orders are exported.
+ORDER_REPORT_TYPES = ('completedOrdersReport', 'workingOrdersReport')
+
+# (column, ExecutionReport field) of the Text, enum and Float64 columns.
+_TEXT_COLUMNS = (
+    ('order_id', 'orderID'),
+    ('client_order_id', 'clientOrderID'),
+    ('exchange_order_id', 'exchangeOrderID'),
+    ('symbol', 'symbol'))
+_ENUM_COLUMNS = (
+    ('side', 'side'),
+    ('order_type', 'orderType'),
+    ('time_in_force', 'timeInForce'),
+    ('order_status', 'orderStatus'),
+    ('execution_report_type', 'executionType'))
+_FLOAT_COLUMNS = (
+    ('quantity', 'quantity'),
+    ('price', 'price'),
+    ('stop_price', 'stopPrice'),
+    ('filled_quantity', 'filledQuantity'),
+    ('avg_fill_price', 'avgFillPrice'),
+    ('fee', 'fee'),
+    ('creation_time', 'creationTime'),
+    ('submission_time', 'submissionTime'),
+    ('completion_time', 'completionTime'))
+
+# One row per order; Text and enum columns hold str objects, like the
+# attributes of ExecutionReport.
+ORDER_DTYPE = np.dtype(
+    [(column, object) for column, _ in _TEXT_COLUMNS] +
+    [('account_id', np.int64)] +
+    [(column, object) for column, _ in _ENUM_COLUMNS] +
+    [(column, np.float64) for column, _ in _FLOAT_COLUMNS])
+
+
+def orders_to_array(orders):
+    """
+    Read a capnp List(ExecutionReport) once into a structured array.
+    :param orders: (capnp._DynamicListReader) The orders of a
+        CompletedOrdersReport or WorkingOrdersReport reader, e.g. from
+        RawResponseHandler.on_completed_orders_report_raw.
+    :return: (np.ndarray) One row of ORDER_DTYPE per order.
+    """
+    array = np.empty(len(orders), dtype=ORDER_DTYPE)
+    columns = {column: [] for column in ORDER_DTYPE.names}
+    text_columns = [(columns[column], field)
+                    for column, field in _TEXT_COLUMNS]
+    enum_columns = [(columns[column], field)
+                    for column, field in _ENUM_COLUMNS]
+    float_columns = [(columns[column], field)
+                     for column, field in _FLOAT_COLUMNS]
+    account_ids = columns['account_id']
+    for order in orders:
+        get = order._get
+        for values, field in text_columns:
+            values.append(get(field))
+        for values, field in enum_columns:
+            values.append(str(get(field)))
+        for values, field in float_columns:
+            values.append(get(field))
+        account_ids.append(get('accountInfo')._get('accountID'))
+    for column, values in columns.items():
+        array[column] = values
+    return array
+
+
+class _OrdersLayout:
+    """
+    Offsets of the exported ExecutionReport fields and the enum tables,
+    taken from the compiled schema.
+    """
+    def __init__(self, trade_message_schema):
+        type_schema = trade_message_schema.fields['type'].schema
+        response_field = type_schema.fields['response']
+        response_schema = response_field.schema
+        body_schema = response_schema.fields['body'].schema
+
+        self.TYPE_DISCRIMINANT = (
+            2 * type_schema.node.struct.discriminantOffset)
+        self.RESPONSE_DISCRIMINANT = response_field.proto.discriminantValue
+        self.RESPONSE_POINTER = response_field.proto.slot.offset
+        self.BODY_DISCRIMINANT = (
+            2 * body_schema.node.struct.discriminantOffset)
+        # Pointer offsets of the report and its orders by discriminant.
+        self.REPORTS = {}
+        report_schema = None
+        for response_type in ORDER_REPORT_TYPES:
+            report_field = body_schema.fields[response_type]
+            report_schema = report_field.schema
+            self.REPORTS[report_field.proto.discriminantValue] = (
+                report_field.proto.slot.offset,
+                report_schema.fields['orders'].proto.slot.offset)
+        fields = report_schema.fields['orders'].schema.elementType.fields
+
+        self.TEXT_POINTERS = tuple(
+            (column, self._slot(fields[field], 'text').offset)
+            for column, field in _TEXT_COLUMNS)
+        self.ENUMS = tuple(
+            (column, 2 * self._slot(fields[field], 'enum').offset,
+             self._slot(fields[field], 'enum').defaultValue.enum,
+             self._enum_table(fields[field].schema))
+            for column, field in _ENUM_COLUMNS)
+        self.FLOATS = tuple(
+            (column, 8 * self._slot(fields[field], 'float64').offset,
+             struct.unpack('<Q', struct.pack(
+                 '<d', self._slot(fields[field],
+                                  'float64').defaultValue.float64))[0])
+            for column, field in _FLOAT_COLUMNS)
+        self.ACCOUNT_INFO_POINTER = self._slot(
+            fields['accountInfo'], 'struct').offset
+        account_id = self._slot(
+            fields['accountInfo'].schema.fields['accountID'], 'uint64')
+        self.ACCOUNT_ID = (8 * account_id.offset,
+                           account_id.defaultValue.uint64)
+
+    @staticmethod
+    def _slot(field, type_name: str):
+        slot = field.proto.slot
+        if slot.type.which() != type_name:
+            raise TypeError('{} is not a {}'.format(
+                field.proto.name, type_name))
+        return slot
+
+    @staticmethod
+    def _enum_table(enum_schema):
+        enumerants = enum_schema.enumerants
+        table = np.empty(max(enumerants.values()) + 1, dtype=object)
+        for enumerant, value in enumerants.items():
+            table[value] = enumerant
+        return table
+
+
+try:
+    _LAYOUT = _OrdersLayout(msgs_capnp.TradeMessage.schema)
+except (AttributeError, KeyError, TypeError) as e:
+    logger.warning('ExecutionReport layout unavailable, columnar export of '
+                   'frames falls back to capnp readers.',
+                   extra={'exception': repr(e)})
+    _LAYOUT = None
+
+
+def _resolve_pointers(words, indexes, segment_word_starts, kind: int):
+    """
+    Resolve a pointer field of every list element, following single far
+    pointers to their landing pads.
+    :param words: (np.ndarray) The frame viewed as little-endian words.
+    :param indexes: (np.ndarray) Word index in the frame of each pointer.
+    :param segment_word_starts: (np.ndarray) Word index of each segment.
+    :param kind: (int) Expected pointer kind, 0 for structs, 1 for lists.
+    :return: (np.ndarray, np.ndarray, np.ndarray) The resolved pointer
+        words, carrying the sizes of their targets, 0 for null pointers; the
+        word index of each target; and a mask of the double far pointers,
+        which are left to capnp_wire.
+    """
+    pointer_words = words[indexes]
+    far = pointer_words & np.uint64(3) == 2
+    double_far = far & (pointer_words & np.uint64(4) != 0)
+    landing = far & ~double_far
+    if landing.any():
+        indexes = indexes.copy()
+        indexes[landing] = (
+            segment_word_starts[pointer_words[landing] >> np.uint64(32)] +
+            ((pointer_words[landing] >> np.uint64(3)) &
+             np.uint64(0x1fffffff)).astype(np.int64))
+        pointer_words = np.where(landing, words[indexes], pointer_words)
+    pointer_words[double_far] = 0
+    if ((pointer_words != 0) &
+            (pointer_words & np.uint64(3) != kind)).any():
+        raise ValueError('Unexpected pointer.')
+    offsets = ((pointer_words >> np.uint64(2)) &
+               np.uint64(0x3fffffff)).astype(np.int64)
+    offsets -= (offsets & 0x20000000) << 1
+    return pointer_words, indexes + 1 + offsets, double_far
+
+
+def _frame_orders_to_array(buf):
+    layout = _LAYOUT
+    starts = segment_starts(buf)
+    segment, data, data_size, pointers, pointer_count = (
+        read_struct(buf, starts, 0, 0) or EMPTY_STRUCT)
+    if (data_size < layout.TYPE_DISCRIMINANT + 2 or struct.unpack_from(
+            '<H', buf, data + layout.TYPE_DISCRIMINANT)[0] !=
+            layout.RESPONSE_DISCRIMINANT or
+            layout.RESPONSE_POINTER >= pointer_count):
+        return None
+    segment, data, data_size, pointers, pointer_count = (
+        read_struct(buf, starts, segment, pointers + layout.RESPONSE_POINTER)
+        or EMPTY_STRUCT)
+    discriminant = (struct.unpack_from(
+        '<H', buf, data + layout.BODY_DISCRIMINANT)[0]
+        if data_size >= layout.BODY_DISCRIMINANT + 2 else 0)
+    if discriminant not in layout.REPORTS:
+        return None
+    report_pointer, orders_pointer = layout.REPORTS[discriminant]
+    segment, data, data_size, pointers, pointer_count = (
+        read_struct(buf, starts, segment, pointers + report_pointer)
+        if report_pointer < pointer_count else None) or EMPTY_STRUCT
+    orders = (read_struct_list(buf, starts, segment,
+                               pointers + orders_pointer)
+              if orders_pointer < pointer_count else [])
+    count = len(orders)
+    array = np.empty(count, dtype=ORDER_DTYPE)
+    if not count:
+        return array
+
+    # Elements of a composite list share their sizes and a fixed stride, so
+    # each field is one fancy index into the frame viewed as words.
+    segment, data, data_size, pointers, pointer_count = orders[0]
+    stride = data_size // 8 + pointer_count
+    element_offsets = stride * np.arange(count)
+    data_indexes = data // 8 + element_offsets
+    pointer_indexes = starts[segment] // 8 + pointers + element_offsets
+    words = np.frombuffer(buf, dtype='<u8', count=len(buf) // 8)
+    segment_word_starts = np.array(starts, dtype=np.int64) // 8
+
+    for column, offset, default in layout.FLOATS:
+        if offset + 8 <= data_size:
+            values = words[data_indexes + offset // 8] ^ np.uint64(default)
+        else:
+            values = np.full(count, default, dtype='<u8')
+        array[column] = values.view('<f8')
+    for column, offset, default, table in layout.ENUMS:
+        if offset + 2 <= data_size:
+            values = ((words[data_indexes + offset // 8] >>
+                       np.uint64(8 * (offset % 8))) & np.uint64(0xffff)
+                      ) ^ np.uint64(default)
+        else:
+            values = np.full(count, default, dtype='<u8')
+        known = values < len(table)
+        if known.all():
+            array[column] = table[values]
+        else:
+            # Enumerants added after this client was built read as numbers.
+            array[column] = np.where(
+                known, table[np.where(known, values, 0)],
+                values.astype(str).astype(object))
+
+    view = memoryview(buf)
+    for column, pointer in layout.TEXT_POINTERS:
+        if pointer >= pointer_count:
+            array[column] = ''
+            continue
+        pointer_words, targets, far = _resolve_pointers(
+            words, pointer_indexes + pointer, segment_word_starts, 1)
+        if ((pointer_words != 0) &
+                ((pointer_words >> np.uint64(32)) & np.uint64(7) != 2)).any():
+            raise ValueError('Unexpected list pointer.')
+        # The element count includes the NUL terminator.
+        texts = [str(view[8 * target:8 * target + size - 1], 'utf-8')
+                 if size else ''
+                 for target, size in zip(
+                     targets.tolist(),
+                     (pointer_words >> np.uint64(35)).tolist())]
+        for i in np.flatnonzero(far).tolist():
+            texts[i] = read_text(buf, starts, segment, orders[i][3] + pointer)
+        array[column] = texts
+
+    account_id_offset, account_id_default = layout.ACCOUNT_ID
+    account_ids = np.full(count, account_id_default, dtype='<u8')
+    if layout.ACCOUNT_INFO_POINTER < pointer_count:
+        pointer_words, targets, far = _resolve_pointers(
+            words, pointer_indexes + layout.ACCOUNT_INFO_POINTER,
+            segment_word_starts, 0)
+        present = ((pointer_words != 0) &
+                   (8 * ((pointer_words >> np.uint64(32)) & np.uint64(0xffff))
+                    >= account_id_offset + 8))
+        account_ids[present] = (
+            words[targets[present] + account_id_offset // 8] ^
+            np.uint64(account_id_default))
+        for i in np.flatnonzero(far).tolist():
+            _, account_data, account_data_size, _, _ = read_struct(
+                buf, starts, segment,
+                orders[i][3] + layout.ACCOUNT_INFO_POINTER) or EMPTY_STRUCT
+            if account_id_offset + 8 <= account_data_size:
+                account_ids[i] = struct.unpack_from(
+                    '<Q', buf, account_data + account_id_offset)[0] ^ \
+                    account_id_default
+    array['account_id'] = account_ids.view(np.int64)
+    return array
+
+
+def frame_orders_to_array(binary_msg):
+    """
+    Export the orders of a serialized completedOrdersReport or
+    workingOrdersReport response, e.g. a frame received by ResponseReceiver,
+    straight from the capnp wire format: each column is read for all orders
+    at once through a NumPy view of the frame, only Text fields are decoded
+    per order.
+    :param binary_msg: (bytes) The serialized TradeMessage, or any object
+        supporting the buffer protocol.
+    :return: (np.ndarray) One row of ORDER_DTYPE per order, None if
+        binary_msg is not an order report response.
+    """
+    if _LAYOUT is not None:
+        return _frame_orders_to_array(binary_msg)
+    response = msgs_capnp.TradeMessage.from_bytes(binary_msg).type.response
+    response_type = response.body.which()
+    if response_type not in ORDER_REPORT_TYPES:
+        return None
+    return orders_to_array(getattr(response.body, response_type).orders)
+
+
+def to_dataframe(array: np.ndarray):
+    """
+    :param array: (np.ndarray) Orders of ORDER_DTYPE.
+    :return: (pandas.DataFrame) One column per field of ORDER_DTYPE.
+    """
+    # pandas is optional, only required here.
+    import pandas as pd
+    return pd.DataFrame.from_records(array, columns=ORDER_DTYPE.names)
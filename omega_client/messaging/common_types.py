@@ -712,3 +712,23 @@ class RequestHeader(CommonType):
         self.sender_comp_id = sender_comp_id
         self.access_token = access_token
         self.request_id = request_id
+
+
+class ResponseHeader(CommonType):
+    def __init__(self,
+                 client_id: int,
+                 sender_comp_id: str,
+                 request_id: int,
+                 response_type: str):
+        """
+        Header of a response from Omega, read without decoding the body.
+        :param client_id: (int) client_id of the response.
+        :param sender_comp_id: (str) sender_comp_id of the response.
+        :param request_id: (int) request_id which requested this response.
+        :param response_type: (str) Name of the populated
+            "TradeMessage.Response.body" union member, e.g. 'executionReport'.
+        """
+        self.client_id = client_id
+        self.sender_comp_id = sender_comp_id
+        self.request_id = request_id
+        self.response_type = response_type
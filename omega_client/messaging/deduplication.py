@@ -0,0 +1,74 @@
+"""
+Suppression of repeated ExecutionReports, e.g. after a reconnect or from
+overlapping request_order_status and request_working_orders queries, before
+they are decoded and dispatched.
+"""
+from collections import OrderedDict
+from typing import List
+
+from omega_client.messaging.header_peek import peek_execution_report_key
+
+
+class ExecutionReportDeduplicator:
+    """
+    Remembers the (order_status, filled_quantity, execution type) state of
+    the last execution report of each order, in a bounded LRU over
+    order_ids, and reports a received executionReport as a duplicate if it
+    repeats the last state of its order.  A report returning an order to an
+    earlier state, e.g. the second of two replaces, is not a duplicate.
+    States are read from the frame without decoding it.  Other responses
+    are never duplicates.
+
+    Attributes:
+        _MAX_SIZE: (int) Maximum number of remembered orders; the least
+            recently reported order is forgotten first.
+        _last_states: (OrderedDict) Last state by order_id, least recently
+            reported order first.
+        duplicate_count: (int) Number of duplicates detected so far.
+    """
+    def __init__(self, max_size: int = 65536):
+        assert max_size > 0
+        self._MAX_SIZE = max_size
+        self._last_states = OrderedDict()
+        self.duplicate_count = 0
+
+    def __len__(self):
+        return len(self._last_states)
+
+    def clear(self):
+        """
+        Forget all remembered orders.
+        """
+        self._last_states.clear()
+
+    def is_duplicate(self, binary_msg):
+        """
+        :param binary_msg: (bytes) A received message, or any object
+            supporting the buffer protocol.
+        :return: (bool) True if binary_msg is an executionReport response
+            repeating the last state of its order.  The state is remembered
+            either way.
+        """
+        key = peek_execution_report_key(binary_msg)
+        if key is None:
+            return False
+        order_id, state = key[0], key[1:]
+        last_states = self._last_states
+        if last_states.get(order_id) == state:
+            last_states.move_to_end(order_id)
+            self.duplicate_count += 1
+            return True
+        last_states[order_id] = state
+        last_states.move_to_end(order_id)
+        if len(last_states) > self._MAX_SIZE:
+            last_states.popitem(last=False)
+        return False
+
+    def filter(self, binary_msgs: List[bytes]):
+        """
+        :param binary_msgs: (List[bytes]) Received messages in arrival
+            order.
+        :return: (List[bytes]) binary_msgs without duplicates.
+        """
+        return [binary_msg for binary_msg in binary_msgs
+                if not self.is_duplicate(binary_msg)]
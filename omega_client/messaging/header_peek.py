@@ -0,0 +1,345 @@
+"""
+Read the header of a serialized TradeMessage response, i.e. clientID,
+senderCompID, requestID and the body union tag, straight from the capnp wire
+format without building a message reader, so that frames can be filtered and
+routed before they are decoded.
+"""
+import logging
+import struct
+from typing import Iterable, List
+
+# pylint: disable=W0611
+import capnp
+# pylint: enable=W0611
+
+# pylint: disable=E0611
+# pylint: disable=E0401
+import omega_protocol.TradeMessage_capnp as msgs_capnp
+# pylint: enable=E0611
+# pylint: enable=E0401
+from omega_client.messaging.capnp_wire import EMPTY_STRUCT, read_struct, \
+    read_text, segment_starts
+from omega_client.messaging.common_types import ResponseHeader
+
+logger = logging.getLogger(__name__)
+
+_DISCRIMINANT = struct.Struct('<H')
+
+_PRIMITIVE_FORMATS = {
+    'int8': '<b', 'int16': '<h', 'int32': '<i', 'int64': '<q',
+    'uint8': '<B', 'uint16': '<H', 'uint32': '<I', 'uint64': '<Q',
+    'float32': '<f', 'float64': '<d'
+}
+# Floats are read as their raw bits, so that defaults can be XORed.
+_FLOAT_BITS_FORMATS = {'float32': '<I', 'float64': '<Q'}
+
+# Full-snapshot response types: a newer one of the same type, client and
+# account supersedes an older one.
+CONFLATABLE_RESPONSE_TYPES = frozenset({
+    'accountBalancesReport', 'openPositionsReport', 'accountDataReport'})
+
+
+class _ResponseLayout:
+    """
+    Offsets of the header fields of TradeMessage.type.response, taken from
+    the compiled schema so that they follow schema changes.
+    """
+    def __init__(self, trade_message_schema):
+        type_schema = trade_message_schema.fields['type'].schema
+        response_field = type_schema.fields['response']
+        response_schema = response_field.schema
+        body_schema = response_schema.fields['body'].schema
+
+        self.TYPE_DISCRIMINANT = (
+            _DISCRIMINANT, 2 * type_schema.node.struct.discriminantOffset, 0)
+        self.RESPONSE_DISCRIMINANT = response_field.proto.discriminantValue
+        self.RESPONSE_POINTER = response_field.proto.slot.offset
+        self.CLIENT_ID = self._primitive(response_schema.fields['clientID'])
+        self.REQUEST_ID = self._primitive(response_schema.fields['requestID'])
+        self.SENDER_COMP_ID_POINTER = (
+            response_schema.fields['senderCompID'].proto.slot.offset)
+        self.BODY_DISCRIMINANT = (
+            _DISCRIMINANT, 2 * body_schema.node.struct.discriminantOffset, 0)
+        self.RESPONSE_TYPES = {field.discriminantValue: field.name
+                               for field in body_schema.node.struct.fields}
+        # Pointer offsets of the report and of its accountInfo, and the
+        # accountID field, of each conflatable response type by discriminant.
+        self.SNAPSHOTS = {}
+        for response_type in CONFLATABLE_RESPONSE_TYPES:
+            if response_type not in body_schema.fields:
+                continue
+            report_field = body_schema.fields[response_type]
+            account_info_field = report_field.schema.fields['accountInfo']
+            self.SNAPSHOTS[report_field.proto.discriminantValue] = (
+                report_field.proto.slot.offset,
+                account_info_field.proto.slot.offset,
+                self._primitive(account_info_field.schema.fields['accountID']))
+        # Discriminant and pointer offset of executionReport, and the
+        # orderID pointer offset and the orderStatus, filledQuantity and
+        # executionType fields of ExecutionReport.  filledQuantity is read
+        # as its raw bits, which is enough to compare it.
+        self.EXECUTION_REPORT = None
+        if 'executionReport' in body_schema.fields:
+            report_field = body_schema.fields['executionReport']
+            report_fields = report_field.schema.fields
+            self.EXECUTION_REPORT = (
+                report_field.proto.discriminantValue,
+                report_field.proto.slot.offset,
+                report_fields['orderID'].proto.slot.offset,
+                self._primitive(report_fields['orderStatus']),
+                self._primitive(report_fields['filledQuantity']),
+                self._primitive(report_fields['executionType']))
+
+    @staticmethod
+    def _primitive(field):
+        slot = field.proto.slot
+        type_name = slot.type.which()
+        if type_name == 'enum':
+            fmt = _DISCRIMINANT
+            default = slot.defaultValue.enum
+        elif type_name in _FLOAT_BITS_FORMATS:
+            fmt = struct.Struct(_FLOAT_BITS_FORMATS[type_name])
+            default = struct.unpack(fmt.format, struct.pack(
+                _PRIMITIVE_FORMATS[type_name],
+                getattr(slot.defaultValue, type_name)))[0]
+        else:
+            fmt = struct.Struct(_PRIMITIVE_FORMATS[type_name])
+            default = getattr(slot.defaultValue, type_name)
+        return fmt, fmt.size * slot.offset, default
+
+
+try:
+    _LAYOUT = _ResponseLayout(msgs_capnp.TradeMessage.schema)
+except (AttributeError, KeyError) as e:
+    logger.warning('TradeMessage layout unavailable, header peek falls back '
+                   'to a full decode.', extra={'exception': repr(e)})
+    _LAYOUT = None
+
+
+def _primitive(buf, data, data_size, field):
+    fmt, offset, default = field
+    if offset + fmt.size > data_size:
+        return default
+    return fmt.unpack_from(buf, data + offset)[0] ^ default
+
+
+def _decode_response_header(binary_msg):
+    trade_message = msgs_capnp.TradeMessage.from_bytes(binary_msg)
+    if trade_message.type.which() != 'response':
+        return None
+    response = trade_message.type.response
+    return ResponseHeader(client_id=response.clientID,
+                          sender_comp_id=response.senderCompID,
+                          request_id=response.requestID,
+                          response_type=response.body.which())
+
+
+def _decode_snapshot_key(binary_msg):
+    trade_message = msgs_capnp.TradeMessage.from_bytes(binary_msg)
+    if trade_message.type.which() != 'response':
+        return None
+    response = trade_message.type.response
+    response_type = response.body.which()
+    if response_type not in CONFLATABLE_RESPONSE_TYPES:
+        return None
+    return (response_type, response.clientID,
+            getattr(response.body, response_type).accountInfo.accountID)
+
+
+def _read_pointer_struct(buf, starts, struct_ref, pointer):
+    segment, _, _, pointers, pointer_count = struct_ref
+    if pointer >= pointer_count:
+        return None
+    return read_struct(buf, starts, segment, pointers + pointer)
+
+
+def peek_snapshot_key(binary_msg):
+    """
+    Read the conflation key of a serialized snapshot response, i.e. one of
+    CONFLATABLE_RESPONSE_TYPES, without decoding it.
+    :param binary_msg: (bytes) The received binary message, or any object
+        supporting the buffer protocol.
+    :return: (Tuple[str, int, int]) response_type, client_id and account_id
+        of the snapshot, None for other or invalid messages.
+    """
+    if _LAYOUT is None:
+        try:
+            return _decode_snapshot_key(binary_msg)
+        except Exception:
+            return None
+    layout = _LAYOUT
+    try:
+        starts = segment_starts(binary_msg)
+        root = read_struct(binary_msg, starts, 0, 0)
+        if root is None or _primitive(
+                binary_msg, root[1], root[2],
+                layout.TYPE_DISCRIMINANT) != layout.RESPONSE_DISCRIMINANT:
+            return None
+        response = _read_pointer_struct(binary_msg, starts, root,
+                                        layout.RESPONSE_POINTER)
+        if response is None:
+            return None
+        data, data_size = response[1], response[2]
+        discriminant = _primitive(binary_msg, data, data_size,
+                                  layout.BODY_DISCRIMINANT)
+        snapshot = layout.SNAPSHOTS.get(discriminant)
+        if snapshot is None:
+            return None
+        report_pointer, account_info_pointer, account_id = snapshot
+        report = _read_pointer_struct(binary_msg, starts, response,
+                                      report_pointer)
+        account_info = report and _read_pointer_struct(
+            binary_msg, starts, report, account_info_pointer)
+        return (layout.RESPONSE_TYPES[discriminant],
+                _primitive(binary_msg, data, data_size, layout.CLIENT_ID),
+                _primitive(binary_msg, account_info[1], account_info[2],
+                           account_id) if account_info else account_id[2])
+    except (IndexError, ValueError, struct.error):
+        return None
+
+
+def _decode_execution_report_key(binary_msg):
+    trade_message = msgs_capnp.TradeMessage.from_bytes(binary_msg)
+    if (trade_message.type.which() != 'response' or
+            trade_message.type.response.body.which() != 'executionReport'):
+        return None
+    report = trade_message.type.response.body.executionReport
+    return (report.orderID, str(report.orderStatus), report.filledQuantity,
+            str(report.executionType))
+
+
+def peek_execution_report_key(binary_msg):
+    """
+    Read the state of a serialized executionReport response without
+    decoding it, to detect repeated reports of the same order state.
+    :param binary_msg: (bytes) The received binary message, or any object
+        supporting the buffer protocol.
+    :return: (tuple) Hashable (orderID, orderStatus, filledQuantity,
+        executionType) key of the report; the enums and filledQuantity are
+        represented by their raw wire values.  None for other or invalid
+        messages.
+    """
+    if _LAYOUT is None or _LAYOUT.EXECUTION_REPORT is None:
+        try:
+            return _decode_execution_report_key(binary_msg)
+        except Exception:
+            return None
+    layout = _LAYOUT
+    (discriminant, report_pointer, order_id_pointer, order_status,
+     filled_quantity, execution_type) = layout.EXECUTION_REPORT
+    try:
+        starts = segment_starts(binary_msg)
+        root = read_struct(binary_msg, starts, 0, 0)
+        if root is None or _primitive(
+                binary_msg, root[1], root[2],
+                layout.TYPE_DISCRIMINANT) != layout.RESPONSE_DISCRIMINANT:
+            return None
+        response = _read_pointer_struct(binary_msg, starts, root,
+                                        layout.RESPONSE_POINTER)
+        if response is None or _primitive(
+                binary_msg, response[1], response[2],
+                layout.BODY_DISCRIMINANT) != discriminant:
+            return None
+        report = (_read_pointer_struct(binary_msg, starts, response,
+                                       report_pointer) or EMPTY_STRUCT)
+        segment, data, data_size, pointers, pointer_count = report
+        order_id = (read_text(binary_msg, starts, segment,
+                              pointers + order_id_pointer)
+                    if order_id_pointer < pointer_count else '')
+        return (order_id,
+                _primitive(binary_msg, data, data_size, order_status),
+                _primitive(binary_msg, data, data_size, filled_quantity),
+                _primitive(binary_msg, data, data_size, execution_type))
+    except (IndexError, ValueError, struct.error):
+        return None
+
+
+def conflate_snapshots(binary_msgs: List[bytes]):
+    """
+    Drop the snapshot responses that are superseded by a later snapshot of
+    the same type, client and account in binary_msgs, without decoding them.
+    Other responses, e.g. execution reports, are never dropped.
+    :param binary_msgs: (List[bytes]) Received messages in arrival order.
+    :return: (List[bytes]) The remaining messages in arrival order.
+    """
+    keys = [peek_snapshot_key(binary_msg) for binary_msg in binary_msgs]
+    latest = {key: index for index, key in enumerate(keys)
+              if key is not None}
+    if len(latest) == sum(key is not None for key in keys):
+        return binary_msgs
+    return [binary_msg for index, (binary_msg, key) in
+            enumerate(zip(binary_msgs, keys))
+            if key is None or latest[key] == index]
+
+
+def peek_response_header(binary_msg):
+    """
+    Read the header of a serialized TradeMessage response without decoding
+    it.  Only the words on the path to the header fields are read.
+    :param binary_msg: (bytes) The received binary message, or any object
+        supporting the buffer protocol, e.g. zmq.Frame.buffer.
+    :return: (ResponseHeader) The header, None if binary_msg is not a valid
+        TradeMessage response.
+    """
+    if _LAYOUT is None:
+        try:
+            return _decode_response_header(binary_msg)
+        except Exception:
+            return None
+    layout = _LAYOUT
+    try:
+        starts = segment_starts(binary_msg)
+        root = read_struct(binary_msg, starts, 0, 0)
+        if root is None:
+            return None
+        segment, data, data_size, pointers, pointer_count = root
+        if (_primitive(binary_msg, data, data_size, layout.TYPE_DISCRIMINANT)
+                != layout.RESPONSE_DISCRIMINANT or
+                layout.RESPONSE_POINTER >= pointer_count):
+            return None
+        response = read_struct(binary_msg, starts, segment,
+                               pointers + layout.RESPONSE_POINTER)
+        if response is None:
+            return None
+        segment, data, data_size, pointers, pointer_count = response
+        if layout.SENDER_COMP_ID_POINTER < pointer_count:
+            sender_comp_id = read_text(
+                binary_msg, starts, segment,
+                pointers + layout.SENDER_COMP_ID_POINTER)
+        else:
+            sender_comp_id = ''
+        return ResponseHeader(
+            client_id=_primitive(binary_msg, data, data_size,
+                                 layout.CLIENT_ID),
+            sender_comp_id=sender_comp_id,
+            request_id=_primitive(binary_msg, data, data_size,
+                                  layout.REQUEST_ID),
+            response_type=layout.RESPONSE_TYPES.get(_primitive(
+                binary_msg, data, data_size, layout.BODY_DISCRIMINANT)))
+    except (IndexError, ValueError, struct.error):
+        return None
+
+
+class ResponseFilter:
+    """
+    Accepts responses by client and response type, for
+    OmegaConnection.set_response_filter.
+
+    Attributes:
+        _CLIENT_IDS: (frozenset) Accepted client_ids, None for all.
+        _RESPONSE_TYPES: (frozenset) Accepted response types, None for all.
+    """
+    def __init__(self,
+                 client_ids: Iterable[int] = None,
+                 response_types: Iterable[str] = None):
+        self._CLIENT_IDS = (frozenset(client_ids) if client_ids is not None
+                            else None)
+        self._RESPONSE_TYPES = (frozenset(response_types)
+                                if response_types is not None else None)
+
+    def __call__(self, response_header: ResponseHeader):
+        return ((self._CLIENT_IDS is None or
+                 response_header.client_id in self._CLIENT_IDS) and
+                (self._RESPONSE_TYPES is None or
+                 response_header.response_type in self._RESPONSE_TYPES))
+
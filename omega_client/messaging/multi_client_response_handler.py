@@ -0,0 +1,110 @@
+import logging
+from typing import Dict, Tuple
+
+from omega_client.messaging.response_handler import ResponseHandler
+
+logger = logging.getLogger(__name__)
+
+
+class MultiClientResponseHandler(ResponseHandler):
+    """
+    Routes responses for many client_ids sharing one OmegaConnection to a
+    per-client ResponseHandler.
+
+    Routing is a single dict lookup on (clientID, senderCompID) read from the
+    response header, so the body is only decoded by the handler that owns the
+    client.  Access tokens granted in logonAck and authorizationGrant
+    responses of registered clients are copied into the
+    MultiClientRequestSender, if one is set.
+    """
+    def __init__(self, default_handler: ResponseHandler = None):
+        """
+        :param default_handler: (ResponseHandler) Optional handler for
+            responses that do not belong to a registered client.
+        """
+        super().__init__()
+        self._handlers = dict()  # type: Dict[Tuple[int, str], ResponseHandler]
+        self._default_handler = default_handler
+        self._request_sender = None
+
+    def set_request_sender(self, request_sender):
+        """
+        :param request_sender: (MultiClientRequestSender) The sender whose
+            access tokens are kept up to date.
+        """
+        self._request_sender = request_sender
+
+    def register(self, client_id: int, sender_comp_id: str,
+                 response_handler: ResponseHandler):
+        """
+        Route responses for (client_id, sender_comp_id) to response_handler.
+        :param client_id: (int) client_id of the responses.
+        :param sender_comp_id: (str) sender_comp_id of the responses.
+        :param response_handler: (ResponseHandler) The per-client handler.
+        """
+        self._handlers[(client_id, sender_comp_id)] = response_handler
+
+    def unregister(self, client_id: int, sender_comp_id: str):
+        """
+        Stop routing responses for (client_id, sender_comp_id).
+        :param client_id: (int) client_id of the responses.
+        :param sender_comp_id: (str) sender_comp_id of the responses.
+        """
+        self._handlers.pop((client_id, sender_comp_id), None)
+
+    def unregister_client(self, client_id: int):
+        """
+        Stop routing responses for client_id under any sender_comp_id.
+        :param client_id: (int) client_id of the responses.
+        """
+        for key in [key for key in self._handlers if key[0] == client_id]:
+            del self._handlers[key]
+
+    def add_sender_comp_id(self, client_id: int,
+                           sender_comp_id: str,
+                           new_sender_comp_id: str):
+        """
+        Also route responses for (client_id, new_sender_comp_id) to the
+        handler registered for (client_id, sender_comp_id).  The old
+        sender_comp_id stays routed, so responses to requests sent with it
+        still reach the handler.
+        :param client_id: (int) client_id of the responses.
+        :param sender_comp_id: (str) sender_comp_id the handler is
+            registered with.
+        :param new_sender_comp_id: (str) sender_comp_id of the responses to
+            route to it as well.
+        """
+        handler = self._handlers.get((client_id, sender_comp_id))
+        if handler is not None:
+            self._handlers[(client_id, new_sender_comp_id)] = handler
+
+    def handle_response(self, response_type, response):
+        client_id = response.clientID
+        handler = self._handlers.get((client_id, response.senderCompID))
+        if handler is None:
+            if self._default_handler is None:
+                logger.debug('Dropping response for unregistered client.',
+                             extra={'client_id': client_id,
+                                    'sender_comp_id': response.senderCompID,
+                                    'response_type': response_type})
+                return
+            # Tokens are only tracked for registered clients.
+            self._default_handler.handle_response(response_type, response)
+            return
+        if self._request_sender is not None:
+            self._update_access_token(client_id, response_type, response)
+        handler.handle_response(response_type, response)
+
+    def _update_access_token(self, client_id, response_type, response):
+        """
+        Copy a newly granted access token into the request sender without
+        decoding the rest of the response.
+        """
+        if response_type == 'logonAck':
+            grant = response.body.logonAck.authorizationGrant
+        elif response_type == 'authorizationGrant':
+            grant = response.body.authorizationGrant
+        else:
+            return
+        if grant.success:
+            self._request_sender.set_access_token(client_id, grant.accessToken)
@@ -0,0 +1,372 @@
+"""
+ResponseHandler variant that passes capnp readers to its callbacks instead
+of the Python objects built by message_factory, for consumers that only copy
+a few fields, e.g. into NumPy arrays.
+"""
+from abc import abstractmethod
+from typing import Iterable
+
+import capnp
+
+from omega_client.messaging.response_handler import RESPONSE_CALLBACKS, \
+    ResponseHandler
+
+# RawResponseHandler callback of each "TradeMessage.Response.body" union
+# member.
+RAW_RESPONSE_CALLBACKS = {response_type: callback + '_raw'
+                          for response_type, callback in
+                          RESPONSE_CALLBACKS.items()}
+
+_PRIMITIVE_TYPES = (bool, int, float, str, bytes)
+# Enum values and union discriminants, returned as their enumerant names.
+_ENUM_TYPES = (capnp.lib.capnp._DynamicEnum,
+               capnp.lib.capnp._DynamicEnumField)
+_LIST_TYPES = (capnp.lib.capnp._DynamicListReader,
+               capnp.lib.capnp._DynamicListBuilder)
+
+
+class ReaderScope:
+    """
+    Validity flag shared by the ScopedReaders of one callback.
+    """
+    __slots__ = ('is_valid',)
+
+    def __init__(self):
+        self.is_valid = True
+
+    def close(self):
+        self.is_valid = False
+
+
+class ScopedReader:
+    """
+    Proxy of a capnp struct reader that raises ReferenceError once its
+    ReaderScope is closed.  Nested readers read through it are scoped too,
+    enums are returned as str and other primitive values as is.
+    """
+    __slots__ = ('_reader', '_scope')
+
+    def __init__(self, reader, scope: ReaderScope):
+        self._reader = reader
+        self._scope = scope
+
+    def _checked_reader(self):
+        if not self._scope.is_valid:
+            raise ReferenceError('capnp reader used after the callback it '
+                                 'was passed to returned.')
+        return self._reader
+
+    def __getattr__(self, name):
+        return scoped(getattr(self._checked_reader(), name), self._scope)
+
+    def __call__(self, *args, **kwargs):
+        return scoped(self._checked_reader()(*args, **kwargs), self._scope)
+
+    def __eq__(self, other):
+        if isinstance(other, ScopedReader):
+            other = other._checked_reader()
+        return self._checked_reader() == other
+
+    __hash__ = None
+
+    def __str__(self):
+        return str(self._checked_reader())
+
+    def __bool__(self):
+        return bool(self._checked_reader())
+
+
+class ScopedListReader(ScopedReader):
+    """
+    ScopedReader of a capnp list reader, also scoping its elements.
+    """
+    __slots__ = ()
+
+    def __len__(self):
+        return len(self._checked_reader())
+
+    def __getitem__(self, index):
+        return scoped(self._checked_reader()[index], self._scope)
+
+    def __iter__(self):
+        for value in self._checked_reader():
+            yield scoped(value, self._scope)
+
+
+def scoped(value, scope: ReaderScope):
+    """
+    :return: value if it is a primitive, str(value) if it is an enum, else
+        value wrapped in ScopedListReader for lists and ScopedReader
+        otherwise, e.g. for structs.
+    """
+    if value is None or isinstance(value, _PRIMITIVE_TYPES):
+        return value
+    if isinstance(value, _ENUM_TYPES):
+        return str(value)
+    if isinstance(value, _LIST_TYPES):
+        return ScopedListReader(value, scope)
+    return ScopedReader(value, scope)
+
+
+class RawResponseHandler(ResponseHandler):
+    """
+    Passes the capnp reader of each response body, e.g.
+    "TradeMessage.Response.body.executionReport", to the on_*_raw callbacks
+    without converting it with message_factory.  Only the on_*_raw callbacks
+    that are overridden are subscribed to.
+
+    The reader is only valid during the callback: it reads the received
+    frame in place, so copy whatever is needed before returning.  With
+    enforce_lifetime the reader, and any nested reader taken from it, raises
+    ReferenceError when used after the callback returned.  Without it the
+    bare capnp reader is passed, which saves a proxy per accessed struct,
+    and the rule is not checked.
+    """
+    def __init__(self,
+                 subscriptions: Iterable[str] = None,
+                 enforce_lifetime: bool = True):
+        """
+        :param subscriptions: (Iterable[str]) (optional) The response types,
+            keys of RAW_RESPONSE_CALLBACKS, passed to the on_*_raw callbacks.
+            Defaults to the types whose on_*_raw callback is overridden.
+        :param enforce_lifetime: (bool) Invalidate readers after the
+            callback.
+        """
+        self._ENFORCE_LIFETIME = enforce_lifetime
+        super().__init__(subscriptions=subscriptions)
+
+    def _resolve_subscriptions(self, subscriptions: Iterable[str] = None):
+        if subscriptions is not None:
+            return super()._resolve_subscriptions(subscriptions)
+        return frozenset(
+            response_type
+            for response_type, callback in RAW_RESPONSE_CALLBACKS.items()
+            if getattr(type(self), callback) is not
+            getattr(RawResponseHandler, callback))
+
+    def _fuse(self, response_type: str):
+        callback = getattr(self, RAW_RESPONSE_CALLBACKS[response_type])
+        if response_type == 'heartbeat':
+            def dispatch(response):
+                get = response._get
+                callback(get('clientID'), get('senderCompID'),
+                         get('requestID'))
+            return dispatch
+        if not self._ENFORCE_LIFETIME:
+            def dispatch(response):
+                get = response._get
+                callback(get('body')._get(response_type), get('clientID'),
+                         get('senderCompID'), get('requestID'))
+            return dispatch
+
+        def dispatch(response):
+            get = response._get
+            scope = ReaderScope()
+            try:
+                callback(scoped(get('body')._get(response_type), scope),
+                         get('clientID'), get('senderCompID'),
+                         get('requestID'))
+            finally:
+                scope.close()
+        return dispatch
+
+    @abstractmethod
+    def on_heartbeat_raw(self,
+                         client_id: int,
+                         sender_comp_id: str,
+                         request_id: int):
+        """
+        Override in subclass to handle Omega heartbeat response.
+        :param client_id: (int) client_id of the response.
+        :param sender_comp_id: (str) sender_comp_id of the response.
+        :param request_id: (int) request_id which requested this response
+        """
+
+    @abstractmethod
+    def on_test_message_raw(self,
+                            test,
+                            client_id: int,
+                            sender_comp_id: str,
+                            request_id: int):
+        """
+        Override in subclass to handle Omega test message response.
+        :param test: (capnp._DynamicStructReader) TestMessage reader.
+        :param client_id: (int) client_id of the response.
+        :param sender_comp_id: (str) sender_comp_id of the response.
+        :param request_id: (int) request_id which requested this response
+        """
+
+    @abstractmethod
+    def on_server_time_raw(self,
+                           server_time: float,
+                           client_id: int,
+                           sender_comp_id: str,
+                           request_id: int):
+        """
+        Override in subclass to handle Omega server time response.
+        :param server_time: (float) Server time in utc seconds.
+        :param client_id: (int) client_id of the response.
+        :param sender_comp_id: (str) sender_comp_id of the response.
+        :param request_id: (int) request_id which requested this response
+        """
+
+    @abstractmethod
+    def on_system_message_raw(self,
+                              system,
+                              client_id: int,
+                              sender_comp_id: str,
+                              request_id: int):
+        """
+        Override in subclass to handle Omega system message response.
+        :param system: (capnp._DynamicStructReader) System reader.
+        :param client_id: (int) client_id of the response.
+        :param sender_comp_id: (str) sender_comp_id of the response.
+        :param request_id: (int) request_id which requested this response
+        """
+
+    @abstractmethod
+    def on_logon_ack_raw(self,
+                         logon_ack,
+                         client_id: int,
+                         sender_comp_id: str,
+                         request_id: int):
+        """
+        Override in subclass to handle Omega LogonAck response.
+        :param logon_ack: (capnp._DynamicStructReader) LogonAck reader.
+        :param client_id: (int) client_id of the response.
+        :param sender_comp_id: (str) sender_comp_id of the response.
+        :param request_id: (int) request_id which requested this response
+        """
+
+    @abstractmethod
+    def on_logoff_ack_raw(self,
+                          logoff_ack,
+                          client_id: int,
+                          sender_comp_id: str,
+                          request_id: int):
+        """
+        Override in subclass to handle Omega LogoffAck response.
+        :param logoff_ack: (capnp._DynamicStructReader) LogoffAck reader.
+        :param client_id: (int) client_id of the response.
+        :param sender_comp_id: (str) sender_comp_id of the response.
+        :param request_id: (int) request_id which requested this response
+        """
+
+    @abstractmethod
+    def on_exec_report_raw(self,
+                           report,
+                           client_id: int,
+                           sender_comp_id: str,
+                           request_id: int):
+        """
+        Override in subclass to handle Omega ExecutionReport response.
+        :param report: (capnp._DynamicStructReader) ExecutionReport reader.
+        :param client_id: (int) client_id of the response.
+        :param sender_comp_id: (str) sender_comp_id of the response.
+        :param request_id: (int) request_id which requested this response
+        """
+
+    @abstractmethod
+    def on_account_data_raw(self,
+                            report,
+                            client_id: int,
+                            sender_comp_id: str,
+                            request_id: int):
+        """
+        Override in subclass to handle Omega AccountDataReport response.
+        :param report: (capnp._DynamicStructReader) AccountDataReport reader.
+        :param client_id: (int) client_id of the response.
+        :param sender_comp_id: (str) sender_comp_id of the response.
+        :param request_id: (int) request_id which requested this response
+        """
+
+    @abstractmethod
+    def on_working_orders_report_raw(self,
+                                     report,
+                                     client_id: int,
+                                     sender_comp_id: str,
+                                     request_id: int):
+        """
+        Override in subclass to handle Omega WorkingOrdersReport response.
+        :param report: (capnp._DynamicStructReader) WorkingOrdersReport
+            reader.
+        :param client_id: (int) client_id of the response.
+        :param sender_comp_id: (str) sender_comp_id of the response.
+        :param request_id: (int) request_id which requested this response
+        """
+
+    @abstractmethod
+    def on_account_balances_raw(self,
+                                report,
+                                client_id: int,
+                                sender_comp_id: str,
+                                request_id: int):
+        """
+        Override in subclass to handle Omega AccountBalancesReport response.
+        :param report: (capnp._DynamicStructReader) AccountBalancesReport
+            reader.
+        :param client_id: (int) client_id of the response.
+        :param sender_comp_id: (str) sender_comp_id of the response.
+        :param request_id: (int) request_id which requested this response
+        """
+
+    @abstractmethod
+    def on_open_positions_raw(self,
+                              report,
+                              client_id: int,
+                              sender_comp_id: str,
+                              request_id: int):
+        """
+        Override in subclass to handle Omega OpenPositionsReport response.
+        :param report: (capnp._DynamicStructReader) OpenPositionsReport
+            reader.
+        :param client_id: (int) client_id of the response.
+        :param sender_comp_id: (str) sender_comp_id of the response.
+        :param request_id: (int) request_id which requested this response
+        """
+
+    @abstractmethod
+    def on_completed_orders_report_raw(self,
+                                       report,
+                                       client_id: int,
+                                       sender_comp_id: str,
+                                       request_id: int):
+        """
+        Override in subclass to handle Omega CompletedOrdersReport response.
+        :param report: (capnp._DynamicStructReader) CompletedOrdersReport
+            reader.
+        :param client_id: (int) client_id of the response.
+        :param sender_comp_id: (str) sender_comp_id of the response.
+        :param request_id: (int) request_id which requested this response
+        """
+
+    @abstractmethod
+    def on_exchange_properties_report_raw(self,
+                                          report,
+                                          client_id: int,
+                                          sender_comp_id: str,
+                                          request_id: int):
+        """
+        Override in subclass to handle Omega ExchangePropertiesReport
+        response.
+        :param report: (capnp._DynamicStructReader) ExchangePropertiesReport
+            reader.
+        :param client_id: (int) client_id of the response.
+        :param sender_comp_id: (str) sender_comp_id of the response.
+        :param request_id: (int) request_id which requested this response
+        """
+
+    @abstractmethod
+    def on_authorization_grant_raw(self,
+                                   authorization_grant,
+                                   client_id: int,
+                                   sender_comp_id: str,
+                                   request_id: int):
+        """
+        Override in subclass to handle Omega AuthorizationGrant response.
+        :param authorization_grant: (capnp._DynamicStructReader)
+            AuthorizationGrant reader.
+        :param client_id: (int) client_id of the response.
+        :param sender_comp_id: (str) sender_comp_id of the response.
+        :param request_id: (int) request_id which requested this response
+        """
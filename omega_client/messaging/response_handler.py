@@ -1,24 +1,64 @@
 from abc import abstractmethod
+from functools import partial
 import logging
-from typing import List
+from typing import Iterable, List, Tuple
 
 from omega_client.messaging.common_types import AccountBalancesReport, \
     AccountCredentials, AccountDataReport, AuthorizationGrant, \
     CompletedOrdersReport, ExchangePropertiesReport, ExecutionReport, LogoffAck, \
     LogonAck, OpenPositionsReport, SystemMessage, WorkingOrdersReport
-from omega_client.messaging.response_unpacker import unpack_response
+from omega_client.messaging.response_unpacker import \
+    fuse_response_unpacker, RESPONSE_TYPES
 
 logger = logging.getLogger(__name__)
 
 
+# ResponseHandler callback of each "TradeMessage.Response.body" union member.
+RESPONSE_CALLBACKS = {
+    'heartbeat': 'on_heartbeat',
+    'test': 'on_test_message',
+    'serverTime': 'on_server_time',
+    'system': 'on_system_message',
+    'logonAck': 'on_logon_ack',
+    'logoffAck': 'on_logoff_ack',
+    'executionReport': 'on_exec_report',
+    'accountDataReport': 'on_account_data',
+    'workingOrdersReport': 'on_working_orders_report',
+    'accountBalancesReport': 'on_account_balances',
+    'openPositionsReport': 'on_open_positions',
+    'completedOrdersReport': 'on_completed_orders_report',
+    'exchangePropertiesReport': 'on_exchange_properties_report',
+    'authorizationGrant': 'on_authorization_grant'
+}
+
+# Discriminant of "TradeMessage.Response.body.executionReport".
+_EXECUTION_REPORT = RESPONSE_TYPES.index('executionReport')
+
+
 class ResponseHandler:
     ###########################################################################
     #                                                                         #
     # ~~~~~~~~~~~~~~~~~~~~~~~~~ Incoming OmegaMessages ~~~~~~~~~~~~~~~~~~~~~~ #
     #                                                                         #
     ###########################################################################
-    def __init__(self):
-        self._command_dispatcher = {
+    def __init__(self, subscriptions: Iterable[str] = None):
+        """
+        :param subscriptions: (Iterable[str]) (optional) The response types,
+            keys of RESPONSE_CALLBACKS, passed to the on_* callbacks.  Other
+            responses are dropped before they are decoded.  Defaults to the
+            types whose on_* callback is overridden in the subclass.
+        """
+        self._command_dispatcher = self._make_command_dispatcher()
+        self._subscriptions = self._resolve_subscriptions(subscriptions)
+        self._build_dispatch_table()
+
+    def _make_command_dispatcher(self):
+        """
+        :return: (dict) The callback of each response type, passed the
+            decoded response.  Subclasses that handle some responses
+            internally replace their entries here.
+        """
+        command_dispatcher = {
             'heartbeat': self.on_heartbeat,
             'test': self.on_test_message,
             'serverTime': self.on_server_time,
@@ -34,10 +74,134 @@ class ResponseHandler:
             'exchangePropertiesReport': self.on_exchange_properties_report,
             'authorizationGrant': self.on_authorization_grant
         }
+        if (self._batches_exec_reports() and
+                type(self).on_exec_report is ResponseHandler.on_exec_report):
+            # Reports dispatched one at a time, e.g. by dispatch_response,
+            # reach handlers that only override on_exec_reports as batches
+            # of one.
+            command_dispatcher['executionReport'] = (
+                lambda *report: self.on_exec_reports([report]))
+        return command_dispatcher
+
+    def _build_dispatch_table(self):
+        """
+        Fuse decoding and the callback of each subscribed response type into
+        one closure, keyed by response type in _response_dispatcher and
+        indexed by union discriminant in _dispatch_table.  Call again after
+        changing _command_dispatcher or _subscriptions.
+        """
+        self._response_dispatcher = {
+            response_type: self._fuse(response_type)
+            for response_type in self._subscriptions}
+        if type(self).handle_response is not ResponseHandler.handle_response:
+            # Subclasses that route responses themselves get every response
+            # through handle_response.
+            self._dispatch_table = tuple(
+                partial(self.handle_response, response_type)
+                for response_type in RESPONSE_TYPES)
+        else:
+            self._dispatch_table = tuple(
+                self._response_dispatcher.get(response_type)
+                for response_type in RESPONSE_TYPES)
+        self._exec_report_batch = []
+        self._append_exec_report = None
+        if (self._batches_exec_reports() and
+                'executionReport' in self._subscriptions and
+                type(self).handle_response is ResponseHandler.handle_response):
+            self._append_exec_report = fuse_response_unpacker(
+                'executionReport',
+                lambda *report: self._exec_report_batch.append(report))
+
+    def _fuse(self, response_type: str):
+        """
+        :return: (Callable[[capnp._DynamicStructReader], None]) The fused
+            decode-and-call closure of response_type.
+        """
+        return fuse_response_unpacker(
+            response_type, self._command_dispatcher[response_type])
+
+    def _resolve_subscriptions(self, subscriptions: Iterable[str] = None):
+        """
+        :return: (frozenset) subscriptions, or the response types whose
+            callback is overridden if subscriptions is None.
+        """
+        if subscriptions is not None:
+            subscriptions = frozenset(subscriptions)
+            assert subscriptions <= RESPONSE_CALLBACKS.keys()
+            return subscriptions
+        subscriptions = frozenset(
+            response_type
+            for response_type, callback in RESPONSE_CALLBACKS.items()
+            if getattr(type(self), callback) is not
+            getattr(ResponseHandler, callback))
+        if self._batches_exec_reports():
+            subscriptions |= {'executionReport'}
+        return subscriptions
+
+    def _batches_exec_reports(self):
+        """
+        :return: (bool) True if on_exec_reports is overridden.
+        """
+        return (type(self).on_exec_reports is not
+                ResponseHandler.on_exec_reports)
+
+    def is_subscribed(self, response_type: str):
+        """
+        :param response_type: (str) Name of a "TradeMessage.Response.body"
+            union member.
+        :return: (bool) True if responses of response_type are decoded and
+            dispatched.
+        """
+        return response_type in self._subscriptions
 
     def handle_response(self, response_type, response):
-        self._command_dispatcher[response_type](
-            *unpack_response(response_type, response))
+        # Only the union tag has been read so far; skip decoding the body of
+        # responses nobody handles, e.g. large snapshot reports.
+        dispatch = self._response_dispatcher.get(response_type)
+        if dispatch is not None:
+            dispatch(response)
+
+    def dispatch_response(self, response):
+        """
+        Decode response and pass it to its callback, looked up by the integer
+        union discriminant instead of the response type name.
+        :param response: (capnp._DynamicStructReader) A TradeMessage.Response.
+        """
+        try:
+            dispatch = self._dispatch_table[
+                response._get('body')._which().raw]
+        except IndexError:
+            # A response type added to the protocol after this client.
+            return
+        if dispatch is not None:
+            dispatch(response)
+
+    def dispatch_responses(self, responses: Iterable):
+        """
+        Dispatch a burst of responses in order.  If on_exec_reports is
+        overridden, each run of consecutive execution reports is passed to it
+        in one call instead of calling on_exec_report per report.
+        :param responses: (Iterable[capnp._DynamicStructReader])
+            TradeMessage.Response readers, in arrival order.
+        """
+        append_exec_report = self._append_exec_report
+        if append_exec_report is None:
+            for response in responses:
+                self.dispatch_response(response)
+            return
+        for response in responses:
+            if response._get('body')._which().raw == _EXECUTION_REPORT:
+                append_exec_report(response)
+                continue
+            self._flush_exec_reports()
+            self.dispatch_response(response)
+        self._flush_exec_reports()
+
+    def _flush_exec_reports(self):
+        batch = self._exec_report_batch
+        if batch:
+            self._exec_report_batch = []
+            self.on_exec_reports(batch)
 
     @abstractmethod
     def on_heartbeat(self,
@@ -135,6 +299,22 @@ class ResponseHandler:
         :param request_id: (int) request_id which requested this response
         """
 
+    def on_exec_reports(self,
+                        batch: List[Tuple[ExecutionReport, int, str, int]]):
+        """
+        Override in subclass to handle a burst of Omega ExecutionReport
+        responses in one call, e.g. to update shared state under one lock or
+        write them in one transaction.  Used instead of on_exec_report when
+        responses are received in batches, see ResponseReceiver; if
+        on_exec_report is not overridden, single responses are passed here
+        as batches of one.
+        :param batch: (List[Tuple[ExecutionReport, int, str, int]])
+            report, client_id, sender_comp_id and request_id of each
+            response, in arrival order.
+        """
+        for report in batch:
+            self.on_exec_report(*report)
+
     @abstractmethod
     def on_account_data(self,
                         report: AccountDataReport,
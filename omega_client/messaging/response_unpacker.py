@@ -1,3 +1,14 @@
+from typing import Callable
+
+# pylint: disable=W0611
+import capnp
+# pylint: enable=W0611
+
+# pylint: disable=E0611
+# pylint: disable=E0401
+import omega_protocol.TradeMessage_capnp as msgs_capnp
+# pylint: enable=E0611
+# pylint: enable=E0401
 from omega_client.messaging.message_factory import account_balances_report_py, \
     account_data_report_py, authorization_grant_py, \
     completed_orders_report_py, exchange_properties_report_py, \
@@ -147,3 +158,68 @@ _omega_response_unpacker = {
 
 def unpack_response(response_type, response):
     return _omega_response_unpacker[response_type](response)
+
+
+def _response_types():
+    body_schema = (msgs_capnp.TradeMessage.schema.fields['type'].schema
+                   .fields['response'].schema.fields['body'].schema)
+    fields = body_schema.node.struct.fields
+    response_types = [None] * len(fields)
+    for field in fields:
+        response_types[field.discriminantValue] = field.name
+    return tuple(response_types)
+
+
+# Name of each "TradeMessage.Response.body" union member, indexed by its
+# discriminant, i.e. response.body._which().raw.
+RESPONSE_TYPES = _response_types()
+
+# Converter of the body of each response type, None if the body is passed
+# as is.  heartbeat has no body.
+_omega_body_converter = {
+    'test': omega_test_message_py,
+    'serverTime': None,
+    'system': system_message_py,
+    'logonAck': logon_ack_py,
+    'logoffAck': logoff_ack_py,
+    'executionReport': execution_report_py,
+    'accountDataReport': account_data_report_py,
+    'workingOrdersReport': working_orders_report_py,
+    'accountBalancesReport': account_balances_report_py,
+    'openPositionsReport': open_positions_report_py,
+    'completedOrdersReport': completed_orders_report_py,
+    'exchangePropertiesReport': exchange_properties_report_py,
+    'authorizationGrant': authorization_grant_py,
+}
+
+
+def fuse_response_unpacker(response_type: str, callback: Callable):
+    """
+    Fuse unpack_response and the call of callback into one closure, which
+    saves the unpacker lookup and the argument tuple per response.  Fields
+    are read with _get, which skips the attribute lookup fallback of the
+    capnp reader.
+    :param response_type: (str) Name of a "TradeMessage.Response.body" union
+        member.
+    :param callback: (Callable) ResponseHandler callback of response_type.
+    :return: (Callable[[capnp._DynamicStructReader], None]) Calls callback
+        with the unpacked TradeMessage.Response.
+    """
+    if response_type == 'heartbeat':
+        def dispatch(response):
+            get = response._get
+            callback(get('clientID'), get('senderCompID'), get('requestID'))
+        return dispatch
+    convert = _omega_body_converter[response_type]
+    if convert is None:
+        def dispatch(response):
+            get = response._get
+            callback(get('body')._get(response_type), get('clientID'),
+                     get('senderCompID'), get('requestID'))
+        return dispatch
+
+    def dispatch(response):
+        get = response._get
+        callback(convert(get('body')._get(response_type)), get('clientID'),
+                 get('senderCompID'), get('requestID'))
+    return dispatch
@@ -1,6 +1,7 @@
 from datetime import datetime as dt
 import logging
 from threading import Timer
+from typing import Iterable
 
 from omega_client.messaging.common_types import AccountBalancesReport, \
     AccountCredentials, AccountDataReport, AuthorizationGrant, \
@@ -18,26 +19,30 @@ class SingleClientResponseHandler(ResponseHandler):
     # ~~~~~~~~~~~~~~~~~~~~~~~~~ Incoming OmegaMessages ~~~~~~~~~~~~~~~~~~~~~~ #
     #                                                                         #
     ###########################################################################
-    def __init__(self, refresh_buffer_time: float = 30.):
-        self._command_dispatcher = {
-            'heartbeat': self.on_heartbeat,
-            'test': self.on_test_message,
-            'serverTime': self.on_server_time,
-            'system': self.on_system_message,
-            'logonAck': self._on_logon_ack,
-            'logoffAck': self.on_logoff_ack,
-            'executionReport': self.on_exec_report,
-            'accountDataReport': self.on_account_data,
-            'workingOrdersReport': self.on_working_orders_report,
-            'accountBalancesReport': self.on_account_balances,
-            'openPositionsReport': self.on_open_positions,
-            'completedOrdersReport': self.on_completed_orders_report,
-            'exchangePropertiesReport': self.on_exchange_properties_report,
-            'authorizationGrant': self._on_authorization_grant
-        }
+    def __init__(self, refresh_buffer_time: float = 30.,
+                 subscriptions: Iterable[str] = None):
+        """
+        :param refresh_buffer_time: (float) Seconds before the access token
+            expires at which it is refreshed.
+        :param subscriptions: (Iterable[str]) (optional) See ResponseHandler.
+            logonAck and authorizationGrant are always handled to keep the
+            session authorized.
+        """
         self._request_sender = None
         self._refresh_token = None
         self._REFRESH_BUFFER_TIME = refresh_buffer_time
+        super().__init__(subscriptions=subscriptions)
+
+    def _make_command_dispatcher(self):
+        command_dispatcher = super()._make_command_dispatcher()
+        command_dispatcher['logonAck'] = self._on_logon_ack
+        command_dispatcher['authorizationGrant'] = \
+            self._on_authorization_grant
+        return command_dispatcher
+
+    def _resolve_subscriptions(self, subscriptions: Iterable[str] = None):
+        return super()._resolve_subscriptions(subscriptions) | \
+            {'logonAck', 'authorizationGrant'}
 
     def set_request_sender(self, request_sender):
         self._request_sender = request_sender
@@ -0,0 +1,207 @@
+"""
+Local balance ledger that keeps per-account, per-currency balances up to
+date between balance snapshots by applying the fills of ExecutionReports.
+"""
+from collections import OrderedDict
+from threading import Lock
+from typing import Dict, List, Tuple, Union
+
+from omega_client.messaging.common_types import AccountBalancesReport, \
+    AccountDataReport, Balance, ExecutionReport, OrderStatus, \
+    WorkingOrdersReport
+
+# Order statuses after which an order gets no more fills.
+_TERMINAL_ORDER_STATUSES = frozenset({
+    OrderStatus.filled.name, OrderStatus.canceled.name,
+    OrderStatus.rejected.name, OrderStatus.expired.name,
+    OrderStatus.failed.name})
+
+
+# Responses the ledger is updated from.  With ResponseReceiver receive
+# lanes, they must all be handled on the same lane, e.g. by passing
+# fast_lane_response_types=FAST_LANE_RESPONSE_TYPES | LEDGER_RESPONSE_TYPES.
+LEDGER_RESPONSE_TYPES = frozenset({
+    'executionReport', 'accountBalancesReport', 'accountDataReport',
+    'workingOrdersReport'})
+
+
+def split_symbol(symbol: str):
+    """
+    :param symbol: (str) Omega symbol, e.g. 'BTC/USD'.
+    :return: (Tuple[str, str]) base and quote currency of symbol.
+    """
+    base, _, quote = symbol.partition('/')
+    if not quote:
+        raise ValueError('Invalid symbol: {}'.format(symbol))
+    return base, quote
+
+
+class BalanceLedger:
+    """
+    Starts from the last AccountBalancesReport (or AccountDataReport) of
+    each account and applies the change of each order's filled_quantity,
+    filled notional (filled_quantity * avg_fill_price) and fee since its
+    previous ExecutionReport:
+        buy:  base += quantity, quote -= notional + fee
+        sell: base -= quantity, quote += notional - fee
+    Fees are charged in the quote currency.  The currency paid for a fill
+    was already held from available_balance when the order was placed, so
+    only the received currency's available_balance changes.  A new snapshot
+    replaces the balances of its account; the fill state of open orders is
+    kept so that later reports only apply new fills.
+
+    The fills of an order placed before the snapshot, e.g. a partially
+    filled order still working on startup or after a reconnect, are already
+    in the snapshot.  Apply the WorkingOrdersReport (or the orders of the
+    AccountDataReport) received with the snapshot, so that the fill state
+    of such orders starts from it instead of from zero.
+
+    Models spot accounts: margin positions and holds of working orders are
+    left to the snapshots, so keep polling them, at a lower rate.
+
+    Snapshots and ExecutionReports must be applied in the order they were
+    received: a snapshot applied after a fill it predates wipes that fill.
+    With receive lanes, handle all of LEDGER_RESPONSE_TYPES on one lane;
+    by default snapshots go to the background lane and ExecutionReports do
+    not.
+
+    Attributes:
+        _balances: (Dict[int, Dict[str, Balance]]) Balances by account_id
+            and currency.
+        _MAX_COMPLETED_ORDERS: (int) Number of completed orders whose fill
+            state is kept, so that repeated reports of them, e.g. after a
+            reconnect, are not applied again.
+        _fills: (Dict[str, Tuple[float, float, float]]) filled_quantity,
+            filled notional and fee of each open order by order_id, as of
+            its last applied ExecutionReport.
+        _completed_fills: (OrderedDict) The same for the most recently
+            completed orders, oldest first.
+        _lock: (Lock) Guards _balances and _fills against concurrent
+            callers; it does not order snapshots and fills.
+    """
+    def __init__(self, max_completed_orders: int = 65536):
+        self._MAX_COMPLETED_ORDERS = max_completed_orders
+        self._balances = dict()  # type: Dict[int, Dict[str, Balance]]
+        self._fills = dict()  # type: Dict[str, Tuple[float, float, float]]
+        self._completed_fills = OrderedDict()
+        self._lock = Lock()
+
+    def apply_balances_snapshot(
+            self, report: Union[AccountBalancesReport, AccountDataReport]):
+        """
+        Replace the balances of the account of report, and take the fill
+        state of the orders of an AccountDataReport as it is.
+        :param report: (AccountBalancesReport) or (AccountDataReport)
+        """
+        balances = {balance.currency: Balance(
+            currency=balance.currency,
+            full_balance=balance.full_balance,
+            available_balance=balance.available_balance)
+            for balance in report.balances}
+        with self._lock:
+            self._balances[report.account_info.account_id] = balances
+            if isinstance(report, AccountDataReport):
+                self._seed_fills(report.orders)
+
+    def apply_working_orders(
+            self, report: Union[WorkingOrdersReport, AccountDataReport]):
+        """
+        Take the fill state of the orders of report as it is, without
+        applying fills: they are in the balances snapshot received with it.
+        :param report: (WorkingOrdersReport) or (AccountDataReport)
+        """
+        with self._lock:
+            self._seed_fills(report.orders)
+
+    def _seed_fills(self, orders: List[ExecutionReport]):
+        for order in orders:
+            self._pop_fills(order.order_id)
+            self._set_fills(order, self._fills_of(order))
+
+    def apply_execution_report(self, report: ExecutionReport):
+        """
+        Apply the fills of report since the previous report of its order.
+        Reports of accounts without a snapshot only update the order's fill
+        state.
+        :param report: (ExecutionReport)
+        """
+        fills = self._fills_of(report)
+        notional = fills[1]
+        with self._lock:
+            filled_quantity, filled_notional, fee = self._pop_fills(
+                report.order_id)
+            self._set_fills(report, fills)
+            quantity_delta = report.filled_quantity - filled_quantity
+            if not quantity_delta and report.fee == fee:
+                return
+            balances = self._balances.get(report.account_info.account_id)
+            if balances is None:
+                return
+            base, quote = split_symbol(report.symbol)
+            notional_delta = notional - filled_notional
+            fee_delta = report.fee - fee
+            if report.side == 'sell':
+                self._add(balances, base, -quantity_delta, False)
+                self._add(balances, quote, notional_delta - fee_delta, True)
+            else:
+                self._add(balances, base, quantity_delta, True)
+                self._add(balances, quote, -notional_delta - fee_delta,
+                          False)
+
+    @staticmethod
+    def _fills_of(report: ExecutionReport):
+        return (report.filled_quantity,
+                report.filled_quantity * report.avg_fill_price, report.fee)
+
+    def _set_fills(self, report: ExecutionReport,
+                   fills: Tuple[float, float, float]):
+        if report.order_status in _TERMINAL_ORDER_STATUSES:
+            self._completed_fills[report.order_id] = fills
+            if len(self._completed_fills) > self._MAX_COMPLETED_ORDERS:
+                self._completed_fills.popitem(last=False)
+        else:
+            self._fills[report.order_id] = fills
+
+    def _pop_fills(self, order_id: str):
+        fills = self._fills.pop(order_id, None)
+        if fills is None:
+            fills = self._completed_fills.pop(order_id, (0., 0., 0.))
+        return fills
+
+    @staticmethod
+    def _add(balances: Dict[str, Balance],
+             currency: str,
+             delta: float,
+             is_received: bool):
+        balance = balances.get(currency)
+        if balance is None:
+            balance = balances[currency] = Balance(currency, 0., 0.)
+        balance.full_balance += delta
+        if is_received:
+            balance.available_balance += delta
+
+    def balance(self, account_id: int, currency: str):
+        """
+        :return: (Balance) Copy of the current balance of currency in the
+            account, None if unknown.
+        """
+        with self._lock:
+            balance = self._balances.get(account_id, {}).get(currency)
+            if balance is None:
+                return None
+            return Balance(currency=balance.currency,
+                           full_balance=balance.full_balance,
+                           available_balance=balance.available_balance)
+
+    def balances(self, account_id: int):
+        """
+        :return: (Dict[str, Balance]) Copy of the current balances of the
+            account by currency, empty if the account has no snapshot.
+        """
+        with self._lock:
+            return {currency: Balance(
+                currency=currency,
+                full_balance=balance.full_balance,
+                available_balance=balance.available_balance)
+                for currency, balance in
+                self._balances.get(account_id, {}).items()}
@@ -0,0 +1,256 @@
+"""
+NumPy-backed book of the open positions of many accounts, for vectorized
+mark-to-market, exposure and per-exchange aggregation.  Requires numpy, see
+the 'portfolio' extra.
+"""
+from typing import Dict, Iterable, List, Tuple, Union
+
+import numpy as np
+
+from omega_client.messaging.common_types import AccountDataReport, \
+    OpenPosition, OpenPositionsReport
+from omega_client.portfolio.balance_ledger import split_symbol
+
+# Columns of PositionBook.positions.
+POSITION_DTYPE = np.dtype([
+    ('account_id', np.int64),
+    ('exchange_id', np.int32),
+    ('symbol_id', np.int32),
+    ('side', np.int8),  # 1 for long (buy), -1 for short (sell)
+    ('quantity', np.float64),
+    ('initial_price', np.float64),
+    ('unrealized_pl', np.float64)
+])
+
+
+class _Index:
+    """
+    Dense integer ids of names, e.g. symbols, in order of first use.
+    """
+    def __init__(self):
+        self.names = []  # type: List[str]
+        self._ids = dict()  # type: Dict[str, int]
+
+    def __len__(self):
+        return len(self.names)
+
+    def id(self, name: str):
+        index = self._ids.get(name)
+        if index is None:
+            index = self._ids[name] = len(self.names)
+            self.names.append(name)
+        return index
+
+    def get(self, name: str):
+        return self._ids.get(name)
+
+
+class PositionBook:
+    """
+    Holds the open positions of every loaded account in columnar arrays,
+    one row per OpenPosition, see POSITION_DTYPE.  Loading a report replaces
+    the positions of its account.  Symbols, currencies and exchanges are
+    interned into dense ids so that aggregations are np.bincount calls
+    instead of Python loops.
+
+    Prices passed to the valuation methods are either a dict of symbol to
+    price or an array indexed by symbol id, see price_array.  Positions
+    without a price are valued at their initial_price.
+
+    Attributes:
+        _accounts: (Dict[int, np.ndarray]) Positions of each account.
+        _positions: (np.ndarray) Concatenated positions of all accounts,
+            None until rebuilt after a load.
+        _symbols: (_Index) Symbol ids.
+        _currencies: (_Index) Currency ids.
+        _exchanges: (_Index) Exchange ids.
+        _symbol_currencies: (List[Tuple[int, int]]) Base and quote currency
+            ids of each symbol id.
+    """
+    def __init__(self):
+        self._accounts = dict()  # type: Dict[int, np.ndarray]
+        self._positions = None
+        self._symbols = _Index()
+        self._currencies = _Index()
+        self._exchanges = _Index()
+        self._symbol_currencies = []
+
+    @property
+    def symbols(self):
+        """
+        :return: (List[str]) Symbols by symbol id.
+        """
+        return list(self._symbols.names)
+
+    @property
+    def currencies(self):
+        """
+        :return: (List[str]) Currencies by currency id.
+        """
+        return list(self._currencies.names)
+
+    @property
+    def exchanges(self):
+        """
+        :return: (List[str]) Exchanges by exchange id.
+        """
+        return list(self._exchanges.names)
+
+    @property
+    def positions(self):
+        """
+        :return: (np.ndarray) Positions of all accounts, of POSITION_DTYPE.
+        """
+        if self._positions is None:
+            if self._accounts:
+                self._positions = np.concatenate(
+                    list(self._accounts.values()))
+            else:
+                self._positions = np.empty(0, dtype=POSITION_DTYPE)
+        return self._positions
+
+    def _symbol_id(self, symbol: str):
+        symbol_id = self._symbols.get(symbol)
+        if symbol_id is None:
+            base, quote = split_symbol(symbol)
+            symbol_id = self._symbols.id(symbol)
+            self._symbol_currencies.append(
+                (self._currencies.id(base), self._currencies.id(quote)))
+        return symbol_id
+
+    def load_positions(self,
+                       account_id: int,
+                       open_positions: Iterable[OpenPosition],
+                       exchange: str = ''):
+        """
+        Replace the positions of the account.
+        :param account_id: (int) The account of open_positions.
+        :param open_positions: (Iterable[OpenPosition]) Its open positions.
+        :param exchange: (str) Exchange of the account, for
+            aggregate_by_exchange.
+        """
+        open_positions = list(open_positions)
+        positions = np.empty(len(open_positions), dtype=POSITION_DTYPE)
+        positions['account_id'] = account_id
+        positions['exchange_id'] = self._exchanges.id(exchange)
+        positions['symbol_id'] = [self._symbol_id(position.symbol)
+                                  for position in open_positions]
+        positions['side'] = [-1 if position.side == 'sell' else 1
+                             for position in open_positions]
+        positions['quantity'] = [position.quantity
+                                 for position in open_positions]
+        positions['initial_price'] = [position.initial_price
+                                      for position in open_positions]
+        positions['unrealized_pl'] = [position.unrealized_pl
+                                      for position in open_positions]
+        self._accounts[account_id] = positions
+        self._positions = None
+
+    def load_report(self,
+                    report: Union[OpenPositionsReport, AccountDataReport],
+                    exchange: str = ''):
+        """
+        Replace the positions of the account of report.
+        :param report: (OpenPositionsReport) or (AccountDataReport), e.g.
+            from open_positions_report_py or account_data_report_py.
+        :param exchange: (str) Exchange of the account.
+        """
+        self.load_positions(report.account_info.account_id,
+                            report.open_positions, exchange)
+
+    def remove_account(self, account_id: int):
+        """
+        Drop the positions of the account.
+        """
+        if self._accounts.pop(account_id, None) is not None:
+            self._positions = None
+
+    def price_array(self, prices: Union[Dict[str, float], np.ndarray]):
+        """
+        :param prices: (Dict[str, float]) Price of each symbol, or an array
+            of prices indexed by symbol id, NaN for unknown prices.
+        :return: (np.ndarray) Price of each symbol id, NaN if unknown.
+        """
+        if isinstance(prices, np.ndarray):
+            assert len(prices) >= len(self._symbols)
+            return prices
+        price_array = np.full(len(self._symbols), np.nan)
+        for symbol, price in prices.items():
+            symbol_id = self._symbols.get(symbol)
+            if symbol_id is not None:
+                price_array[symbol_id] = price
+        return price_array
+
+    def _mark_prices(self, positions: np.ndarray, prices):
+        mark_prices = self.price_array(prices)[positions['symbol_id']]
+        return np.where(np.isnan(mark_prices), positions['initial_price'],
+                        mark_prices)
+
+    def mark_to_market(self, prices: Union[Dict[str, float], np.ndarray]):
+        """
+        :param prices: (Dict[str, float]) or (np.ndarray) Mark prices.
+        :return: (np.ndarray) Unrealized PL of each row of positions at
+            prices, in its quote currency.
+        """
+        positions = self.positions
+        return (positions['side'] * positions['quantity'] *
+                (self._mark_prices(positions, prices) -
+                 positions['initial_price']))
+
+    def net_exposure(self, prices: Union[Dict[str, float], np.ndarray]):
+        """
+        :param prices: (Dict[str, float]) or (np.ndarray) Mark prices.
+        :return: (Dict[str, float]) Net exposure of all positions in each
+            currency: the signed quantity of base currencies, less the
+            signed notional at prices of quote currencies.
+        """
+        positions = self.positions
+        currency_count = len(self._currencies)
+        if not len(positions):
+            return {currency: 0. for currency in self._currencies.names}
+        currency_ids = np.array(self._symbol_currencies,
+                                dtype=np.int64)[positions['symbol_id']]
+        signed_quantity = positions['side'] * positions['quantity']
+        exposure = (
+            np.bincount(currency_ids[:, 0], weights=signed_quantity,
+                        minlength=currency_count) -
+            np.bincount(currency_ids[:, 1],
+                        weights=signed_quantity *
+                        self._mark_prices(positions, prices),
+                        minlength=currency_count))
+        return dict(zip(self._currencies.names, exposure.tolist()))
+
+    def aggregate_by_exchange(self,
+                              prices: Union[Dict[str, float], np.ndarray]):
+        """
+        :param prices: (Dict[str, float]) or (np.ndarray) Mark prices.
+        :return: (Dict[Tuple[str, str], Dict[str, float]]) Per exchange and
+            quote currency of its positions, the 'gross_notional' and
+            'net_notional' of those positions at prices and their
+            'unrealized_pl', all in that quote currency.
+        """
+        positions = self.positions
+        currency_count = len(self._currencies)
+        group_count = len(self._exchanges) * currency_count
+        if not len(positions):
+            return {}
+        quote_ids = np.array(self._symbol_currencies,
+                             dtype=np.int64)[positions['symbol_id'], 1]
+        group_ids = (positions['exchange_id'].astype(np.int64) *
+                     currency_count + quote_ids)
+        notional = (positions['side'] * positions['quantity'] *
+                    self._mark_prices(positions, prices))
+        sums = {
+            'gross_notional': np.bincount(
+                group_ids, weights=np.abs(notional), minlength=group_count),
+            'net_notional': np.bincount(
+                group_ids, weights=notional, minlength=group_count),
+            'unrealized_pl': np.bincount(
+                group_ids, weights=self.mark_to_market(prices),
+                minlength=group_count)
+        }
+        return {(self._exchanges.names[group_id // currency_count],
+                 self._currencies.names[group_id % currency_count]):
+                {name: float(values[group_id])
+                 for name, values in sums.items()}
+                for group_id in np.unique(group_ids).tolist()}
@@ -3,6 +3,7 @@ from setuptools.command.install import install
 from distutils.command.build import build
 import subprocess
 import os
+import sys
 
 
 # https://stackoverflow.com/questions/1754966/how-can-i-run-a-makefile-in-setup-py
@@ -16,6 +17,14 @@ class MyBuild(build):
         # Need to install it like this to avoid conflict with other packages using omega_protocol
         subprocess.run(['pip3', 'install', '.'], cwd=os.path.abspath(
             './omega_protocol'), check=True)
+        # Generate the response decoders from the installed schema.  On
+        # failure they are generated in memory at import time instead.
+        codegen = subprocess.run([sys.executable, '-m',
+                                  'omega_client.messaging.codegen'])
+        if codegen.returncode:
+            self.warn('Generating the response decoders failed with exit '
+                      'code {}, they will be generated at import time.'
+                      .format(codegen.returncode))
         build.run(self)
 
 with open('README.md') as readme_file:
@@ -25,6 +34,11 @@ requirements = [
     'pycapnp', 'pyyaml', 'pyzmq'
 ]
 
+extra_requirements = {
+    'portfolio': ['numpy'],
+    'dataframe': ['numpy', 'pandas']
+}
+
 test_requirements = [
     'pytest', 'pylint', 'pylint-json2html', 'pytest-cov', 'pytest-runner'
 ]
@@ -39,6 +53,7 @@ setup(
     url='https://github.com/fund3/python_omega_client',
     packages=find_packages(),
     install_requires=requirements,
+    extras_require=extra_requirements,
     zip_safe=False,
     keywords='omega',
     classifiers=[
@@ -0,0 +1,135 @@
+import pytest
+
+from omega_client.communication.dead_mans_switch import DeadMansSwitch
+from omega_client.messaging.common_types import AccountInfo, \
+    AuthorizationGrant, LogonAck, Message, RequestHeader
+
+__FAKE_REQUEST_HEADER = RequestHeader(client_id=123,
+                                      sender_comp_id='987',
+                                      access_token='',
+                                      request_id=100001)
+
+
+class FakeOmegaConnection:
+    def __init__(self):
+        self.armed = None
+        self.fired = list()
+        self.fired_request_ids = list()
+
+    def arm_kill_switch(self, request_header, accounts):
+        self.armed = (request_header, accounts)
+
+    def fire_kill_switch(self, access_token=None, request_id=None):
+        self.fired.append(access_token)
+        self.fired_request_ids.append(request_id)
+        return len(self.armed[1])
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.
+
+    def __call__(self):
+        return self.now
+
+
+def logon_ack(access_token):
+    return LogonAck(
+        success=True,
+        message=Message(code=0, body='Logged on'),
+        client_accounts=[AccountInfo(100), AccountInfo(101)],
+        authorization_grant=AuthorizationGrant(
+            success=True, message=Message(code=0, body=''),
+            access_token=access_token, refresh_token='refresh',
+            expire_at=0.))
+
+
+@pytest.fixture
+def fake_dead_mans_switch():
+    triggers = list()
+    dead_mans_switch = DeadMansSwitch(
+        omega_connection=FakeOmegaConnection(),
+        request_header=__FAKE_REQUEST_HEADER,
+        heartbeat_timeout_seconds=10.,
+        liveness_timeout_seconds=5.,
+        on_trigger=triggers.append,
+        clock=FakeClock())
+    dead_mans_switch.triggers = triggers
+    yield dead_mans_switch
+
+
+@pytest.mark.test_id(1)
+def test_not_armed_before_logon(fake_dead_mans_switch):
+    fake_dead_mans_switch._CLOCK.now = 100.
+    assert not fake_dead_mans_switch.is_armed()
+    assert fake_dead_mans_switch.check() is None
+    assert fake_dead_mans_switch._OMEGA_CONNECTION.fired == []
+
+
+@pytest.mark.test_id(2)
+def test_fires_on_heartbeat_loss(fake_dead_mans_switch):
+    clock = fake_dead_mans_switch._CLOCK
+    connection = fake_dead_mans_switch._OMEGA_CONNECTION
+    fake_dead_mans_switch.on_logon_ack(logon_ack('token1'), 123, '987', 1)
+    request_header, accounts = connection.armed
+    assert request_header.access_token == 'token1'
+    assert [account.account_id for account in accounts] == [100, 101]
+
+    for now in (3., 6., 9.):
+        clock.now = now
+        fake_dead_mans_switch.ping()
+        assert fake_dead_mans_switch.check() is None
+    clock.now = 14.
+    fake_dead_mans_switch.on_authorization_grant(AuthorizationGrant(
+        success=True, message=Message(code=0, body=''),
+        access_token='token2', refresh_token='refresh', expire_at=0.))
+    assert fake_dead_mans_switch.check() == 'heartbeat'
+    assert connection.fired == ['token2']
+    assert fake_dead_mans_switch.triggers == ['heartbeat']
+    # fires only once
+    assert fake_dead_mans_switch.check() is None
+    assert len(connection.fired) == 1
+
+
+@pytest.mark.test_id(3)
+def test_fires_on_liveness_loss(fake_dead_mans_switch):
+    clock = fake_dead_mans_switch._CLOCK
+    fake_dead_mans_switch.on_logon_ack(logon_ack('token1'))
+    for now in (3., 6.):
+        clock.now = now
+        fake_dead_mans_switch.on_heartbeat(123, '987', 1)
+    assert fake_dead_mans_switch.check() == 'liveness'
+    fake_dead_mans_switch.reset()
+    assert fake_dead_mans_switch.is_armed()
+    assert fake_dead_mans_switch.check() is None
+
+
+@pytest.mark.test_id(4)
+def test_fires_with_new_request_ids(fake_dead_mans_switch):
+    connection = fake_dead_mans_switch._OMEGA_CONNECTION
+    fake_dead_mans_switch.on_logon_ack(logon_ack('token1'))
+    fake_dead_mans_switch._CLOCK.now = 11.
+    assert fake_dead_mans_switch.check() == 'heartbeat'
+    fake_dead_mans_switch.reset()
+    fake_dead_mans_switch._CLOCK.now = 22.
+    assert fake_dead_mans_switch.check() == 'heartbeat'
+    # one request_id per account and firing
+    assert connection.fired_request_ids == [100001, 100003]
+
+    requested = list()
+
+    def request_id_provider(request_count):
+        requested.append(request_count)
+        return 200001
+
+    dead_mans_switch = DeadMansSwitch(
+        omega_connection=connection,
+        request_header=__FAKE_REQUEST_HEADER,
+        heartbeat_timeout_seconds=10.,
+        request_id_provider=request_id_provider,
+        clock=FakeClock())
+    dead_mans_switch.on_logon_ack(logon_ack('token1'))
+    dead_mans_switch._CLOCK.now = 11.
+    assert dead_mans_switch.check() == 'heartbeat'
+    assert requested == [2]
+    assert connection.fired_request_ids[-1] == 200001
@@ -0,0 +1,72 @@
+import pytest
+import zmq
+
+from omega_client.communication.direct_omega_connection import \
+    DirectOmegaConnection
+from omega_client.messaging.common_types import RequestHeader
+from omega_client.messaging.message_factory import heartbeat_capnp
+from omega_client.messaging.response_handler import ResponseHandler
+
+__OMEGA_ENDPOINT = 'inproc://DIRECT_OMEGA'
+__OMEGA_SOCKET_IDENTITY = b'DIRECT_OMEGA_SOCKET'
+__FAKE_REQUEST_HEADER = RequestHeader(client_id=123,
+                                      sender_comp_id='987',
+                                      access_token='FakeAccessToken',
+                                      request_id=100001)
+
+
+@pytest.fixture(scope="session")
+def fake_zmq_context():
+    zmq_context = zmq.Context.instance()
+    yield zmq_context
+
+
+@pytest.fixture(scope="module")
+def fake_router_socket(fake_zmq_context):
+    router_socket = fake_zmq_context.socket(zmq.ROUTER)
+    router_socket.bind(__OMEGA_ENDPOINT)
+    yield router_socket
+    router_socket.close()
+
+
+@pytest.fixture(scope="function")
+def fake_direct_connection(fake_zmq_context, fake_router_socket):
+    connection = DirectOmegaConnection(
+        zmq_context=fake_zmq_context,
+        omega_endpoint=__OMEGA_ENDPOINT,
+        response_handler=ResponseHandler(),
+        omega_socket_identity=__OMEGA_SOCKET_IDENTITY)
+    connection.connect()
+    yield connection
+    connection.close(linger_milli=0)
+
+
+@pytest.mark.test_id(1)
+def test_request_is_sent_on_caller_thread(fake_router_socket,
+                                          fake_direct_connection):
+    omega_message, _ = heartbeat_capnp(__FAKE_REQUEST_HEADER)
+    fake_direct_connection.send_heartbeat(request_header=__FAKE_REQUEST_HEADER)
+    assert fake_router_socket.recv_multipart() == [
+        __OMEGA_SOCKET_IDENTITY, omega_message.to_bytes()]
+
+
+@pytest.mark.test_id(2)
+def test_poll_once_and_run_until(monkeypatch,
+                                 fake_router_socket,
+                                 fake_direct_connection):
+    collected_message_list = list()
+
+    def mock_handle_message(message):
+        collected_message_list.append(message)
+
+    monkeypatch.setattr(fake_direct_connection,
+                        '_handle_binary_omega_message',
+                        mock_handle_message)
+    assert fake_direct_connection.poll_once() == 0
+    for x in range(6):
+        fake_router_socket.send_multipart([__OMEGA_SOCKET_IDENTITY, b'test'])
+    assert fake_direct_connection.run_until(
+        lambda: len(collected_message_list) == 6, timeout_seconds=1.)
+    assert collected_message_list == [b'test'] * 6
+    assert not fake_direct_connection.run_until(
+        lambda: len(collected_message_list) > 6, timeout_seconds=0.05)
@@ -0,0 +1,183 @@
+# pylint: disable=W0611
+import capnp
+# pylint: enable=W0611
+import pytest
+import zmq
+
+# pylint: disable=E0611
+# pylint: disable=E0401
+import omega_protocol.TradeMessage_capnp as msgs_capnp
+# pylint: enable=E0401
+# pylint: enable=E0611
+
+from omega_client.messaging.common_types import AccountInfo, Order, \
+    OrderType, Side
+from omega_client.communication.multi_client_request_sender import \
+    MultiClientRequestSender
+from omega_client.messaging.multi_client_response_handler import \
+    MultiClientResponseHandler
+from omega_client.messaging.response_handler import ResponseHandler
+
+__FAKE_REQUEST_SENDER_CONNECTION_STR = 'inproc://FAKE_MULTI_REQUEST_SENDER'
+
+
+class FakeRoutedResponseHandler(ResponseHandler):
+    def __init__(self):
+        self.message_list = list()
+        super().__init__()
+
+    def handle_response(self, response_type, response):
+        self.message_list.append((response_type, response.clientID))
+
+
+@pytest.fixture(scope="session")
+def fake_zmq_context():
+    zmq_context = zmq.Context.instance()
+    yield zmq_context
+
+
+@pytest.fixture(scope="function")
+def fake_request_sender(fake_zmq_context):
+    request_sender = MultiClientRequestSender(
+        zmq_context=fake_zmq_context,
+        zmq_endpoint=__FAKE_REQUEST_SENDER_CONNECTION_STR
+    )
+    request_sender.queued_messages = list()
+    request_sender.queued_deadlines = list()
+    request_sender._request_sender._queue_message = (
+        lambda message, deadline=None: (
+            request_sender.queued_messages.append(message),
+            request_sender.queued_deadlines.append(deadline)))
+    request_sender.add_client(client_id=123, sender_comp_id='987')
+    request_sender.add_client(client_id=456, sender_comp_id='654')
+    yield request_sender
+
+
+@pytest.mark.test_id(1)
+def test_per_client_request_headers(fake_request_sender):
+    fake_request_sender.set_access_token(123, 'token123')
+    fake_request_sender.set_access_token(456, 'token456')
+    fake_request_sender.send_heartbeat(123)
+    fake_request_sender.send_heartbeat(123)
+    fake_request_sender.send_heartbeat(456)
+    order = Order(account_info=AccountInfo(account_id=100),
+                  client_order_id='c1',
+                  symbol='BTC/USD',
+                  side=Side.buy.name,
+                  order_type=OrderType.limit.name,
+                  quantity=1.,
+                  price=100.)
+    fake_request_sender.place_order(456, order)
+
+    requests = [message.type.request
+                for message in fake_request_sender.queued_messages]
+    assert [(r.clientID, r.senderCompID, r.accessToken, r.requestID)
+            for r in requests] == [(123, '987', 'token123', 1),
+                                   (123, '987', 'token123', 2),
+                                   (456, '654', 'token456', 1),
+                                   (456, '654', 'token456', 2)]
+
+
+@pytest.mark.test_id(2)
+def test_logon_does_not_clear_stored_access_token(fake_request_sender):
+    fake_request_sender.set_access_token(123, 'token123')
+    fake_request_sender.logon(123, client_secret='secret', credentials=[])
+    fake_request_sender.send_heartbeat(123)
+    requests = [message.type.request
+                for message in fake_request_sender.queued_messages]
+    assert requests[0].accessToken == ''
+    assert requests[1].accessToken == 'token123'
+
+
+@pytest.mark.test_id(3)
+def test_responses_are_routed_by_client():
+    handler_123 = FakeRoutedResponseHandler()
+    handler_456 = FakeRoutedResponseHandler()
+    router = MultiClientResponseHandler()
+    router.register(123, '987', handler_123)
+    router.register(456, '654', handler_456)
+
+    for client_id, sender_comp_id in ((123, '987'), (456, '654'),
+                                      (789, '000')):
+        omega_message = msgs_capnp.TradeMessage.new_message()
+        response = omega_message.init('type').init('response')
+        response.clientID = client_id
+        response.senderCompID = sender_comp_id
+        response.init('body').heartbeat = None
+        router.handle_response('heartbeat', response)
+
+    assert handler_123.message_list == [('heartbeat', 123)]
+    assert handler_456.message_list == [('heartbeat', 456)]
+
+
+@pytest.mark.test_id(4)
+def test_sender_comp_id_change_keeps_old_routes(fake_request_sender):
+    handler_123 = FakeRoutedResponseHandler()
+    router = MultiClientResponseHandler()
+    router.register(123, '987', handler_123)
+    router.add_sender_comp_id(123, fake_request_sender.sender_comp_id(123),
+                              '988')
+    fake_request_sender.set_sender_comp_id(123, '988')
+    fake_request_sender.send_heartbeat(123)
+    assert (fake_request_sender.queued_messages[0].type.request.senderCompID
+            == '988')
+
+    def route_heartbeat(sender_comp_id):
+        omega_message = msgs_capnp.TradeMessage.new_message()
+        response = omega_message.init('type').init('response')
+        response.clientID = 123
+        response.senderCompID = sender_comp_id
+        response.init('body').heartbeat = None
+        router.handle_response('heartbeat', response)
+
+    # Responses to requests in flight under '987' still reach the handler.
+    route_heartbeat('987')
+    route_heartbeat('988')
+    assert handler_123.message_list == [('heartbeat', 123)] * 2
+
+    router.unregister_client(123)
+    route_heartbeat('987')
+    route_heartbeat('988')
+    assert len(handler_123.message_list) == 2
+
+
+@pytest.mark.test_id(5)
+def test_requests_forward_deadline(fake_request_sender):
+    fake_request_sender.send_heartbeat(123, deadline=1234.5)
+    fake_request_sender.cancel_order(456, AccountInfo(account_id=100), 'c137',
+                                     deadline=1235.)
+    fake_request_sender.send_heartbeat(456)
+    assert fake_request_sender.queued_deadlines == [1234.5, 1235., None]
+
+
+@pytest.mark.test_id(6)
+def test_tokens_of_unregistered_clients_are_ignored(fake_request_sender):
+    default_handler = FakeRoutedResponseHandler()
+    router = MultiClientResponseHandler(default_handler=default_handler)
+    router.set_request_sender(fake_request_sender)
+    router.register(123, '987', FakeRoutedResponseHandler())
+
+    for client_id, sender_comp_id in ((123, '987'), (789, '000')):
+        omega_message = msgs_capnp.TradeMessage.new_message()
+        response = omega_message.init('type').init('response')
+        response.clientID = client_id
+        response.senderCompID = sender_comp_id
+        grant = response.init('body').init('authorizationGrant')
+        grant.success = True
+        grant.accessToken = 'token{}'.format(client_id)
+        router.handle_response('authorizationGrant', response)
+    assert default_handler.message_list == [('authorizationGrant', 789)]
+
+    fake_request_sender.remove_client(456)
+    fake_request_sender.set_access_token(456, 'token456')
+    fake_request_sender.send_heartbeat(123)
+    assert (fake_request_sender.queued_messages[0].type.request.accessToken
+            == 'token123')
+
+
+@pytest.mark.test_id(7)
+def test_replace_order_keeps_order_type_by_default(fake_request_sender):
+    replace = fake_request_sender.replace_order(
+        123, AccountInfo(account_id=100), 'c137', quantity=2.)
+    assert replace.orderType == OrderType.undefined.name
+    assert replace.quantity == 2.
@@ -4,7 +4,8 @@ import time
 import pytest
 import zmq
 
-from omega_client.messaging.common_types import RequestHeader
+import omega_protocol.TradeMessage_capnp as msgs_capnp
+from omega_client.messaging.common_types import AccountInfo, RequestHeader
 from omega_client.messaging.response_handler import ResponseHandler
 from omega_client.communication.response_receiver import ResponseReceiver
 from omega_client.communication.request_sender import RequestSender
@@ -111,3 +112,23 @@ def test_send_heartbeat(fake_router_socket,
         collected_message_list.append(fake_router_socket.recv())
     assert len(collected_message_list) == 6
 
+
+
+@pytest.mark.test_id(3)
+def test_fire_kill_switch(fake_router_socket, fake_omega_connection):
+    assert fake_omega_connection.fire_kill_switch() == 0
+    fake_omega_connection.arm_kill_switch(
+        request_header=__FAKE_REQUEST_HEADER,
+        accounts=[AccountInfo(100), AccountInfo(101)])
+    assert fake_omega_connection.is_kill_switch_armed()
+    assert fake_omega_connection.fire_kill_switch(
+        access_token='NewAccessToken', request_id=200001) == 2
+    for account_id, request_id in ((100, 200001), (101, 200002)):
+        identity, message = fake_router_socket.recv_multipart()
+        assert identity == __OMEGA_SOCKET_IDENTITY
+        request = msgs_capnp.TradeMessage.from_bytes(message).type.request
+        assert request.accessToken == 'NewAccessToken'
+        assert request.requestID == request_id
+        assert request.body.which() == 'cancelAllOrders'
+        assert request.body.cancelAllOrders.accountInfo.accountID == \
+            account_id
@@ -0,0 +1,137 @@
+import time
+
+import pytest
+import zmq
+
+from omega_client.communication.omega_reactor import OmegaReactor
+from omega_client.messaging.common_types import RequestHeader
+from omega_client.messaging.message_factory import heartbeat_capnp
+from omega_client.messaging.response_handler import ResponseHandler
+
+__OMEGA_ENDPOINT_1 = 'inproc://REACTOR_OMEGA_1'
+__OMEGA_ENDPOINT_2 = 'inproc://REACTOR_OMEGA_2'
+__FAKE_REQUEST_HEADER = RequestHeader(client_id=123,
+                                      sender_comp_id='987',
+                                      access_token='FakeAccessToken',
+                                      request_id=100001)
+
+
+@pytest.fixture(scope="session")
+def fake_zmq_context():
+    zmq_context = zmq.Context.instance()
+    yield zmq_context
+
+
+@pytest.fixture(scope="module")
+def fake_router_sockets(fake_zmq_context):
+    router_sockets = []
+    for endpoint in (__OMEGA_ENDPOINT_1, __OMEGA_ENDPOINT_2):
+        router_socket = fake_zmq_context.socket(zmq.ROUTER)
+        router_socket.bind(endpoint)
+        router_sockets.append(router_socket)
+    yield router_sockets
+    for router_socket in router_sockets:
+        router_socket.close()
+
+
+@pytest.fixture(scope="module")
+def fake_reactor(fake_zmq_context, fake_router_sockets):
+    reactor = OmegaReactor(zmq_context=fake_zmq_context,
+                           polling_timeout_milli=100)
+    reactor.start()
+    reactor.wait_until_running()
+    yield reactor
+    reactor.cleanup()
+
+
+@pytest.mark.test_id(1)
+def test_requests_and_responses_per_session(monkeypatch,
+                                            fake_router_sockets,
+                                            fake_reactor):
+    collected_message_list = list()
+
+    def mock_decode_and_handle(response_handler, frame):
+        collected_message_list.append((response_handler, frame))
+
+    monkeypatch.setattr(fake_reactor, '_decode_and_handle',
+                        mock_decode_and_handle)
+    handler_1 = ResponseHandler()
+    handler_2 = ResponseHandler()
+    session_1 = fake_reactor.add_session(
+        'session_1', __OMEGA_ENDPOINT_1, handler_1,
+        omega_socket_identity=b'SESSION_1')
+    session_2 = fake_reactor.add_session(
+        'session_2', __OMEGA_ENDPOINT_2, handler_2,
+        omega_socket_identity=b'SESSION_2')
+
+    session_1.send_heartbeat(request_header=__FAKE_REQUEST_HEADER)
+    session_2.send_heartbeat(request_header=__FAKE_REQUEST_HEADER)
+    omega_message, _ = heartbeat_capnp(__FAKE_REQUEST_HEADER)
+    assert fake_router_sockets[0].recv_multipart() == [
+        b'SESSION_1', omega_message.to_bytes()]
+    assert fake_router_sockets[1].recv_multipart() == [
+        b'SESSION_2', omega_message.to_bytes()]
+
+    fake_router_sockets[0].send_multipart([b'SESSION_1', b'test1'])
+    fake_router_sockets[1].send_multipart([b'SESSION_2', b'test2'])
+    time.sleep(0.1)
+    assert sorted(collected_message_list, key=lambda x: x[1]) == [
+        (handler_1, b'test1'), (handler_2, b'test2')]
+
+
+@pytest.mark.test_id(2)
+def test_duplicate_session_ids(fake_zmq_context):
+    reactor = OmegaReactor(zmq_context=fake_zmq_context)
+    reactor.add_session(session_id='session',
+                        omega_endpoint=__OMEGA_ENDPOINT_1,
+                        response_handler=ResponseHandler())
+    # rejected before the reactor thread connected the first session
+    with pytest.raises(AssertionError):
+        reactor.add_session(session_id='session',
+                            omega_endpoint=__OMEGA_ENDPOINT_2,
+                            response_handler=ResponseHandler())
+    reactor.remove_session('session')
+    reactor.add_session(session_id='session',
+                        omega_endpoint=__OMEGA_ENDPOINT_2,
+                        response_handler=ResponseHandler())
+    assert [session is not None for _, session, _ in
+            list(reactor._outgoing_message_queue.queue)] == [True, False, True]
+
+
+@pytest.mark.test_id(3)
+def test_requests_are_sent_before_session_removal(fake_zmq_context,
+                                                   fake_router_sockets):
+    reactor = OmegaReactor(zmq_context=fake_zmq_context,
+                           polling_timeout_milli=10)
+    session = reactor.add_session(
+        'session', __OMEGA_ENDPOINT_1, ResponseHandler(),
+        omega_socket_identity=b'SESSION_3')
+    # e.g. a final cancel_all_orders queued right before the removal
+    session.send_heartbeat(request_header=__FAKE_REQUEST_HEADER)
+    reactor.remove_session('session')
+    reactor.start()
+    omega_message, _ = heartbeat_capnp(__FAKE_REQUEST_HEADER)
+    fake_router_sockets[0].RCVTIMEO = 1000
+    try:
+        assert fake_router_sockets[0].recv_multipart() == [
+            b'SESSION_3', omega_message.to_bytes()]
+    finally:
+        fake_router_sockets[0].RCVTIMEO = -1
+        reactor.cleanup()
+
+
+@pytest.mark.test_id(4)
+def test_calls_after_cleanup(fake_zmq_context):
+    reactor = OmegaReactor(zmq_context=fake_zmq_context,
+                           polling_timeout_milli=10)
+    reactor.start()
+    reactor.wait_until_running()
+    session = reactor.add_session(session_id='session',
+                                  omega_endpoint=__OMEGA_ENDPOINT_1,
+                                  response_handler=ResponseHandler())
+    reactor.cleanup()
+    # the wakeup pipe is closed, so these must not touch its fds
+    reactor.stop()
+    reactor.cleanup()
+    session.send_heartbeat(request_header=__FAKE_REQUEST_HEADER)
+    reactor.remove_session('session')
@@ -0,0 +1,214 @@
+from queue import Empty, Full
+from threading import Thread
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from omega_client.communication.priority_request_queue import \
+    BackpressurePolicy, PriorityRequestQueue, RequestLane
+
+
+def lane_of(item):
+    return item[0]
+
+
+@pytest.mark.test_id(1)
+def test_strict_priority():
+    queue = PriorityRequestQueue(classify=lane_of,
+                                 fence_keys=None)
+    queue.put((RequestLane.other, 'heartbeat'))
+    queue.put((RequestLane.place, 'place1'))
+    queue.put((RequestLane.replace, 'replace'))
+    queue.put((RequestLane.place, 'place2'))
+    queue.put((RequestLane.cancel, 'cancel'))
+    assert queue.qsize() == 5
+    assert queue.lane_depths() == {'cancel': 1, 'replace': 1, 'place': 2,
+                                   'other': 1}
+    assert [queue.get_nowait()[1] for _ in range(5)] == [
+        'cancel', 'replace', 'place1', 'place2', 'heartbeat']
+    assert queue.empty()
+    with pytest.raises(Empty):
+        queue.get_nowait()
+    with pytest.raises(Empty):
+        queue.get(timeout=0.01)
+
+
+@pytest.mark.test_id(2)
+def test_weighted_round_robin():
+    queue = PriorityRequestQueue(weights=(2, 1, 1, 1), classify=lane_of,
+                                 fence_keys=None)
+    for i in range(4):
+        queue.put((RequestLane.cancel, 'c{}'.format(i)))
+    queue.put((RequestLane.other, 'q0'))
+    queue.put((RequestLane.other, 'q1'))
+    assert [queue.get_nowait()[1] for _ in range(6)] == [
+        'c0', 'c1', 'q0', 'c2', 'c3', 'q1']
+
+
+LANES = {'replaceOrder': RequestLane.replace,
+         'cancelOrder': RequestLane.cancel,
+         'placeSingleOrder': RequestLane.place}
+
+
+def lane_of_request(item):
+    return LANES[item[0]]
+
+
+def key_of_request(item):
+    if item[0] == 'placeSingleOrder':
+        return None
+    return item[0], 'acct', item[1]
+
+
+@pytest.mark.test_id(3)
+def test_coalesce_replaces_and_cancels():
+    queue = PriorityRequestQueue(classify=lane_of_request, coalesce=True,
+                                 coalesce_key=key_of_request,
+                                 fence_keys=None)
+    queue.put(('replaceOrder', 'o1', 1.))
+    queue.put(('replaceOrder', 'o2', 1.))
+    queue.put(('replaceOrder', 'o1', 2.))
+    queue.put(('placeSingleOrder', None, 3.))
+    assert queue.qsize() == 3
+    queue.put(('cancelOrder', 'o2', None))
+    queue.put(('cancelOrder', 'o2', None))
+    queue.put(('replaceOrder', 'o2', 4.))
+    assert queue.qsize() == 3
+    assert queue.coalesced_count() == 4
+    assert queue.lane_depths() == {'cancel': 1, 'replace': 1, 'place': 1,
+                                   'other': 0}
+    assert [queue.get_nowait() for _ in range(3)] == [
+        ('cancelOrder', 'o2', None), ('replaceOrder', 'o1', 2.),
+        ('placeSingleOrder', None, 3.)]
+    # Once sent, requests for the same order are queued again.
+    queue.put(('replaceOrder', 'o1', 5.))
+    queue.put(('replaceOrder', 'o1', 6.))
+    assert queue.get_nowait() == ('replaceOrder', 'o1', 6.)
+    assert queue.empty()
+
+
+@pytest.mark.test_id(4)
+def test_bounded_reject_and_block():
+    queue = PriorityRequestQueue(classify=lane_of, fence_keys=None,
+                                 maxsize=1,
+                                 backpressure=BackpressurePolicy.reject)
+    queue.put((RequestLane.place, 'place1'))
+    with pytest.raises(Full):
+        queue.put((RequestLane.place, 'place2'))
+    # cancels are always accepted
+    queue.put((RequestLane.cancel, 'cancel'))
+    assert queue.qsize() == 2
+    queue.get_nowait()
+    queue.get_nowait()
+    # and do not take the room of other requests
+    queue.put((RequestLane.cancel, 'cancel'))
+    queue.put((RequestLane.place, 'place2'))
+    assert queue.qsize() == 2
+
+    queue = PriorityRequestQueue(classify=lane_of, fence_keys=None,
+                                 maxsize=1,
+                                 put_timeout=0.01)
+    queue.put((RequestLane.place, 'place1'))
+    with pytest.raises(Full):
+        queue.put((RequestLane.place, 'place2'))
+    with pytest.raises(Full):
+        queue.put_nowait((RequestLane.place, 'place2'))
+    assert queue.get_nowait() == (RequestLane.place, 'place1')
+    queue.put((RequestLane.place, 'place2'))
+    assert queue.qsize() == 1
+
+
+@pytest.mark.test_id(5)
+def test_bounded_drop_oldest():
+    queue = PriorityRequestQueue(classify=lane_of, fence_keys=None,
+                                 maxsize=2,
+                                 backpressure=BackpressurePolicy.drop_oldest)
+    queue.put((RequestLane.other, 'query'))
+    queue.put((RequestLane.place, 'place1'))
+    queue.put((RequestLane.place, 'place2'))
+    assert queue.dropped_count() == 1
+    assert queue.lane_depths() == {'cancel': 0, 'replace': 0, 'place': 2,
+                                   'other': 0}
+    queue = PriorityRequestQueue(classify=lane_of, fence_keys=None,
+                                 maxsize=1,
+                                 backpressure=BackpressurePolicy.drop_oldest)
+    queue.put((RequestLane.cancel, 'cancel1'))
+    queue.put((RequestLane.cancel, 'cancel2'))
+    # cancels do not count towards maxsize
+    queue.put((RequestLane.place, 'place1'))
+    assert queue.dropped_count() == 0
+    queue.put((RequestLane.place, 'place2'))
+    assert queue.dropped_count() == 1
+    assert queue.lane_depths() == {'cancel': 2, 'replace': 0, 'place': 1,
+                                   'other': 0}
+
+
+def fake_request(request_type, account_id=100):
+    body = SimpleNamespace(which=lambda: request_type)
+    setattr(body, request_type, SimpleNamespace(
+        accountInfo=SimpleNamespace(accountID=account_id)))
+    return SimpleNamespace(type=SimpleNamespace(
+        request=SimpleNamespace(body=body)))
+
+
+@pytest.mark.test_id(6)
+def test_cancel_all_orders_follows_earlier_places():
+    queue = PriorityRequestQueue(maxsize=3,
+                                 backpressure=BackpressurePolicy.reject)
+    place_1 = fake_request('placeSingleOrder')
+    place_2 = fake_request('placeSingleOrder', account_id=101)
+    cancel_all_1 = fake_request('cancelAllOrders')
+    cancel_all_2 = fake_request('cancelAllOrders', account_id=101)
+    cancel_all_3 = fake_request('cancelAllOrders', account_id=102)
+    query = fake_request('getServerTime')
+    for request in (query, place_1, cancel_all_1, place_2, cancel_all_3,
+                    cancel_all_2):
+        queue.put(request)
+    assert queue.lane_depths() == {'cancel': 1, 'replace': 0, 'place': 4,
+                                   'other': 1}
+    # cancelAllOrders queued behind places still count as cancels
+    with pytest.raises(Full):
+        queue.put(fake_request('placeSingleOrder'))
+    assert [queue.get_nowait() for _ in range(6)] == [
+        cancel_all_3, place_1, cancel_all_1, place_2, cancel_all_2, query]
+    # without unsent places of its account, a cancelAllOrders goes first
+    queue.put(query)
+    queue.put(cancel_all_1)
+    assert queue.get_nowait() is cancel_all_1
+
+
+@pytest.mark.test_id(7)
+def test_logon_follows_pending_logoff():
+    queue = PriorityRequestQueue()
+    query = fake_request('getServerTime')
+    logoff = fake_request('logoff')
+    logon = fake_request('logon')
+    place = fake_request('placeSingleOrder')
+    for request in (query, logoff, logon, place):
+        queue.put(request)
+    assert [queue.get_nowait() for _ in range(4)] == [
+        place, query, logoff, logon]
+    queue.put(query)
+    queue.put(logon)
+    assert queue.get_nowait() is logon
+
+
+@pytest.mark.test_id(8)
+def test_coalesce_after_waiting_for_room():
+    queue = PriorityRequestQueue(classify=lane_of_request, coalesce=True,
+                                 coalesce_key=key_of_request,
+                                 fence_keys=None, maxsize=1)
+    queue.put(('replaceOrder', 'o2', 1.))
+    waiting_put = Thread(target=queue.put, args=(('replaceOrder', 'o1', 2.),))
+    waiting_put.start()
+    time.sleep(0.05)
+    queue.put(('cancelOrder', 'o1', None))
+    # removes the replace of o2, which makes room for the waiting replace
+    queue.put(('cancelOrder', 'o2', None))
+    waiting_put.join(1.)
+    assert not waiting_put.is_alive()
+    # the waiting replace is dropped for the cancel queued meanwhile
+    assert [queue.get_nowait() for _ in range(2)] == [
+        ('cancelOrder', 'o1', None), ('cancelOrder', 'o2', None)]
+    assert queue.empty()
@@ -0,0 +1,102 @@
+from queue import Empty
+from types import SimpleNamespace
+
+import pytest
+
+from omega_client.communication.priority_request_queue import \
+    PriorityRequestQueue
+from omega_client.communication.rate_limiter import RequestRateLimiter, \
+    TokenBucket
+from omega_client.messaging.common_types import AccountInfo, \
+    ExchangePropertiesReport
+
+
+class FakeBody:
+    def __init__(self, request_type, account_id):
+        self._request_type = request_type
+        setattr(self, request_type, SimpleNamespace(
+            accountInfo=SimpleNamespace(accountID=account_id)))
+
+    def which(self):
+        return self._request_type
+
+
+def fake_request(request_type, account_id=100):
+    return SimpleNamespace(type=SimpleNamespace(request=SimpleNamespace(
+        body=FakeBody(request_type, account_id))))
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.mark.test_id(1)
+def test_token_bucket():
+    bucket = TokenBucket(rate=2., burst=2., now=0.)
+    assert bucket.delay(0.) == 0.
+    bucket.consume(0.)
+    bucket.consume(0.)
+    assert bucket.delay(0.) == pytest.approx(0.5)
+    bucket.consume(0.)
+    assert bucket.delay(0.) == pytest.approx(1.)
+    assert bucket.delay(1.) == 0.
+
+
+@pytest.mark.test_id(2)
+def test_account_and_exchange_limits():
+    clock = FakeClock()
+    limiter = RequestRateLimiter(clock=clock)
+    limiter.set_accounts([AccountInfo(100, exchange='kraken'),
+                          AccountInfo(101, exchange='kraken')])
+    limiter.set_exchange_limit('kraken', rate=1., burst=2.)
+    limiter.set_account_limit(101, rate=10., burst=1.)
+    assert limiter.acquire(fake_request('placeSingleOrder', 101)) == 0.
+    # account 101 is out of tokens
+    assert limiter.acquire(fake_request('placeSingleOrder', 101)) > 0.
+    assert limiter.acquire(fake_request('placeSingleOrder', 100)) == 0.
+    # kraken is out of tokens
+    assert limiter.acquire(fake_request('getOpenPositions', 100)) == \
+        pytest.approx(1.)
+    # cancels are never delayed
+    assert limiter.acquire(fake_request('cancelOrder', 100)) == 0.
+    assert limiter.acquire(fake_request('getOpenPositions', 100)) == \
+        pytest.approx(2.)
+    # requests without an account are not limited
+    assert limiter.acquire(fake_request('heartbeat', None)) == 0.
+    # unlimited accounts are not limited
+    assert limiter.acquire(fake_request('placeSingleOrder', 200)) == 0.
+    clock.now = 2.
+    assert limiter.acquire(fake_request('getOpenPositions', 100)) == 0.
+
+
+@pytest.mark.test_id(3)
+def test_configure_from_exchange_properties():
+    limiter = RequestRateLimiter(account_exchanges={100: 'kraken'},
+                                 clock=FakeClock())
+    limiter.configure_from_exchange_properties(ExchangePropertiesReport(
+        exchange='kraken', currencies=set(), symbol_properties=dict(),
+        time_in_forces=set(), order_types=set()))
+    for _ in range(15):
+        assert limiter.acquire(fake_request('placeSingleOrder')) == 0.
+    assert limiter.acquire(fake_request('placeSingleOrder')) > 0.
+
+
+@pytest.mark.test_id(4)
+def test_priority_queue_skips_rate_limited_lanes():
+    limiter = RequestRateLimiter(clock=FakeClock())
+    limiter.set_account_limit(100, rate=1., burst=1.)
+    queue = PriorityRequestQueue(rate_limiter=limiter)
+    place_1 = fake_request('placeSingleOrder')
+    place_2 = fake_request('placeSingleOrder')
+    query = fake_request('getServerTime', None)
+    for request in (place_1, place_2, query):
+        queue.put(request)
+    assert queue.get_nowait() is place_1
+    assert queue.get_nowait() is query
+    assert queue.qsize() == 1
+    with pytest.raises(Empty):
+        queue.get(timeout=0.01)
@@ -1,4 +1,5 @@
 from queue import Queue
+import time
 
 import capnp
 import pytest
@@ -6,7 +7,8 @@ import zmq
 
 import omega_protocol.Exchanges_capnp as exch_capnp
 import omega_protocol.TradeMessage_capnp as msgs_capnp
-from omega_client.communication.request_sender import RequestSender
+from omega_client.communication.request_sender import DEADLINE_FRAME, \
+    RequestSender
 from omega_client.messaging.common_types import AccountBalancesReport, \
     AccountCredentials, AccountDataReport, AccountInfo, AuthorizationRefresh, \
     CompletedOrdersReport, Exchange, ExchangePropertiesReport, LeverageType, \
@@ -97,7 +99,7 @@ def fake_request_sender(fake_zmq_context):
         zmq_endpoint=__FAKE_REQUEST_SENDER_CONNECTION_STR,
         outgoing_message_queue=queue
     )
-    request_sender._queue_message = lambda message: None
+    request_sender._queue_message = lambda message, deadline=None: None
     request_sender._access_token = __FAKE_ACCESS_TOKEN
     request_sender.start()
     yield request_sender
@@ -850,3 +852,21 @@ def test_omega_test_message(fake_request_sender):
         request_header=__FAKE_REQUEST_HEADER, test_message='test message')
     assert type(test) == capnp.lib.capnp._DynamicStructBuilder
     assert test.test.string == 'test message'
+
+
+@pytest.mark.test_id(31)
+def test_message_sending_with_deadline(fake_dealer_socket,
+                                       fake_request_sender_to_dealer):
+    omega_message, body = heartbeat_capnp(__FAKE_REQUEST_HEADER)
+    deadline = time.time() + 60.
+    fake_request_sender_to_dealer.send_heartbeat(__FAKE_REQUEST_HEADER,
+                                                 deadline=deadline)
+    received_message, deadline_frame = fake_dealer_socket.recv_multipart()
+    assert received_message == omega_message.to_bytes()
+    assert DEADLINE_FRAME.unpack(deadline_frame) == (deadline,)
+
+    # expired requests are dropped before they are sent
+    fake_request_sender_to_dealer.send_heartbeat(__FAKE_REQUEST_HEADER,
+                                                 deadline=time.time() - 1.)
+    fake_request_sender_to_dealer.send_heartbeat(__FAKE_REQUEST_HEADER)
+    assert fake_dealer_socket.recv_multipart() == [omega_message.to_bytes()]
@@ -0,0 +1,57 @@
+# pylint: disable=W0611
+import capnp
+# pylint: enable=W0611
+import pytest
+
+# pylint: disable=E0611
+# pylint: disable=E0401
+import omega_protocol.TradeMessage_capnp as msgs_capnp
+# pylint: enable=E0401
+# pylint: enable=E0611
+from omega_client.communication.response_lane import BackgroundResponseLane
+
+
+def fake_response_bytes(response_type, account_id=100):
+    omega_mess = msgs_capnp.TradeMessage.new_message()
+    response = omega_mess.init('type').init('response')
+    response.clientID = 123
+    response.senderCompID = str(987)
+    response.requestID = 100001
+    if response_type == 'heartbeat':
+        response.body.heartbeat = None
+    else:
+        response.body.init(response_type).accountInfo.accountID = account_id
+    return omega_mess.to_bytes()
+
+
+@pytest.mark.test_id(1)
+def test_route_by_response_type():
+    handled = []
+    lane = BackgroundResponseLane(handled.extend)
+    heartbeat = fake_response_bytes('heartbeat')
+    execution_report = fake_response_bytes('executionReport')
+    completed_orders = fake_response_bytes('completedOrdersReport')
+    assert lane.route([completed_orders, heartbeat, execution_report, b'']) \
+        == [heartbeat, execution_report, b'']
+
+    lane = BackgroundResponseLane(
+        handled.extend, fast_lane_response_types=['completedOrdersReport'])
+    assert lane.route([completed_orders, heartbeat]) == [completed_orders]
+
+
+@pytest.mark.test_id(2)
+def test_background_lane_handles_in_order():
+    handled = []
+    lane = BackgroundResponseLane(handled.extend, polling_timeout_milli=10,
+                                  conflate=True)
+    binary_msgs = [fake_response_bytes('accountBalancesReport', 100),
+                   fake_response_bytes('completedOrdersReport', 100),
+                   fake_response_bytes('accountBalancesReport', 101),
+                   fake_response_bytes('accountBalancesReport', 100)]
+    lane.put(binary_msgs[:2])
+    lane.put(binary_msgs[2:])
+    lane.start()
+    lane.stop()
+    lane.join()
+    assert not lane.is_running()
+    assert handled == binary_msgs[1:]
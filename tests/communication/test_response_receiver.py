@@ -276,6 +276,51 @@ def test_logon_ack_handling(fake_response_receiver_from_dealer,
     )
 
 
+@pytest.mark.test_id(7)
+def test_zero_copy_heartbeat_handling(fake_zmq_context,
+                                      fake_response_handler):
+    response_receiver = ResponseReceiver(
+        zmq_context=fake_zmq_context,
+        zmq_endpoint=__FAKE_DEALER_SOCKET_ENDPOINT,
+        response_handler=fake_response_handler,
+        zero_copy=True,
+        traversal_limit_in_words=2 ** 32 - 1,
+        nesting_limit=128)
+    omega_mess = msgs_capnp.TradeMessage.new_message()
+    heartbeat_resp = omega_mess.init('type').init('response')
+    heartbeat_resp.clientID = 123
+    heartbeat_resp.senderCompID = str(987)
+    heartbeat_resp.requestID = 100001
+    heartbeat_resp.init('body').heartbeat = None
+
+    response_receiver._handle_binary_omega_message(
+        zmq.Frame(omega_mess.to_bytes()).buffer)
+    assert fake_response_handler.message_list == [
+        ('heartbeat', 123, '987', 100001)]
+
+
+@pytest.mark.test_id(8)
+def test_batch_handling(fake_zmq_context, fake_response_handler):
+    response_receiver = ResponseReceiver(
+        zmq_context=fake_zmq_context,
+        zmq_endpoint=__FAKE_DEALER_SOCKET_ENDPOINT,
+        response_handler=fake_response_handler,
+        batch_size=16)
+    binary_msgs = []
+    for request_id in (100001, 100002):
+        omega_mess = msgs_capnp.TradeMessage.new_message()
+        heartbeat_resp = omega_mess.init('type').init('response')
+        heartbeat_resp.clientID = 123
+        heartbeat_resp.senderCompID = str(987)
+        heartbeat_resp.requestID = request_id
+        heartbeat_resp.init('body').heartbeat = None
+        binary_msgs.append(omega_mess.to_bytes())
+
+    response_receiver._handle_binary_omega_messages(binary_msgs)
+    assert fake_response_handler.message_list == [
+        ('heartbeat', 123, '987', 100001), ('heartbeat', 123, '987', 100002)]
+
+
 # TODO: complete mock response handler tests
 # TODO: integrate message receiving and handling to perform a full loop
 
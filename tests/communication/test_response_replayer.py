@@ -0,0 +1,85 @@
+import time
+
+import pytest
+import zmq
+
+from omega_client.communication.frame_journal import FrameJournalWriter, \
+    read_frame_journal
+from omega_client.communication.response_receiver import ResponseReceiver
+from omega_client.communication.response_replayer import ResponseReplayer
+from omega_client.messaging.response_handler import ResponseHandler
+
+__FAKE_DEALER_SOCKET_ENDPOINT = 'inproc://FAKE_REPLAY_DEALER_SOCKET'
+
+
+@pytest.fixture(scope="session")
+def fake_zmq_context():
+    zmq_context = zmq.Context.instance()
+    yield zmq_context
+
+
+@pytest.fixture(scope="function")
+def fake_response_receiver(fake_zmq_context):
+    response_receiver = ResponseReceiver(
+        zmq_context=fake_zmq_context,
+        zmq_endpoint=__FAKE_DEALER_SOCKET_ENDPOINT,
+        response_handler=ResponseHandler()
+    )
+    yield response_receiver
+
+
+@pytest.fixture(scope="function")
+def fake_journal_path(tmpdir):
+    path = str(tmpdir.join('frames.journal'))
+    journal = FrameJournalWriter(path)
+    for x in range(6):
+        journal.write(b'test' + bytes([x]), timestamp=1000. + 0.01 * x)
+    journal.close()
+    yield path
+
+
+@pytest.mark.test_id(1)
+def test_frame_journal_round_trip(fake_journal_path):
+    records = list(read_frame_journal(fake_journal_path))
+    assert len(records) == 6
+    for x in range(6):
+        assert records[x] == (1000. + 0.01 * x, b'test' + bytes([x]))
+
+
+@pytest.mark.test_id(2)
+def test_replay_as_fast_as_possible(monkeypatch,
+                                    fake_response_receiver,
+                                    fake_journal_path):
+    collected_message_list = list()
+
+    def mock_handle_message(message):
+        collected_message_list.append(message)
+
+    monkeypatch.setattr(fake_response_receiver,
+                        '_handle_binary_omega_message',
+                        mock_handle_message)
+
+    replayer = ResponseReplayer(fake_response_receiver)
+    assert replayer.replay_journal(fake_journal_path) == 6
+    assert collected_message_list == [b'test' + bytes([x]) for x in range(6)]
+
+
+@pytest.mark.test_id(3)
+def test_replay_real_time_scaled(monkeypatch,
+                                 fake_response_receiver,
+                                 fake_journal_path):
+    collected_message_list = list()
+
+    def mock_handle_message(message):
+        collected_message_list.append(message)
+
+    monkeypatch.setattr(fake_response_receiver,
+                        '_handle_binary_omega_message',
+                        mock_handle_message)
+
+    replayer = ResponseReplayer(fake_response_receiver)
+    start = time.perf_counter()
+    assert replayer.replay_journal(fake_journal_path, speed=0.5) == 6
+    # 50ms of recorded traffic at half speed takes at least 100ms.
+    assert time.perf_counter() - start >= 0.1
+    assert len(collected_message_list) == 6
@@ -47,7 +47,7 @@ def fake_request_sender(fake_zmq_context):
         client_id=TEST_CLIENT_ID,
         sender_comp_id=TEST_SENDER_COMP_ID
     )
-    request_sender._queue_message = lambda message: None
+    request_sender._queue_message = lambda message, deadline=None: None
     request_sender._request_header = __FAKE_REQUEST_HEADER
     request_sender.start()
     yield request_sender
@@ -397,3 +397,23 @@ def test_send_test_message(fake_request_sender):
     )
     assert type(test) == capnp.lib.capnp._DynamicStructBuilder
     assert test.test.string == 'test message'
+
+
+@pytest.mark.test_id(19)
+def test_requests_forward_deadline(fake_zmq_context):
+    request_sender = SingleClientRequestSender(
+        zmq_context=fake_zmq_context,
+        zmq_endpoint=__FAKE_REQUEST_SENDER_CONNECTION_STR,
+        client_id=TEST_CLIENT_ID,
+        sender_comp_id=TEST_SENDER_COMP_ID
+    )
+    queued = list()
+    request_sender._request_sender._queue_message = (
+        lambda message, deadline=None: queued.append(
+            (message.type.request.body.which(), deadline)))
+    request_sender.send_heartbeat(deadline=1234.5)
+    request_sender.cancel_order(account_info=AccountInfo(account_id=100),
+                                order_id='c137', deadline=1235.)
+    request_sender.request_server_time()
+    assert queued == [('heartbeat', 1234.5), ('cancelOrder', 1235.),
+                      ('getServerTime', None)]
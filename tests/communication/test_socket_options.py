@@ -0,0 +1,16 @@
+import pytest
+import zmq
+
+from omega_client.communication.socket_options import SocketOptions
+
+
+@pytest.mark.test_id(1)
+def test_apply_socket_options():
+    context = zmq.Context.instance()
+    socket = context.socket(zmq.DEALER)
+    default_rcvhwm = socket.getsockopt(zmq.RCVHWM)
+    SocketOptions(sndhwm=10, sndbuf=65536).apply(socket)
+    assert socket.getsockopt(zmq.SNDHWM) == 10
+    assert socket.getsockopt(zmq.SNDBUF) == 65536
+    assert socket.getsockopt(zmq.RCVHWM) == default_rcvhwm
+    socket.close()
@@ -0,0 +1,51 @@
+import os
+
+import pytest
+
+from omega_client.communication import wait_strategy as ws
+from omega_client.communication.wait_strategy import BlockingWaitStrategy, \
+    BusySpinWaitStrategy, SpinSleepWaitStrategy, SpinYieldWaitStrategy, \
+    set_thread_cpu_affinity
+
+
+@pytest.mark.test_id(1)
+def test_poll_timeouts():
+    assert BlockingWaitStrategy().IS_BLOCKING
+    assert BlockingWaitStrategy().poll_timeout_milli(1000) == 1000
+    for strategy in (BusySpinWaitStrategy(), SpinYieldWaitStrategy(),
+                     SpinSleepWaitStrategy()):
+        assert not strategy.IS_BLOCKING
+        assert strategy.poll_timeout_milli(1000) == 0
+
+
+@pytest.mark.test_id(2)
+def test_spin_yield_yields_after_spin_count(monkeypatch):
+    yields = list()
+    monkeypatch.setattr(ws, '_yield_cpu', lambda: yields.append(1))
+    strategy = SpinYieldWaitStrategy(spin_count=3)
+    for idle_count in range(1, 6):
+        strategy.idle(idle_count)
+    assert len(yields) == 2
+
+
+@pytest.mark.test_id(3)
+def test_spin_sleep_sleeps_after_spin_count(monkeypatch):
+    sleeps = list()
+    monkeypatch.setattr(ws.time, 'sleep', sleeps.append)
+    strategy = SpinSleepWaitStrategy(spin_count=2, sleep_seconds=1e-4)
+    for idle_count in range(1, 6):
+        strategy.idle(idle_count)
+    assert sleeps == [1e-4] * 3
+
+
+@pytest.mark.test_id(4)
+@pytest.mark.skipif(not hasattr(os, 'sched_setaffinity'),
+                    reason='CPU affinity is not supported on this platform.')
+def test_set_thread_cpu_affinity():
+    original_affinity = os.sched_getaffinity(0)
+    cpu = min(original_affinity)
+    try:
+        set_thread_cpu_affinity([cpu])
+        assert os.sched_getaffinity(0) == {cpu}
+    finally:
+        os.sched_setaffinity(0, original_affinity)
@@ -0,0 +1,123 @@
+import sys
+import types
+
+# pylint: disable=W0611
+import capnp
+# pylint: enable=W0611
+import pytest
+
+# pylint: disable=E0611
+# pylint: disable=E0401
+import omega_protocol.TradeMessage_capnp as msgs_capnp
+# pylint: enable=E0401
+# pylint: enable=E0611
+from omega_client import messaging
+from omega_client.messaging.codegen import GENERATED_MODULE, \
+    load_generated_decoders, schema_hash
+from omega_client.messaging.response_unpacker import unpack_response
+
+decoders = load_generated_decoders()
+
+
+def fake_response():
+    omega_mess = msgs_capnp.TradeMessage.new_message()
+    response = omega_mess.init('type').init('response')
+    response.clientID = 123
+    response.senderCompID = str(987)
+    response.requestID = 100001
+    return omega_mess, response
+
+
+def expected_unpack(omega_mess):
+    response = omega_mess.as_reader().type.response
+    response_type = response.body.which()
+    return response_type, unpack_response(response_type, response)
+
+
+@pytest.mark.test_id(1)
+def test_unpack_execution_report():
+    omega_mess, response = fake_response()
+    er = response.body.init('executionReport')
+    er.orderID = 'c137'
+    er.clientOrderID = str(123456789000000)
+    er.exchangeOrderID = 'c137'
+    account = er.init('accountInfo')
+    account.accountID = 101
+    er.symbol = 'ETH-USD'
+    er.side = 'buy'
+    er.orderType = 'limit'
+    er.quantity = 1.1
+    er.price = 512.0
+    er.timeInForce = 'gtc'
+    er.orderStatus = 'adopted'
+    er.fee = 14.15
+    er.creationTime = 1551761395.0
+    er.subOrderIDs = ['c138', 'c139']
+    er.rejectionReason.code = 0
+    er.rejectionReason.body = '<NONE>'
+    er.executionType = 'statusUpdate'
+    assert decoders.unpack_frame(omega_mess.to_bytes()) == \
+        expected_unpack(omega_mess)
+
+
+@pytest.mark.test_id(2)
+def test_unpack_reports_and_acks():
+    omega_mess, response = fake_response()
+    report = response.body.init('accountBalancesReport')
+    report.accountInfo.accountID = 100
+    balances = report.init('balances', 2)
+    balances[0].currency = 'ETH'
+    balances[0].fullBalance = 1.2
+    balances[1].currency = 'USD'
+    balances[1].availableBalance = 512.
+    assert decoders.unpack_frame(omega_mess.to_bytes()) == \
+        expected_unpack(omega_mess)
+
+    omega_mess, response = fake_response()
+    logoff_ack = response.body.init('logoffAck')
+    logoff_ack.success = True
+    logoff_ack.message.body = 'Logged out.'
+    assert decoders.unpack_frame(omega_mess.to_bytes()) == \
+        expected_unpack(omega_mess)
+
+
+@pytest.mark.test_id(3)
+def test_unpack_heartbeat_server_time_and_request():
+    omega_mess, response = fake_response()
+    response.body.heartbeat = None
+    assert decoders.unpack_frame(omega_mess.to_bytes()) == \
+        ('heartbeat', (123, '987', 100001))
+
+    response.body.serverTime = 1551761395.
+    assert decoders.unpack_frame(omega_mess.to_bytes()) == \
+        ('serverTime', (1551761395., 123, '987', 100001))
+
+    omega_mess = msgs_capnp.TradeMessage.new_message()
+    omega_mess.init('type').init('request').body.heartbeat = None
+    assert decoders.unpack_frame(omega_mess.to_bytes()) == (None, None)
+
+
+@pytest.mark.test_id(4)
+def test_stale_generated_decoders_are_regenerated(monkeypatch):
+    schema = msgs_capnp.TradeMessage.schema
+    assert decoders.SCHEMA_ID == schema.node.id
+    assert decoders.SCHEMA_HASH == schema_hash(schema)
+
+    current = types.ModuleType(GENERATED_MODULE)
+    current.SCHEMA_ID = decoders.SCHEMA_ID
+    current.SCHEMA_HASH = decoders.SCHEMA_HASH
+    monkeypatch.setattr(messaging, 'generated_decoders', current,
+                        raising=False)
+    monkeypatch.setitem(sys.modules, GENERATED_MODULE, current)
+    assert load_generated_decoders() is current
+
+    # e.g. generated before the omega_protocol submodule was bumped
+    stale = types.ModuleType(GENERATED_MODULE)
+    stale.__file__ = 'generated_decoders.py'
+    stale.SCHEMA_ID = decoders.SCHEMA_ID
+    stale.SCHEMA_HASH = '0' * 64
+    monkeypatch.setattr(messaging, 'generated_decoders', stale)
+    monkeypatch.setitem(sys.modules, GENERATED_MODULE, stale)
+    regenerated = load_generated_decoders()
+    assert regenerated is not stale
+    assert regenerated.SCHEMA_HASH == decoders.SCHEMA_HASH
@@ -0,0 +1,80 @@
+# pylint: disable=W0611
+import capnp
+# pylint: enable=W0611
+import pytest
+
+# pylint: disable=E0611
+# pylint: disable=E0401
+import omega_protocol.TradeMessage_capnp as msgs_capnp
+# pylint: enable=E0401
+# pylint: enable=E0611
+
+# numpy is only installed with the dataframe extra.
+pytest.importorskip('numpy')
+# pylint: disable=C0413
+from omega_client.messaging.columnar import ORDER_DTYPE, \
+    frame_orders_to_array, to_dataframe
+# pylint: enable=C0413
+
+
+def fake_orders_report_bytes(order_count,
+                             response_type='completedOrdersReport'):
+    omega_mess = msgs_capnp.TradeMessage.new_message()
+    response = omega_mess.init('type').init('response')
+    response.clientID = 123
+    response.senderCompID = str(987)
+    response.requestID = 100001
+    report = response.body.init(response_type)
+    report.accountInfo.accountID = 100
+    orders = report.init('orders', order_count)
+    for i, order in enumerate(orders):
+        order.orderID = 'c{}'.format(137 + i)
+        order.clientOrderID = 'x{}'.format(i)
+        order.accountInfo.accountID = 100 + i
+        order.symbol = 'BTC/USD'
+        order.side = 'sell' if i % 2 else 'buy'
+        order.orderType = 'limit'
+        order.quantity = 1.1 + i
+        order.price = 6500. + i
+        order.orderStatus = 'filled'
+        order.filledQuantity = 1.1 + i
+        order.fee = 0.01
+        order.executionType = 'statusUpdate'
+    return omega_mess.to_bytes()
+
+
+@pytest.mark.test_id(1)
+def test_completed_orders_to_array():
+    orders = frame_orders_to_array(fake_orders_report_bytes(3))
+    assert orders.dtype == ORDER_DTYPE
+    assert list(orders['order_id']) == ['c137', 'c138', 'c139']
+    assert list(orders['client_order_id']) == ['x0', 'x1', 'x2']
+    assert list(orders['exchange_order_id']) == ['', '', '']
+    assert list(orders['account_id']) == [100, 101, 102]
+    assert list(orders['side']) == ['buy', 'sell', 'buy']
+    assert list(orders['order_type']) == ['limit'] * 3
+    assert list(orders['order_status']) == ['filled'] * 3
+    assert list(orders['execution_report_type']) == ['statusUpdate'] * 3
+    assert orders['quantity'].tolist() == pytest.approx([1.1, 2.1, 3.1])
+    assert orders['price'].tolist() == pytest.approx([6500., 6501., 6502.])
+    assert orders['filled_quantity'].tolist() == pytest.approx(
+        [1.1, 2.1, 3.1])
+    assert orders['stop_price'].tolist() == [0., 0., 0.]
+    assert orders['fee'].sum() == pytest.approx(0.03)
+
+
+@pytest.mark.test_id(2)
+def test_working_orders_and_other_responses():
+    orders = frame_orders_to_array(
+        fake_orders_report_bytes(2, 'workingOrdersReport'))
+    assert list(orders['order_id']) == ['c137', 'c138']
+    assert len(frame_orders_to_array(fake_orders_report_bytes(0))) == 0
+
+    omega_mess = msgs_capnp.TradeMessage.new_message()
+    omega_mess.init('type').init('response').body.heartbeat = None
+    assert frame_orders_to_array(omega_mess.to_bytes()) is None
+
+    pytest.importorskip('pandas')
+    data_frame = to_dataframe(orders)
+    assert list(data_frame.columns) == list(ORDER_DTYPE.names)
+    assert list(data_frame['side']) == ['buy', 'sell']
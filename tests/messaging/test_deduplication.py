@@ -0,0 +1,73 @@
+# pylint: disable=W0611
+import capnp
+# pylint: enable=W0611
+import pytest
+
+# pylint: disable=E0611
+# pylint: disable=E0401
+import omega_protocol.TradeMessage_capnp as msgs_capnp
+# pylint: enable=E0401
+# pylint: enable=E0611
+from omega_client.messaging.deduplication import \
+    ExecutionReportDeduplicator
+
+
+def fake_execution_report_bytes(order_id, order_status='working',
+                                filled_quantity=0.,
+                                execution_type='statusUpdate'):
+    omega_mess = msgs_capnp.TradeMessage.new_message()
+    response = omega_mess.init('type').init('response')
+    response.clientID = 123
+    response.senderCompID = str(987)
+    response.requestID = 100001
+    er = response.body.init('executionReport')
+    er.orderID = order_id
+    er.orderStatus = order_status
+    er.filledQuantity = filled_quantity
+    er.executionType = execution_type
+    return omega_mess.to_bytes()
+
+
+@pytest.mark.test_id(1)
+def test_duplicate_execution_reports():
+    deduplicator = ExecutionReportDeduplicator()
+    binary_msgs = [
+        fake_execution_report_bytes('c137'),
+        fake_execution_report_bytes('c137'),
+        fake_execution_report_bytes('c137', order_status='partiallyFilled',
+                                    filled_quantity=0.5),
+        fake_execution_report_bytes('c138'),
+        fake_execution_report_bytes('c137', order_status='partiallyFilled',
+                                    filled_quantity=0.5)]
+    assert deduplicator.filter(binary_msgs) == [
+        binary_msgs[0], binary_msgs[2], binary_msgs[3]]
+    assert deduplicator.duplicate_count == 2
+
+    omega_mess = msgs_capnp.TradeMessage.new_message()
+    omega_mess.init('type').init('response').body.heartbeat = None
+    assert not deduplicator.is_duplicate(omega_mess.to_bytes())
+    assert not deduplicator.is_duplicate(omega_mess.to_bytes())
+
+
+@pytest.mark.test_id(2)
+def test_bounded_lru():
+    deduplicator = ExecutionReportDeduplicator(max_size=2)
+    for order_id in ('c137', 'c138', 'c139'):
+        assert not deduplicator.is_duplicate(
+            fake_execution_report_bytes(order_id))
+    assert len(deduplicator) == 2
+    assert not deduplicator.is_duplicate(fake_execution_report_bytes('c137'))
+    assert deduplicator.is_duplicate(fake_execution_report_bytes('c139'))
+
+
+@pytest.mark.test_id(3)
+def test_return_to_earlier_state_is_not_duplicate():
+    deduplicator = ExecutionReportDeduplicator()
+    replace_reports = [
+        fake_execution_report_bytes('c137', order_status='pendingReplace'),
+        fake_execution_report_bytes('c137', order_status='replaced',
+                                    execution_type='orderReplaced')]
+    binary_msgs = replace_reports + replace_reports + replace_reports[-1:]
+    assert deduplicator.filter(binary_msgs) == binary_msgs[:4]
+    assert deduplicator.duplicate_count == 1
+    assert len(deduplicator) == 1
@@ -0,0 +1,94 @@
+import struct
+
+# pylint: disable=W0611
+import capnp
+# pylint: enable=W0611
+import pytest
+
+# pylint: disable=E0611
+# pylint: disable=E0401
+import omega_protocol.TradeMessage_capnp as msgs_capnp
+# pylint: enable=E0401
+# pylint: enable=E0611
+from omega_client.messaging.common_types import ResponseHeader
+from omega_client.messaging.header_peek import conflate_snapshots, \
+    peek_response_header, peek_snapshot_key, ResponseFilter
+
+
+def fake_response_bytes(response_type='heartbeat'):
+    omega_mess = msgs_capnp.TradeMessage.new_message()
+    response = omega_mess.init('type').init('response')
+    response.clientID = 123
+    response.senderCompID = str(987)
+    response.requestID = 100001
+    body = response.init('body')
+    if response_type == 'heartbeat':
+        body.heartbeat = None
+    else:
+        body.init(response_type)
+    return omega_mess.to_bytes()
+
+
+@pytest.mark.test_id(1)
+def test_peek_response_header():
+    for response_type in ('heartbeat', 'executionReport',
+                          'accountBalancesReport'):
+        assert peek_response_header(
+            fake_response_bytes(response_type)) == ResponseHeader(
+                client_id=123,
+                sender_comp_id='987',
+                request_id=100001,
+                response_type=response_type)
+
+
+@pytest.mark.test_id(2)
+def test_peek_request_and_invalid_bytes():
+    omega_mess = msgs_capnp.TradeMessage.new_message()
+    request = omega_mess.init('type').init('request')
+    request.clientID = 123
+    request.body.heartbeat = None
+    assert peek_response_header(omega_mess.to_bytes()) is None
+    assert peek_response_header(b'') is None
+    assert peek_response_header(fake_response_bytes()[:-8]) is None
+    # a single far root pointer whose landing pad is itself
+    far_pointer = struct.pack('<Q', 2 | 1 << 3)
+    assert peek_response_header(struct.pack('<II', 0, 2) + far_pointer * 2) \
+        is None
+
+
+@pytest.mark.test_id(3)
+def test_response_filter():
+    header = peek_response_header(fake_response_bytes('executionReport'))
+    assert ResponseFilter()(header)
+    assert ResponseFilter(client_ids=[123])(header)
+    assert not ResponseFilter(client_ids=[124])(header)
+    assert ResponseFilter(response_types=['executionReport'])(header)
+    assert not ResponseFilter(client_ids=[123],
+                              response_types=['heartbeat'])(header)
+
+
+def fake_report_bytes(response_type, account_id, client_id=123):
+    omega_mess = msgs_capnp.TradeMessage.new_message()
+    response = omega_mess.init('type').init('response')
+    response.clientID = client_id
+    response.body.init(response_type).accountInfo.accountID = account_id
+    return omega_mess.to_bytes()
+
+
+@pytest.mark.test_id(4)
+def test_conflate_snapshots():
+    assert peek_snapshot_key(fake_report_bytes(
+        'accountBalancesReport', 100)) == ('accountBalancesReport', 123, 100)
+    assert peek_snapshot_key(fake_report_bytes(
+        'executionReport', 100)) is None
+
+    binary_msgs = [
+        fake_report_bytes('accountBalancesReport', 100),
+        fake_report_bytes('executionReport', 100),
+        fake_report_bytes('accountBalancesReport', 101),
+        fake_report_bytes('openPositionsReport', 100),
+        fake_report_bytes('accountBalancesReport', 100, client_id=124),
+        fake_report_bytes('executionReport', 100),
+        fake_report_bytes('accountBalancesReport', 100)]
+    assert conflate_snapshots(binary_msgs) == binary_msgs[1:]
+    assert conflate_snapshots(binary_msgs[:4]) == binary_msgs[:4]
@@ -0,0 +1,82 @@
+# pylint: disable=W0611
+import capnp
+# pylint: enable=W0611
+import pytest
+
+# pylint: disable=E0611
+# pylint: disable=E0401
+import omega_protocol.TradeMessage_capnp as msgs_capnp
+# pylint: enable=E0401
+# pylint: enable=E0611
+from omega_client.messaging.raw_response_handler import RawResponseHandler
+
+
+class FakeRawResponseHandler(RawResponseHandler):
+    def __init__(self, enforce_lifetime=True):
+        self.message_list = list()
+        self.reports = list()
+        super().__init__(enforce_lifetime=enforce_lifetime)
+
+    def on_exec_report_raw(self,
+                           report,
+                           client_id: int,
+                           sender_comp_id: str,
+                           request_id: int):
+        self.reports.append(report)
+        self.message_list.append((report.orderID,
+                                  report.accountInfo.accountID,
+                                  client_id, sender_comp_id, request_id))
+
+
+def fake_execution_report_response():
+    omega_mess = msgs_capnp.TradeMessage.new_message()
+    response = omega_mess.init('type').init('response')
+    response.clientID = 123
+    response.senderCompID = str(987)
+    response.requestID = 100001
+    er = response.init('body').init('executionReport')
+    er.orderID = 'c137'
+    er.init('accountInfo').accountID = 101
+    return omega_mess.type.response
+
+
+@pytest.mark.test_id(1)
+def test_raw_callback_receives_reader():
+    handler = FakeRawResponseHandler()
+    assert handler.is_subscribed('executionReport')
+    assert not handler.is_subscribed('heartbeat')
+    handler.dispatch_response(fake_execution_report_response())
+    assert handler.message_list == [('c137', 101, 123, '987', 100001)]
+
+
+@pytest.mark.test_id(2)
+def test_reader_is_invalid_after_callback():
+    handler = FakeRawResponseHandler()
+    handler.dispatch_response(fake_execution_report_response())
+    with pytest.raises(ReferenceError):
+        _ = handler.reports[0].orderID
+
+    handler = FakeRawResponseHandler(enforce_lifetime=False)
+    handler.dispatch_response(fake_execution_report_response())
+    assert handler.reports[0].orderID == 'c137'
+
+
+@pytest.mark.test_id(3)
+def test_scoped_enums_and_nested_structs():
+    response = fake_execution_report_response()
+    response.body.executionReport.side = 'sell'
+    response.body.executionReport.init('rejectionReason').body = 'rejected'
+    values = list()
+
+    class EnumRawResponseHandler(FakeRawResponseHandler):
+        def on_exec_report_raw(self,
+                               report,
+                               client_id: int,
+                               sender_comp_id: str,
+                               request_id: int):
+            values.extend([report.side, str(report.side),
+                           bool(report.rejectionReason),
+                           report.rejectionReason.body])
+
+    EnumRawResponseHandler().dispatch_response(response)
+    assert values == ['sell', 'sell', True, 'rejected']
@@ -0,0 +1,150 @@
+# pylint: disable=W0611
+import capnp
+# pylint: enable=W0611
+import pytest
+
+# pylint: disable=E0611
+# pylint: disable=E0401
+import omega_protocol.TradeMessage_capnp as msgs_capnp
+# pylint: enable=E0401
+# pylint: enable=E0611
+from omega_client.messaging.response_handler import ResponseHandler
+from omega_client.messaging.single_client_response_handler import \
+    SingleClientResponseHandler
+
+
+class FakeHeartbeatHandler(ResponseHandler):
+    def __init__(self, message_list, subscriptions=None):
+        self.message_list = message_list
+        super().__init__(subscriptions=subscriptions)
+
+    def on_heartbeat(self,
+                     client_id: int,
+                     sender_comp_id: str,
+                     request_id: int):
+        self.message_list.append(
+            ('heartbeat', client_id, sender_comp_id, request_id))
+
+
+def fake_response():
+    omega_mess = msgs_capnp.TradeMessage.new_message()
+    response = omega_mess.init('type').init('response')
+    response.clientID = 123
+    response.senderCompID = '987'
+    response.requestID = 100001
+    response.body.heartbeat = None
+    return omega_mess.type.response
+
+
+@pytest.mark.test_id(1)
+def test_overridden_callbacks_are_subscribed():
+    message_list = []
+    handler = FakeHeartbeatHandler(message_list)
+    assert handler.is_subscribed('heartbeat')
+    assert not handler.is_subscribed('accountDataReport')
+
+    handler.handle_response('accountDataReport', fake_response())
+    handler.handle_response('openPositionsReport', fake_response())
+    assert message_list == []
+
+    handler.handle_response('heartbeat', fake_response())
+    assert message_list == [('heartbeat', 123, '987', 100001)]
+
+
+@pytest.mark.test_id(2)
+def test_explicit_subscriptions():
+    message_list = []
+    handler = FakeHeartbeatHandler(message_list, subscriptions=['system'])
+    assert not handler.is_subscribed('heartbeat')
+    assert handler.is_subscribed('system')
+
+    handler.handle_response('heartbeat', fake_response())
+    assert message_list == []
+
+    with pytest.raises(AssertionError):
+        FakeHeartbeatHandler(message_list, subscriptions=['notAResponse'])
+
+
+@pytest.mark.test_id(3)
+def test_dispatch_response_by_discriminant():
+    message_list = []
+    handler = FakeHeartbeatHandler(message_list)
+    response = fake_response()
+    handler.dispatch_response(response)
+    assert message_list == [('heartbeat', 123, '987', 100001)]
+
+    response.body.serverTime = 1551761395.
+    handler.dispatch_response(response)
+    assert len(message_list) == 1
+
+
+class FakeBatchingHandler(FakeHeartbeatHandler):
+    def on_exec_reports(self, batch):
+        self.message_list.append(
+            ('execution_reports', [(report.order_id, client_id, request_id)
+                                   for report, client_id, _, request_id
+                                   in batch]))
+
+
+def fake_execution_report(order_id):
+    omega_mess = msgs_capnp.TradeMessage.new_message()
+    response = omega_mess.init('type').init('response')
+    response.clientID = 123
+    response.senderCompID = '987'
+    response.requestID = 100001
+    response.body.init('executionReport').orderID = order_id
+    return omega_mess.type.response
+
+
+@pytest.mark.test_id(4)
+def test_dispatch_responses_batches_execution_reports():
+    message_list = []
+    handler = FakeBatchingHandler(message_list)
+    assert handler.is_subscribed('executionReport')
+    handler.dispatch_responses([
+        fake_execution_report('c137'), fake_execution_report('c138'),
+        fake_response(), fake_execution_report('c139')])
+    assert message_list == [
+        ('execution_reports', [('c137', 123, 100001), ('c138', 123, 100001)]),
+        ('heartbeat', 123, '987', 100001),
+        ('execution_reports', [('c139', 123, 100001)])]
+
+    message_list.clear()
+    FakeHeartbeatHandler(message_list).dispatch_responses(
+        [fake_execution_report('c140'), fake_response()])
+    assert message_list == [('heartbeat', 123, '987', 100001)]
+
+
+@pytest.mark.test_id(5)
+def test_dispatch_response_passes_single_reports_to_on_exec_reports():
+    message_list = []
+    handler = FakeBatchingHandler(message_list)
+    handler.dispatch_response(fake_execution_report('c137'))
+    handler.dispatch_response(fake_execution_report('c138'))
+    assert message_list == [
+        ('execution_reports', [('c137', 123, 100001)]),
+        ('execution_reports', [('c138', 123, 100001)])]
+
+
+class FakeSingleClientBatchingHandler(SingleClientResponseHandler):
+    def __init__(self, message_list):
+        self.message_list = message_list
+        super().__init__()
+
+    def on_exec_reports(self, batch):
+        self.message_list.append(
+            ('execution_reports', [report.order_id
+                                   for report, _, _, _ in batch]))
+
+
+@pytest.mark.test_id(6)
+def test_single_client_handler_passes_single_reports_to_on_exec_reports():
+    message_list = []
+    handler = FakeSingleClientBatchingHandler(message_list)
+    assert handler.is_subscribed('executionReport')
+    assert handler.is_subscribed('logonAck')
+    assert handler.is_subscribed('authorizationGrant')
+    assert not handler.is_subscribed('heartbeat')
+    handler.dispatch_response(fake_execution_report('c137'))
+    handler.dispatch_response(fake_response())
+    assert message_list == [('execution_reports', ['c137'])]
@@ -0,0 +1,110 @@
+import pytest
+
+from omega_client.messaging.common_types import AccountBalancesReport, \
+    AccountDataReport, AccountInfo, Balance, ExecutionReport, \
+    WorkingOrdersReport
+from omega_client.portfolio.balance_ledger import BalanceLedger
+
+
+def fake_execution_report(side='buy', order_status='partiallyFilled',
+                          filled_quantity=0., avg_fill_price=0., fee=0.,
+                          order_id='c137', account_id=100):
+    return ExecutionReport(
+        order_id=order_id,
+        client_order_id='123',
+        exchange_order_id='c137',
+        account_info=AccountInfo(account_id=account_id),
+        order_class='simple',
+        contingent_type='none',
+        symbol='BTC/USD',
+        side=side,
+        order_type='limit',
+        quantity=2.,
+        price=100.,
+        stop_price=0.,
+        time_in_force='gtc',
+        expire_at=0.,
+        leverage_type='none',
+        leverage=0.,
+        order_status=order_status,
+        filled_quantity=filled_quantity,
+        avg_fill_price=avg_fill_price,
+        fee=fee,
+        creation_time=1551761395.,
+        submission_time=1551761395.,
+        completion_time=0.,
+        execution_report_type='trade')
+
+
+def fake_snapshot(btc, usd, account_id=100):
+    return AccountBalancesReport(
+        account_info=AccountInfo(account_id=account_id),
+        balances=[Balance('BTC', btc, btc), Balance('USD', usd, usd)])
+
+
+@pytest.mark.test_id(1)
+def test_apply_fills_to_snapshot():
+    ledger = BalanceLedger()
+    ledger.apply_balances_snapshot(fake_snapshot(1., 1000.))
+    ledger.apply_execution_report(fake_execution_report(
+        filled_quantity=1., avg_fill_price=100., fee=1.))
+    ledger.apply_execution_report(fake_execution_report(
+        order_status='filled', filled_quantity=2., avg_fill_price=110.,
+        fee=2.))
+    assert ledger.balance(100, 'BTC') == Balance('BTC', 3., 3.)
+    # 220 notional and 2 fee, held when the order was placed.
+    assert ledger.balance(100, 'USD') == Balance('USD', 778., 1000.)
+
+    ledger.apply_execution_report(fake_execution_report(
+        side='sell', order_status='filled', filled_quantity=1.,
+        avg_fill_price=120., order_id='c138'))
+    assert ledger.balances(100) == {
+        'BTC': Balance('BTC', 2., 3.), 'USD': Balance('USD', 898., 1120.)}
+
+
+@pytest.mark.test_id(2)
+def test_resync_on_snapshot():
+    ledger = BalanceLedger()
+    ledger.apply_execution_report(fake_execution_report(
+        filled_quantity=1., avg_fill_price=100.))
+    assert ledger.balances(100) == {}
+
+    ledger.apply_balances_snapshot(fake_snapshot(2., 900.))
+    # Duplicate report, already in the snapshot.
+    ledger.apply_execution_report(fake_execution_report(
+        filled_quantity=1., avg_fill_price=100.))
+    assert ledger.balance(100, 'BTC') == Balance('BTC', 2., 2.)
+    ledger.apply_execution_report(fake_execution_report(
+        filled_quantity=1.5, avg_fill_price=100.))
+    assert ledger.balance(100, 'BTC') == Balance('BTC', 2.5, 2.5)
+    assert ledger.balance(101, 'BTC') is None
+    ledger.apply_execution_report(fake_execution_report(
+        order_status='filled', filled_quantity=2., avg_fill_price=100.))
+    ledger.apply_execution_report(fake_execution_report(
+        order_status='filled', filled_quantity=2., avg_fill_price=100.))
+    assert ledger.balance(100, 'BTC') == Balance('BTC', 3., 3.)
+
+
+@pytest.mark.test_id(3)
+def test_orders_filled_before_snapshot():
+    ledger = BalanceLedger()
+    # Already includes the 1 BTC filled before the snapshot.
+    ledger.apply_balances_snapshot(fake_snapshot(2., 900.))
+    ledger.apply_working_orders(WorkingOrdersReport(
+        account_info=AccountInfo(account_id=100),
+        orders=[fake_execution_report(filled_quantity=1.,
+                                      avg_fill_price=100.)]))
+    ledger.apply_execution_report(fake_execution_report(
+        filled_quantity=1.5, avg_fill_price=100.))
+    assert ledger.balance(100, 'BTC') == Balance('BTC', 2.5, 2.5)
+
+    ledger.apply_balances_snapshot(AccountDataReport(
+        account_info=AccountInfo(account_id=100),
+        balances=[Balance('BTC', 2., 2.), Balance('USD', 900., 900.)],
+        open_positions=[],
+        orders=[fake_execution_report(filled_quantity=1.,
+                                      avg_fill_price=100., order_id='c138')]))
+    ledger.apply_execution_report(fake_execution_report(
+        order_status='filled', filled_quantity=2., avg_fill_price=100.,
+        order_id='c138'))
+    assert ledger.balance(100, 'BTC') == Balance('BTC', 3., 3.)
@@ -0,0 +1,62 @@
+import pytest
+
+from omega_client.messaging.common_types import AccountInfo, OpenPosition, \
+    OpenPositionsReport
+
+# numpy is only installed with the portfolio extra.
+np = pytest.importorskip('numpy')
+# pylint: disable=C0413
+from omega_client.portfolio.position_book import PositionBook
+# pylint: enable=C0413
+
+
+def fake_report(account_id, positions):
+    return OpenPositionsReport(
+        account_info=AccountInfo(account_id=account_id),
+        open_positions=[OpenPosition(symbol, side, quantity, initial_price,
+                                     0.)
+                        for symbol, side, quantity, initial_price
+                        in positions])
+
+
+@pytest.fixture
+def position_book():
+    position_book = PositionBook()
+    position_book.load_report(fake_report(100, [
+        ('BTC/USD', 'buy', 2., 100.),
+        ('ETH/BTC', 'sell', 10., 0.5)]), exchange='kraken')
+    position_book.load_report(fake_report(101, [
+        ('BTC/USD', 'sell', 1., 110.)]), exchange='gemini')
+    return position_book
+
+
+@pytest.mark.test_id(1)
+def test_mark_to_market(position_book):
+    assert position_book.positions['account_id'].tolist() == [100, 100, 101]
+    assert position_book.mark_to_market(
+        {'BTC/USD': 120., 'ETH/BTC': 0.4}).tolist() == \
+        pytest.approx([40., 1., -10.])
+    # Unknown prices are valued at initial_price.
+    assert position_book.mark_to_market({}).tolist() == [0., 0., 0.]
+    prices = position_book.price_array({'BTC/USD': 120.})
+    assert np.isnan(prices[position_book.symbols.index('ETH/BTC')])
+
+    position_book.load_report(fake_report(100, []), exchange='kraken')
+    assert position_book.mark_to_market(prices).tolist() == [-10.]
+
+
+@pytest.mark.test_id(2)
+def test_net_exposure_and_aggregate_by_exchange(position_book):
+    prices = {'BTC/USD': 120., 'ETH/BTC': 0.4}
+    assert position_book.net_exposure(prices) == pytest.approx({
+        'BTC': 2. - 1. + 4., 'USD': -240. + 120., 'ETH': -10.})
+    by_exchange = position_book.aggregate_by_exchange(prices)
+    assert by_exchange.keys() == {('kraken', 'USD'), ('kraken', 'BTC'),
+                                  ('gemini', 'USD')}
+    assert by_exchange[('kraken', 'USD')] == pytest.approx({
+        'gross_notional': 240., 'net_notional': 240., 'unrealized_pl': 40.})
+    assert by_exchange[('kraken', 'BTC')] == pytest.approx({
+        'gross_notional': 4., 'net_notional': -4., 'unrealized_pl': 1.})
+    assert by_exchange[('gemini', 'USD')] == pytest.approx({
+        'gross_notional': 120., 'net_notional': -120.,
+        'unrealized_pl': -10.})